@@ -0,0 +1,123 @@
+"""
+Seeded synthetic catalog for benchmarks: listings with a Zipf-skewed location and owner distribution,
+skewed property types, log-normal prices scaled by location and type, amenities, free-text descriptions,
+and user shortlists with a long-tailed size distribution.
+
+The same seed always produces the same catalog, so runs on different commits measure the same workload.
+"""
+import bisect
+import random
+from itertools import accumulate, islice
+from typing import Iterator, List, Tuple
+
+from services.property_manager import PropertyManager
+from services.search_manager import PropertySearch
+
+CITIES = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", "San Antonio", "San Diego",
+          "Dallas", "San Jose", "Austin", "Jacksonville", "San Francisco", "Columbus", "Seattle", "Denver",
+          "Boston", "Nashville", "Portland", "Las Vegas", "Miami", "Atlanta", "Minneapolis", "Tampa"]
+# (type, share of listings, base price)
+PROPERTY_TYPES = [("Apartment", 45, 2500), ("Studio", 15, 1400), ("Condo", 20, 3200), ("Townhouse", 12, 4200),
+                  ("Villa", 8, 9000)]
+# (amenity, probability a listing has it)
+AMENITIES = [("Parking", 0.55), ("Laundry", 0.5), ("Gym", 0.3), ("Balcony", 0.35), ("Elevator", 0.4),
+             ("Pool", 0.15), ("Garden", 0.2), ("Security", 0.25)]
+ADJECTIVES = ["sunny", "spacious", "quiet", "modern", "renovated", "cozy", "bright", "charming", "luxury", "historic"]
+FEATURES = ["river view", "open kitchen", "hardwood floors", "walk-in closet", "rooftop terrace", "fireplace",
+            "high ceilings", "close to transit", "near park", "downtown location", "private entrance", "city view"]
+
+
+class ZipfSampler:
+    def __init__(self, population: List, exponent: float = 1.1):
+        """Draws from `population` with probability proportional to 1 / rank ** exponent (first = most likely)."""
+        self.population = population
+        self.cumulative = list(accumulate(1 / (rank ** exponent) for rank in range(1, len(population) + 1)))
+
+    def __call__(self, rng: random.Random):
+        return self.population[bisect.bisect_left(self.cumulative, rng.random() * self.cumulative[-1])]
+
+
+class Catalog:
+    def __init__(self, listings: int, seed: int = 7, locations: int = 500):
+        """
+        Synthetic catalog description:
+            `listings`: Number of listings to generate (10k to 1M are practical)
+            `seed`: Seed of every random draw
+            `locations`: Number of distinct localities; the first ones are real city names and the busiest
+        Owners are `listings // 10` users, also Zipf-distributed, so a few owners hold many listings.
+        """
+        self.listings = listings
+        self.seed = seed
+        self.locations = (CITIES + [f"District {n}" for n in range(1, max(locations - len(CITIES), 0) + 1)])[:locations]
+        self.owners = [f"owner_{n}" for n in range(1, max(listings // 10, 1) + 1)]
+        self.pick_location = ZipfSampler(self.locations)
+        self.pick_owner = ZipfSampler(self.owners, exponent=0.9)
+        self.type_weights = list(accumulate(share for _, share, _ in PROPERTY_TYPES))
+
+    def location_factor(self, location: str) -> float:
+        """Price multiplier of a location: the busiest cities are the most expensive."""
+        return 1.0 + 2.0 / (1 + self.locations.index(location) ** 0.5) if location in CITIES else 0.8
+
+    def generate(self) -> Iterator[Tuple[str, dict]]:
+        """
+        Yields (owner user_id, listing payload) pairs as accepted by `PropertyManager.add_property`.
+        """
+        rng = random.Random(self.seed)
+        factors = {location: self.location_factor(location) for location in self.locations}
+        for _ in range(self.listings):
+            location = self.pick_location(rng)
+            property_type, _, base_price = rng.choices(PROPERTY_TYPES, cum_weights=self.type_weights)[0]
+            price = round(base_price * factors[location] * rng.lognormvariate(0, 0.45), 2)
+            description = (f"{rng.choice(ADJECTIVES).capitalize()} {property_type.lower()} in {location} with "
+                           f"{' and '.join(rng.sample(FEATURES, rng.randint(1, 3)))}")
+            yield self.pick_owner(rng), {
+                "location": location,
+                "price": price,
+                "property_type": property_type,
+                "description": description,
+                "amenities": [amenity for amenity, share in AMENITIES if rng.random() < share],
+            }
+
+    def shortlists(self, property_ids: List[str], users: int) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Yields (user_id, shortlisted property IDs) for `users` shoppers. Shortlist sizes are log-normal:
+        most users keep a handful of listings, a few keep hundreds.
+        """
+        rng = random.Random(self.seed + 1)
+        for n in range(1, users + 1):
+            size = min(int(rng.lognormvariate(1.6, 1.0)) + 1, len(property_ids))
+            yield f"shopper_{n}", rng.sample(property_ids, size)
+
+
+def build_store(catalog: Catalog, columnar: bool = False, shortlist_users: int = 0,
+                batch: int = 10000) -> Tuple[PropertyManager, PropertySearch]:
+    """
+    Loads a catalog into a new in-memory store.
+    Returns:
+        (PropertyManager, PropertySearch) sharing the store; the search result cache is disabled
+    """
+    manager = PropertyManager(columnar=columnar)
+    search = PropertySearch(
+        properties=manager.properties,
+        indices=manager.indices,
+        columnar_store=manager.columnar_store,
+        lock=manager.lock,
+        location_suggestions=manager.location_suggestions,
+    )
+    load_catalog(manager, search, catalog, shortlist_users, batch)
+    return manager, search
+
+
+def load_catalog(manager: PropertyManager, search: PropertySearch, catalog: Catalog, shortlist_users: int = 0,
+                 batch: int = 10000):
+    """
+    Loads a catalog through the bulk ingestion path, `batch` listings (of any owners) at a time,
+    then fills the shortlists of `shortlist_users` shoppers.
+    """
+    listings = catalog.generate()
+    while chunk := list(islice(listings, batch)):
+        manager.add_listings(chunk)
+
+    for user_id, property_ids in catalog.shortlists(list(manager.properties), shortlist_users):
+        for property_id in property_ids:
+            search.shortlist_property(user_id, property_id, manager.user_shortlists)
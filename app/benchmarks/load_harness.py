@@ -0,0 +1,248 @@
+"""
+End-to-end load harness: concurrent clients drive the FastAPI app in-process through its ASGI interface
+(httpx.ASGITransport, no sockets) with a weighted mix of reads and writes across the /api/v1 endpoints.
+Unlike the service benchmark, latencies include routing, query parsing, `response_model` validation and
+serialization, and the time a request waits behind the others on the event loop and the writer lock.
+
+The app is configured from the usual PLP_* environment variables (e.g. PLP_COLUMNAR_STORE=1,
+PLP_SEARCH_CACHE_SIZE=0) and its shared store is preloaded with a seeded synthetic catalog.
+
+Usage (from app/):
+    python -m benchmarks.load_harness --listings 50000 --clients 32 --duration 20 --write-ratio 0.1
+    python -m benchmarks.load_harness --listings 50000 --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.catalog import Catalog, load_catalog
+from benchmarks.service_benchmark import _commit, compare, latency_summary, search_profiles
+from main import app
+from models.schemas import StatusEnum
+from services.intializer import property_manager, property_search
+
+BASE_URL = "http://harness/api/v1"
+
+# (method, path, query params, JSON body); the path is relative to BASE_URL
+Request = Tuple[str, str, dict, Optional[object]]
+
+
+class Workload:
+    def __init__(self, catalog: Catalog, shortlist_users: int):
+        """
+        Request generators per endpoint, keyed by "METHOD /route template", with their weight in the read
+        or the write mix. Writes pick their targets from the preloaded catalog and from the listings
+        created during the run, so status changes and shortlists keep hitting live listings.
+        """
+        self.catalog = catalog
+        self.property_ids: List[str] = list(property_manager.properties)
+        self.shoppers = [f"shopper_{n}" for n in range(1, shortlist_users + 1)] or ["shopper_1"]
+        self.profiles = list(search_profiles(catalog).values())
+        self.new_listings = [details for _, details in Catalog(1000, seed=catalog.seed + 3).generate()]
+        self.reads: Dict[str, Tuple[int, Callable[[random.Random], Request]]] = {
+            "GET /properties/search": (60, self.search),
+            "GET /properties/search?facets": (5, self.search_with_facets),
+            "GET /properties/export": (1, self.export),
+            "GET /locations/suggest": (15, self.suggest),
+            "GET /user/properties": (10, self.user_properties),
+            "GET /user/shortlist": (10, self.user_shortlist),
+            "GET /properties/search/cache": (1, lambda rng: ("GET", "/properties/search/cache", {}, None)),
+        }
+        self.writes: Dict[str, Tuple[int, Callable[[random.Random], Request]]] = {
+            "POST /properties": (35, self.create),
+            "POST /properties/bulk": (5, self.bulk_create),
+            "PATCH /properties/{property_id}": (25, self.update_status),
+            "POST /user/shortlist/{property_id}": (20, self.shortlist),
+            "DELETE /user/shortlist/{property_id}": (15, self.unshortlist),
+        }
+
+    def search(self, rng: random.Random) -> Request:
+        return "GET", "/properties/search", {**rng.choice(self.profiles)(rng), "limit": 10}, None
+
+    def search_with_facets(self, rng: random.Random) -> Request:
+        method, path, params, body = self.search(rng)
+        return method, path, {**params, "facets": True}, body
+
+    def export(self, rng: random.Random) -> Request:
+        # A tail location keeps every export to a few dozen listings
+        location = rng.choice(self.catalog.locations[-50:])
+        return "GET", "/properties/export", {"location": location}, None
+
+    def suggest(self, rng: random.Random) -> Request:
+        location = self.catalog.pick_location(rng)
+        return "GET", "/locations/suggest", {"prefix": location[:rng.randint(1, 4)]}, None
+
+    def user_properties(self, rng: random.Random) -> Request:
+        return "GET", "/user/properties", {"user_id": self.catalog.pick_owner(rng), "page": 1, "limit": 10}, None
+
+    def user_shortlist(self, rng: random.Random) -> Request:
+        return "GET", "/user/shortlist", {"user_id": rng.choice(self.shoppers), "page": 1, "limit": 10}, None
+
+    def create(self, rng: random.Random) -> Request:
+        body = rng.choice(self.new_listings)
+        return "POST", "/properties", {"user_id": self.catalog.pick_owner(rng)}, body
+
+    def bulk_create(self, rng: random.Random) -> Request:
+        body = rng.sample(self.new_listings, 10)
+        return "POST", "/properties/bulk", {"user_id": self.catalog.pick_owner(rng)}, body
+
+    def update_status(self, rng: random.Random) -> Request:
+        property_id = rng.choice(self.property_ids)
+        listing = property_manager.properties[property_id]
+        status = StatusEnum.AVAILABLE if listing.status == StatusEnum.SOLD else StatusEnum.SOLD
+        return "PATCH", f"/properties/{property_id}", {"status": status.value, "user_id": listing.user_id}, None
+
+    def shortlist(self, rng: random.Random) -> Request:
+        return "POST", f"/user/shortlist/{rng.choice(self.property_ids)}", {"user_id": rng.choice(self.shoppers)}, None
+
+    def unshortlist(self, rng: random.Random) -> Request:
+        # Remove one of the 10 most recent available entries, so most removals hit; an empty shortlist gets a 400
+        user_id = rng.choice(self.shoppers)
+        saved = property_manager.user_shortlists.page(user_id, 1, 10) if user_id in property_manager.user_shortlists else []
+        property_id = rng.choice(saved) if saved else rng.choice(self.property_ids)
+        return "DELETE", f"/user/shortlist/{property_id}", {"user_id": user_id}, None
+
+    def picker(self, write_ratio: float) -> Callable[[random.Random], Tuple[str, Request]]:
+        """
+        Returns:
+            A function drawing (endpoint name, request): a write with probability `write_ratio`, else a read,
+            each endpoint in proportion to its weight within its mix
+        """
+        mixes = [(list(mix), [weight for weight, _ in mix.values()], mix) for mix in (self.reads, self.writes)]
+
+        def pick(rng: random.Random) -> Tuple[str, Request]:
+            names, weights, mix = mixes[1] if rng.random() < write_ratio else mixes[0]
+            name = rng.choices(names, weights)[0]
+            return name, mix[name][1](rng)
+        return pick
+
+
+async def drive(workload: Workload, clients: int, duration: float, warmup: float, write_ratio: float,
+                seed: int) -> Tuple[Dict[str, List[float]], Dict[str, Counter], float]:
+    """
+    Runs `clients` concurrent closed-loop clients (each sends its next request when the previous one returns)
+    for `warmup` untimed seconds, then `duration` timed seconds.
+    Returns:
+        (endpoint -> latencies in microseconds, endpoint -> status code counts, timed seconds)
+    """
+    pick = workload.picker(write_ratio)
+    samples: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    started = time.perf_counter()
+    measure_from, stop_at = started + warmup, started + warmup + duration
+
+    async def client(http: httpx.AsyncClient, rng: random.Random):
+        while (now := time.perf_counter()) < stop_at:
+            name, (method, path, params, body) = pick(rng)
+            start = time.perf_counter_ns()
+            response = await http.request(method, path, params=params, json=body)
+            await response.aread()
+            elapsed = (time.perf_counter_ns() - start) / 1000
+            # In-process, a request that never blocks never suspends its client either; yield the way a
+            # socket round trip would, or one client monopolizes the event loop and starves the others
+            await asyncio.sleep(0)
+            if now >= measure_from:
+                samples[name].append(elapsed)
+                statuses[name][response.status_code] += 1
+            if method != "GET" and response.status_code == 200 and name.startswith("POST /properties"):
+                created = response.json()
+                for record in created.get("results", [created]):
+                    if record.get("property_id"):
+                        workload.property_ids.append(record["property_id"])
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url=BASE_URL) as http:
+        await asyncio.gather(*(client(http, random.Random(seed * 1000 + n)) for n in range(clients)))
+    return samples, statuses, time.perf_counter() - measure_from
+
+
+def run(listings: int, seed: int, clients: int, duration: float, warmup: float, write_ratio: float,
+        shortlist_users: int) -> dict:
+    """
+    Preloads the app's store and runs the load.
+    Returns:
+        JSON-serializable report: `meta`, overall throughput, and per endpoint: throughput, status codes and
+        latency statistics (same keys as the service benchmark, so `--baseline` comparisons work alike)
+    """
+    catalog = Catalog(listings, seed=seed)
+    started = time.perf_counter()
+    load_catalog(property_manager, property_search, catalog, shortlist_users)
+    build_seconds = time.perf_counter() - started
+
+    workload = Workload(catalog, shortlist_users)
+    samples, statuses, elapsed = asyncio.run(drive(workload, clients, duration, warmup, write_ratio, seed))
+    property_manager.flush()
+
+    results = {}
+    for name in sorted(samples):
+        results[name] = {
+            "throughput_rps": round(len(samples[name]) / elapsed, 1),
+            "status": {str(code): count for code, count in sorted(statuses[name].items())},
+            **latency_summary(samples[name]),
+        }
+    total = sum(len(latencies) for latencies in samples.values())
+    errors = sum(count for counts in statuses.values() for code, count in counts.items() if code >= 400)
+    return {
+        "meta": {
+            "listings": listings,
+            "seed": seed,
+            "clients": clients,
+            "duration_seconds": round(elapsed, 2),
+            "write_ratio": write_ratio,
+            "shortlist_users": shortlist_users,
+            "build_seconds": round(build_seconds, 2),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "overall": {
+            "requests": total,
+            "errors": errors,
+            "throughput_rps": round(total / elapsed, 1),
+            **latency_summary([latency for latencies in samples.values() for latency in latencies]),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--listings", type=int, default=10000, help="Catalog size preloaded into the app")
+    parser.add_argument("--seed", type=int, default=7, help="Seed of the synthetic catalog and of the clients")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10, help="Timed seconds of load")
+    parser.add_argument("--warmup", type=float, default=1, help="Untimed seconds of load before the timed part")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="Share of requests that are writes (0 to 1)")
+    parser.add_argument("--shortlist-users", type=int, default=1000, help="Shoppers with a shortlist")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare p50 latencies against")
+    args = parser.parse_args()
+    if not 0 <= args.write_ratio <= 1:
+        parser.error("--write-ratio must be between 0 and 1")
+
+    report = run(args.listings, args.seed, args.clients, args.duration, args.warmup, args.write_ratio,
+                 args.shortlist_users)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            report["p50_ratio_vs_baseline"] = compare(report, json.load(baseline))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
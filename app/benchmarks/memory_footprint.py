@@ -0,0 +1,93 @@
+"""
+Memory footprint of the listing records: bytes per listing of the previous dict-backed record
+versus the slotted `Property` with interned categorical fields and tuple amenities.
+
+Usage (from app/):
+    python -m benchmarks.memory_footprint --listings 100000
+"""
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+
+from models.property import Property
+
+LOCATIONS = ["New York", "Boston", "Austin", "Chicago", "Seattle", "Denver", "Miami", "Atlanta"]
+PROPERTY_TYPES = ["Apartment", "Villa", "Condo", "Townhouse", "Studio"]
+AMENITIES = ["Pool", "Gym", "Parking", "Garden", "Elevator", "Balcony", "Security", "Laundry"]
+
+
+class DictProperty:
+    """The listing record before `__slots__` and interning: one `__dict__` and private strings per instance."""
+
+    def __init__(self, property_id, user_id, location, price, property_type, status, timestamp, description,
+                 amenities):
+        self.property_id = property_id
+        self.user_id = user_id
+        self.location = location
+        self.price = price
+        self.property_type = property_type
+        self.status = status
+        self.timestamp = timestamp
+        self.description = description
+        self.amenities = amenities
+
+
+def payloads(count: int, seed: int = 7):
+    """
+    Yields listing payloads decoded from JSON, as the API receives them, so every categorical
+    string is a separate object just like in a request body.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for number in range(1, count + 1):
+        location, property_type = rng.choice(LOCATIONS), rng.choice(PROPERTY_TYPES)
+        record = json.loads(json.dumps({
+            "property_id": f"property_{number}",
+            "user_id": f"user_{rng.randrange(count // 20 + 1)}",
+            "location": location,
+            "price": round(rng.uniform(500, 20000), 2),
+            "property_type": property_type,
+            "status": "Available",
+            "description": f"{property_type} in {location}",
+            "amenities": rng.sample(AMENITIES, rng.randint(1, 4)),
+        }))
+        record["timestamp"] = start + timedelta(seconds=number)
+        yield record
+
+
+def bytes_per_listing(record_type, count: int) -> float:
+    """
+    Memory retained per listing once `count` payloads have been decoded into `record_type` instances
+    and the payloads dropped: everything the records keep alive, strings included.
+    """
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    listings = [record_type(**fields) for fields in payloads(count)]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del listings
+    return used / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--listings", type=int, default=100000, help="Number of listings to build")
+    args = parser.parse_args()
+
+    before = bytes_per_listing(DictProperty, args.listings)
+    after = bytes_per_listing(Property, args.listings)
+    print(json.dumps({
+        "listings": args.listings,
+        "before_bytes_per_listing": round(before, 1),
+        "after_bytes_per_listing": round(after, 1),
+        "saved_percent": round(100 * (before - after) / before, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
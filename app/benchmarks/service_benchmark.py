@@ -0,0 +1,185 @@
+"""
+Service-level microbenchmarks of PropertyManager and PropertySearch on a seeded synthetic catalog.
+Every operation is timed one call at a time; results are emitted as JSON (latency percentiles in microseconds)
+so that runs on two commits can be compared with --baseline.
+
+Usage (from app/):
+    python -m benchmarks.service_benchmark --listings 100000 --output before.json
+    python -m benchmarks.service_benchmark --listings 100000 --baseline before.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.catalog import Catalog, PROPERTY_TYPES, build_store
+from models.schemas import StatusEnum
+
+
+def measure(operation: Callable[[int], object], repeat: int, warmup: int = 5) -> Dict[str, float]:
+    """
+    Times `operation(i)` for i in range(repeat), one call at a time, after `warmup` untimed calls.
+    Returns:
+        Number of calls and latency statistics in microseconds
+    """
+    for i in range(warmup):
+        operation(i)
+    samples: List[float] = []
+    for i in range(repeat):
+        start = time.perf_counter_ns()
+        operation(i)
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    return latency_summary(samples)
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """
+    Returns:
+        Number of samples and their mean, p50, p95, p99 and max, rounded to 0.01 (same unit as the samples)
+    """
+    samples = sorted(samples)
+    percentile = lambda p: samples[min(int(p * len(samples)), len(samples) - 1)]
+    return {
+        "ops": len(samples),
+        "mean_us": round(statistics.fmean(samples), 2),
+        "p50_us": round(percentile(0.50), 2),
+        "p95_us": round(percentile(0.95), 2),
+        "p99_us": round(percentile(0.99), 2),
+        "max_us": round(samples[-1], 2),
+    }
+
+
+def search_profiles(catalog: Catalog) -> Dict[str, Callable[[random.Random], dict]]:
+    """
+    Search criteria generators, from the broadest to the most selective query.
+    """
+    busiest, median, tail = catalog.locations[0], catalog.locations[len(catalog.locations) // 10], catalog.locations[-1]
+    types = [name for name, _, _ in PROPERTY_TYPES]
+    return {
+        "all_by_price": lambda rng: {},
+        "all_by_timestamp_desc": lambda rng: {"sort_key": "timestamp", "descending": True},
+        "price_band": lambda rng: {"min_price": 2000, "max_price": 2300},
+        "busiest_location": lambda rng: {"location": busiest},
+        "mid_location_and_type": lambda rng: {"location": median, "property_type": rng.choice(types)},
+        "tail_location": lambda rng: {"location": tail},
+        "location_type_price": lambda rng: {"location": busiest, "property_type": "Villa",
+                                            "min_price": 10000, "max_price": 20000},
+        "deep_page_50": lambda rng: {"location": busiest, "page": 50},
+        "amenities_all": lambda rng: {"amenities_all": ["Pool", "Garden"]},
+        "text_query": lambda rng: {"q": rng.choice(["river view", "rooftop terrace", "quiet studio"])},
+    }
+
+
+def run(listings: int, seed: int, repeat: int, columnar: bool, shortlist_users: int) -> dict:
+    """
+    Builds the catalog and times every benchmarked operation.
+    Returns:
+        JSON-serializable report: `meta` (workload, environment, commit) and `results` per operation
+    """
+    catalog = Catalog(listings, seed=seed)
+    started = time.perf_counter()
+    manager, search = build_store(catalog, columnar=columnar, shortlist_users=shortlist_users)
+    build_seconds = time.perf_counter() - started
+
+    rng = random.Random(seed + 2)
+    property_ids = list(manager.properties)
+    shoppers = [f"shopper_{n}" for n in range(1, shortlist_users + 1)] or ["shopper_1"]
+    results = {}
+
+    # Reads
+    for name, profile in search_profiles(catalog).items():
+        queries = [{**profile(rng), "limit": 10} for _ in range(16)]
+        results[f"search_properties.{name}"] = measure(
+            lambda i: search.search_properties(queries[i % len(queries)]), repeat)
+    owners = [catalog.pick_owner(rng) for _ in range(64)]
+    results["get_user_properties.page"] = measure(
+        lambda i: manager.get_user_properties(owners[i % len(owners)], page=1, limit=10), repeat)
+    results["get_shortlisted.page"] = measure(
+        lambda i: search.get_shortlisted(shoppers[i % len(shoppers)], manager.user_shortlists, page=1, limit=10),
+        repeat)
+
+    # Writes
+    new_listings = [details for _, details in Catalog(repeat + 5, seed=seed + 3).generate()]
+    results["add_property"] = measure(lambda i: manager.add_property("owner_bench", new_listings[i % len(new_listings)]),
+                                      repeat)
+    sold = rng.sample(property_ids, min(repeat + 5, len(property_ids)))
+    owner_of = lambda property_id: manager.properties[property_id].user_id
+    results["update_property_status.sell"] = measure(
+        lambda i: manager.update_property_status(sold[i], StatusEnum.SOLD, owner_of(sold[i])), repeat)
+    results["update_property_status.relist"] = measure(
+        lambda i: manager.update_property_status(sold[i], StatusEnum.AVAILABLE, owner_of(sold[i])), repeat)
+    picks = [(rng.choice(shoppers), rng.choice(property_ids)) for _ in range(repeat + 5)]
+    results["shortlist_property"] = measure(
+        lambda i: search.shortlist_property(*picks[i], manager.user_shortlists), repeat)
+    results["remove_shortlist_property"] = measure(
+        lambda i: search.remove_shortlist_property(*picks[i], manager.user_shortlists), repeat)
+
+    return {
+        "meta": {
+            "listings": listings,
+            "seed": seed,
+            "repeat": repeat,
+            "columnar": columnar,
+            "shortlist_users": shortlist_users,
+            "build_seconds": round(build_seconds, 2),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict) -> Dict[str, Optional[float]]:
+    """
+    Returns:
+        Operation -> p50 latency ratio current / baseline (above 1.0 is slower), None when not in the baseline
+    """
+    ratios = {}
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        ratios[name] = round(result["p50_us"] / before["p50_us"], 3) if before and before["p50_us"] else None
+    return ratios
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--listings", type=int, default=10000, help="Catalog size (10k to 1M)")
+    parser.add_argument("--seed", type=int, default=7, help="Seed of the synthetic catalog and of the queries")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per operation")
+    parser.add_argument("--shortlist-users", type=int, default=1000, help="Shoppers with a shortlist")
+    parser.add_argument("--columnar", action="store_true", help="Search through the columnar store")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare p50 latencies against")
+    args = parser.parse_args()
+
+    report = run(args.listings, args.seed, args.repeat, args.columnar, args.shortlist_users)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            report["p50_ratio_vs_baseline"] = compare(report, json.load(baseline))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
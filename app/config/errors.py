@@ -4,5 +4,10 @@ ERROR_MESSAGES = {
     "ALREADY_SHORTLISTED": "Property is already shortlisted.",
     "STATUS_UNCHANGED": "Property is already in the requested status.",
     "EMPTY_SHORTLIST": "Your shortlist has no properties currently.",
-    "NOT_IN_SHORTLIST" : "Property is not in the your shortlist."
+    "NOT_IN_SHORTLIST" : "Property is not in the your shortlist.",
+    "EMPTY_SAVED_SEARCH": "A saved search needs at least one criterion.",
+    "INVALID_PRICE_RANGE": "min_price must not exceed max_price.",
+    "EMPTY_QUERY": "The query has no searchable words.",
+    "TOO_MANY_SAVED_SEARCHES": "You have reached the maximum number of saved searches.",
+    "SAVED_SEARCH_NOT_EXIST": "Saved search does not exist."
 }
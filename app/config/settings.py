@@ -0,0 +1,31 @@
+import os
+
+# Keep a NumPy-backed columnar copy of the listings and evaluate search predicates as vectorized masks
+USE_COLUMNAR_STORE = os.getenv("PLP_COLUMNAR_STORE", "0") == "1"
+
+# Search result cache: maximum number of cached result pages (0 disables it) and their time to live in seconds
+SEARCH_CACHE_SIZE = int(os.getenv("PLP_SEARCH_CACHE_SIZE", "1024"))
+SEARCH_CACHE_TTL = float(os.getenv("PLP_SEARCH_CACHE_TTL", "30"))
+
+# Durability: directory for the write-ahead log and snapshots (unset keeps all state in memory only),
+# fsync batching of the log, and the number of logged writes between two snapshots
+DATA_DIR = os.getenv("PLP_DATA_DIR") or None
+WAL_SYNC_EVERY = int(os.getenv("PLP_WAL_SYNC_EVERY", "64"))
+WAL_SYNC_INTERVAL = float(os.getenv("PLP_WAL_SYNC_INTERVAL", "0.05"))
+SNAPSHOT_EVERY = int(os.getenv("PLP_SNAPSHOT_EVERY", "100000"))
+
+# Multi-worker deployment (`uvicorn --workers N`): every worker keeps a replica of the store and follows the
+# write-ahead log in DATA_DIR, so all workers serve the same data. Requires DATA_DIR and a POSIX system.
+SHARED_STORE = os.getenv("PLP_SHARED_STORE", "0") == "1"
+
+# Writes from the API go through a single writer thread, which applies up to WRITE_BATCH_SIZE queued
+# creations and status updates as one group: one lock hold, one index publish and one log sync.
+# PLP_WRITE_THREAD=0 applies every write on the event loop instead: lower write latency on a saturated
+# process (no GIL hand-off), but a write waiting for the lock (snapshot, other workers) blocks every request.
+WRITE_THREAD = os.getenv("PLP_WRITE_THREAD", "1") == "1"
+WRITE_BATCH_SIZE = int(os.getenv("PLP_WRITE_BATCH_SIZE", "64"))
+
+# Identical concurrent searches that miss the result cache share one computation: the first one computes in a
+# thread pool, off the event loop, and the others that arrive meanwhile join it. PLP_SEARCH_COALESCE=0 computes
+# each one right away on the loop.
+SEARCH_COALESCE = os.getenv("PLP_SEARCH_COALESCE", "1") == "1"
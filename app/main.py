@@ -1,7 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers import properties,search, user
+from routers import metrics, properties,search, user
+from services.intializer import property_manager, write_queue
+from utils.metrics import MetricsMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    write_queue.close()  # Apply the writes still queued
+    property_manager.flush()  # Make the last batch of logged writes durable on shutdown
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(properties.router, prefix="/api/v1", tags=["Properties"])
 app.include_router(search.router, prefix="/api/v1", tags=["Search"])
-app.include_router(user.router, prefix="/api/v1", tags=["User"])
\ No newline at end of file
+app.include_router(user.router, prefix="/api/v1", tags=["User"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.add_middleware(MetricsMiddleware)
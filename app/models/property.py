@@ -1,8 +1,25 @@
 from datetime import datetime
+from sys import intern
+from typing import Iterable, Optional
+
+
+def _category(value: Optional[str]) -> Optional[str]:
+    """
+    Returns the single shared copy of a categorical string (location, type, status, amenity, owner),
+    so a million listings in one city hold one "New York" instead of a million. str Enums become plain strings.
+    """
+    if value is None:
+        return None
+    return intern(str(getattr(value, "value", value)))
+
 
 class Property:
+    # No per-instance __dict__: a listing costs its slots plus the values they point to
+    __slots__ = ("property_id", "user_id", "location", "price", "property_type", "_status", "timestamp",
+                 "description", "amenities", "fragment")
+
     def __init__(self, property_id: str, user_id: str, location: str, price: float, property_type: str,
-                 status: str, timestamp: datetime, description: str, amenities: list[str]):
+                 status: str, timestamp: datetime, description: str, amenities: Iterable[str]):
         """
         Initializes a property with the following attributes:
         - property_id: Unique identifier for the property
@@ -13,14 +30,27 @@ class Property:
         - status: Current status ('Available' or 'Sold')
         - timestamp: Datetime object representing the listing creation time
         - description: Brief description of the property
-        - amenities: List of amenities (e.g., pool, gym)
+        - amenities: Amenities (e.g., pool, gym), stored as a tuple
+        Categorical fields are interned (see `_category`).
+        `fragment` caches the (status, JSON bytes) encoding of the listing for responses (see `utils.streaming`);
+        the status is the only field that changes after creation, and changing it drops the cached encoding.
         """
         self.property_id = property_id
-        self.user_id = user_id
-        self.location = location
+        self.user_id = _category(user_id)
+        self.location = _category(location)
         self.price = price
-        self.property_type = property_type
+        self.property_type = _category(property_type)
         self.status = status
         self.timestamp = timestamp
         self.description = description
-        self.amenities = amenities
+        self.amenities = tuple(_category(amenity) for amenity in amenities) if amenities is not None else None
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @status.setter
+    def status(self, value: str):
+        # Compares equal to StatusEnum members, since StatusEnum is a str Enum
+        self._status = _category(value)
+        self.fragment = None
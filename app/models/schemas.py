@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List
+from typing import Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -31,3 +31,77 @@ class PropertyDetail(BaseModel):
     timestamp: datetime
     description: str
     amenities: List[str]
+
+class BulkRecordResult(BaseModel):
+    index: int  # Position of the record in the request body
+    property_id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkCreateResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkRecordResult]
+
+class StatusUpdate(BaseModel):
+    property_id: str
+    status: StatusEnum
+
+class ShortlistUpdate(BaseModel):
+    add: List[str] = []  # Applied first
+    remove: List[str] = []
+
+class BatchItemResult(BaseModel):
+    property_id: str
+    code: Optional[str] = None  # Key of config.errors.ERROR_MESSAGES when the item was rejected
+    error: Optional[str] = None
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]  # In input order
+
+class ShortlistBatchResult(BaseModel):
+    add: BatchResult
+    remove: BatchResult
+
+class PropertyBatch(BaseModel):
+    items: List[PropertyDetail]  # Found listings, in request order, whatever their status
+    missing: List[str]  # Requested IDs that do not exist
+
+class LocationSuggestion(BaseModel):
+    location: str
+    count: int  # Number of Available listings in the location
+
+class PriceBucket(BaseModel):
+    min: float
+    max: Optional[float] = None  # Exclusive; None for the open-ended last bucket
+    count: int
+
+class SearchFacets(BaseModel):
+    location: Dict[str, int]  # Location -> number of matching listings, largest first
+    property_type: Dict[str, int]
+    price_histogram: List[PriceBucket]
+
+class FacetedSearchResult(BaseModel):
+    items: List[PropertyDetail]  # The requested page
+    total: int  # Number of matching listings across all pages
+    facets: SearchFacets
+
+class SavedSearchCreate(BaseModel):
+    location: Optional[str] = None
+    property_type: Optional[str] = None
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    amenities_all: Optional[List[str]] = None  # Every one must be present, case-insensitive
+    amenities_any: Optional[List[str]] = None  # At least one must be present
+    q: Optional[str] = None  # At least one of its words must be in the description
+
+class SavedSearchDetail(SavedSearchCreate):
+    search_id: str
+    user_id: str
+    created_at: datetime
+
+class SavedSearchMatch(BaseModel):
+    seq: int  # Increases with every match; pass the last one seen as `after` to read only newer matches
+    search_id: str
+    property: PropertyDetail
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from utils.metrics import REGISTRY, CONTENT_TYPE
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """
+    Exposes the metrics of this worker process for Prometheus.
+    Returns:
+        PlainTextResponse: Every metric in the Prometheus text exposition format: search and write stage
+        timings, lock wait/hold times, HTTP request durations, index sizes and search cache counters.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
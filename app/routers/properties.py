@@ -1,9 +1,37 @@
-from fastapi import APIRouter, HTTPException
-from services.intializer import property_manager
-from models.schemas import PropertyCreate, PropertyDetail, StatusEnum
+import asyncio
+import json
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import ValidationError
+from services.intializer import property_manager, write_queue
+from config.errors import ERROR_MESSAGES
+from models.schemas import (
+    PropertyCreate, PropertyDetail, StatusEnum, BulkCreateResult, StatusUpdate, BatchResult, PropertyBatch,
+)
+from utils.streaming import property_json, JSON_MEDIA_TYPE
 
 router = APIRouter()
 
+BULK_VALIDATION_CHUNK = 1000  # Records validated between two yields to the event loop
+MAX_BATCH_SIZE = 1000  # Items per batch lookup or update
+
+
+def batch_result(ids: List[str], errors: List[Optional[str]]) -> dict:
+    """
+    Builds a `BatchResult` from the per-item error codes returned by a batch service method.
+    """
+    results = [
+        {"property_id": item_id} if code is None else {"property_id": item_id, "code": code, "error": ERROR_MESSAGES[code]}
+        for item_id, code in zip(ids, errors)
+    ]
+    failed = sum(code is not None for code in errors)
+    return {"succeeded": len(errors) - failed, "failed": failed, "results": results}
+
+
+def check_batch_size(size: int):
+    if size > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch holds at most {MAX_BATCH_SIZE} items.")
+
 @router.post("/properties", response_model=PropertyDetail)
 async def create_property(
     property_data: PropertyCreate,
@@ -19,7 +47,7 @@ async def create_property(
     """
 
     try:
-        created_property = property_manager.add_property(
+        created_property = await write_queue.add_property(
             user_id=user_id,
             property_details=property_data.model_dump()
         )
@@ -28,6 +56,53 @@ async def create_property(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/properties/bulk", response_model=PropertyBatch)
+async def get_properties(
+    property_ids: List[str] = Query(..., description="IDs of the properties, repeated or comma-separated")
+):
+    """
+    Retrieves many properties by ID in one request, whatever their status.
+    Args:
+        property_ids (List[str]): The IDs of the properties to retrieve, at most 1000.
+    Returns:
+        PropertyBatch: The properties found, in request order, assembled from their cached JSON encodings,
+            and the requested IDs that do not exist.
+    """
+    property_ids = [property_id.strip() for value in property_ids for property_id in value.split(",") if property_id.strip()]
+    check_batch_size(len(property_ids))
+    try:
+        found = property_manager.get_properties(property_ids)
+        missing = [property_id for property_id, prop in zip(property_ids, found) if prop is None]
+        body = (b'{"items":[' + b",".join(property_json(prop) for prop in found if prop is not None) +
+                b'],"missing":' + json.dumps(missing).encode() + b"}")
+        return Response(content=body, media_type=JSON_MEDIA_TYPE)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.patch("/properties/bulk", response_model=BatchResult)
+async def update_properties_status(
+    updates: List[StatusUpdate],
+    user_id: str
+):
+    """
+    Updates the status of many properties in one request, applied together under one lock acquisition.
+    Args:
+        updates (List[StatusUpdate]): The property IDs and their new status, at most 1000.
+        user_id (str): The ID of the user making the request; it must own every property.
+    Returns:
+        BatchResult: Per-update results, in input order; rejected updates carry the error code and message
+            (PROPERTY_NOT_EXIST, UNAUTHORIZED or STATUS_UNCHANGED) and do not prevent the others.
+    """
+    check_batch_size(len(updates))
+    try:
+        errors = await write_queue.run(
+            property_manager.update_properties_status, [(update.property_id, update.status) for update in updates], user_id)
+        return batch_result([update.property_id for update in updates], errors)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.patch("/properties/{property_id}")
 async def update_property_status(
     property_id: str,
@@ -43,10 +118,89 @@ async def update_property_status(
     Returns:
         dict: A message indicating the success or failure of the operation.
     """
-    success, message = property_manager.update_property_status(property_id, status, user_id)
+    success, message = await write_queue.update_property_status(property_id, status, user_id)
     if not success:
         raise HTTPException(
             status_code=403,
             detail=message
         )
     return {"message": f"Property {property_id} status updated to {status}"}
+
+
+async def _ndjson_records(request: Request):
+    """
+    Yields the records of an NDJSON body as it streams in; a line that is not valid JSON yields its error message.
+    """
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return f"Invalid JSON: {e}"
+
+
+@router.post("/properties/bulk", response_model=BulkCreateResult)
+async def bulk_create_properties(
+    request: Request,
+    user_id: str
+):
+    """
+    Creates many property listings in one request.
+    The body is either a JSON array of property objects or NDJSON (`Content-Type: application/x-ndjson`),
+    one property object per line, which is validated while it is streamed in.
+    Args:
+        request (Request): The request carrying the JSON array or NDJSON body.
+        user_id (str): The ID of the user creating the properties.
+    Returns:
+        BulkCreateResult: Per-record results, in input order, with the property ID or the validation error.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        records = _ndjson_records(request)
+    else:
+        try:
+            body = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of properties.")
+
+        async def array_records():
+            for record in body:
+                yield record
+        records = array_records()
+
+    # Validate in chunks, yielding to the event loop between chunks
+    results, valid, positions = [], [], []
+    index = 0
+    async for record in records:
+        try:
+            if isinstance(record, str):
+                raise ValueError(record)
+            valid.append(PropertyCreate.model_validate(record).model_dump())
+            positions.append(index)
+            results.append({"index": index})
+        except (ValidationError, ValueError) as e:
+            results.append({"index": index, "error": str(e)})
+        index += 1
+        if index % BULK_VALIDATION_CHUNK == 0:
+            await asyncio.sleep(0)
+
+    try:
+        created = await write_queue.run(property_manager.add_properties, user_id, valid)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for position, new_property in zip(positions, created):
+        results[position]["property_id"] = new_property.property_id
+
+    return {"created": len(created), "failed": len(results) - len(created), "results": results}
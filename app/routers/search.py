@@ -1,20 +1,48 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
-from models.schemas import PropertyDetail, StatusEnum, SortKeyEnum
-from services.intializer import property_search
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Tuple, Union
+from models.schemas import PropertyDetail, StatusEnum, SortKeyEnum, LocationSuggestion, FacetedSearchResult
+from services.intializer import property_search, search_flights
+from utils.pagination import encode_cursor
+from utils.streaming import ndjson_stream, json_array, faceted_json, NDJSON_MEDIA_TYPE, JSON_MEDIA_TYPE
 
 router = APIRouter()
 
-@router.get("/properties/search", response_model=List[PropertyDetail])
+
+def _amenity_list(values: Optional[List[str]]) -> Optional[List[str]]:
+    """Accepts repeated query params (`?amenities_all=Pool&amenities_all=Gym`) as well as comma-separated ones."""
+    if not values:
+        return None
+    return [amenity.strip() for value in values for amenity in value.split(",") if amenity.strip()]
+
+
+def _search_page(criteria: dict, facets: bool) -> Tuple[bytes, dict]:
+    """Runs a search and encodes the response body and headers, once per flight of identical searches."""
+    result = property_search.search_properties(criteria)
+    headers = {}
+    if result and len(result) == criteria["limit"] and not criteria["q"]:
+        headers["X-Next-Cursor"] = encode_cursor(criteria["sort_key"], criteria["descending"], result[-1])
+    if facets:
+        counts = property_search.search_facets(criteria)
+        return faceted_json(result, counts.pop("total"), counts), headers
+    return json_array(result), headers
+
+@router.get("/properties/search", response_model=Union[List[PropertyDetail], FacetedSearchResult])
 async def search_properties(
     min_price: Optional[float] = Query(None, description="Minimum price filter"),
     max_price: Optional[float] = Query(None, description="Maximum price filter"),
     location: Optional[str] = Query(None, description="Location filter"),
     property_type: Optional[str] = Query(None, description="Type of property (e.g., Apartment, Villa)"),
+    q: Optional[str] = Query(None, description="Full-text query over descriptions; results are ranked by relevance"),
+    amenities_all: Optional[List[str]] = Query(None, description="Amenities that must all be present (e.g., Pool,Gym)"),
+    amenities_any: Optional[List[str]] = Query(None, description="Amenities of which at least one must be present"),
     sort_key: Optional[SortKeyEnum] = Query("price", description="Field to sort by (price or timestamp)"),
     descending: Optional[bool] = Query(False, description="Sort in descending order"),
     page: Optional[int] = Query(1, description="Page number for pagination"),
-    limit: Optional[int] = Query(10, description="Number of items per page")
+    limit: Optional[int] = Query(10, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page; replaces page"),
+    stream: Optional[bool] = Query(False, description="Stream every match as NDJSON instead of returning one page"),
+    facets: Optional[bool] = Query(False, description="Also return the total hit count and per-location, per-type and price facets")
 ):
     """
     Searches for properties based on various filters and sorting criteria.
@@ -23,12 +51,27 @@ async def search_properties(
         max_price (Optional[float]): The maximum price filter for the search. Defaults to None.
         location (Optional[str]): Filter properties by location. Defaults to None.
         property_type (Optional[str]): Filter properties by type (e.g., Apartment, Villa). Defaults to None.
+        q (Optional[str]): Full-text query over descriptions; ranks results by BM25 relevance instead of sort_key.
+            Defaults to None.
+        amenities_all (Optional[List[str]]): Amenities that must all be present, case-insensitive. Defaults to None.
+        amenities_any (Optional[List[str]]): Amenities of which at least one must be present. Defaults to None.
         sort_key (Optional[SortKeyEnum]): The field to sort results by price or timestamp. Defaults to 'price'.
         descending (Optional[bool]): Whether to sort results in descending order. Defaults to False.
         page (Optional[int]): The page number for paginated results. Defaults to 1.
         limit (Optional[int]): The number of items per page. Defaults to 10.
+        cursor (Optional[str]): Cursor returned in the `X-Next-Cursor` header of the previous page. Defaults to None.
+        stream (Optional[bool]): Stream every matching property as NDJSON, ignoring pagination. Defaults to False.
+        facets (Optional[bool]): Wrap the page with the total hit count and facet counts. Defaults to False.
     Returns:
         List[PropertyDetail]: A list of properties matching the specified filters and criteria.
+        A full page also sets the `X-Next-Cursor` header to resume right after its last property (except with `q`,
+        which pages with `page` only).
+        With `stream`, an NDJSON stream of every matching property in sort order.
+        With `facets`, a `FacetedSearchResult`: the page as `items`, plus `total` and `facets`.
+        The body is assembled from the listings' cached JSON encodings (see `utils.streaming`) rather than
+        validated item by item through the response model; the schema is the same.
+        Identical searches (same normalized criteria, no write to their location in between) that arrive
+        together share one response instead of each computing it (see `utils.cache.SingleFlight`).
     """
     try:
         criteria = {
@@ -36,13 +79,98 @@ async def search_properties(
             "max_price": max_price,
             "location": location,
             "property_type": property_type,
+            "q": q,
+            "amenities_all": _amenity_list(amenities_all),
+            "amenities_any": _amenity_list(amenities_any),
             "status": StatusEnum.AVAILABLE,
             "sort_key": sort_key,
             "descending": descending,
             "page": page,
             "limit": limit,
+            "cursor": cursor,
         }
-        result = property_search.search_properties(criteria)
-        return result
+        if stream:
+            return StreamingResponse(ndjson_stream(property_search.iter_properties(criteria)), media_type=NDJSON_MEDIA_TYPE)
+        key = property_search.flight_key(criteria, bool(facets))
+        if key is None:
+            body, headers = _search_page(criteria, facets)
+        else:
+            body, headers = await search_flights.run(key, _search_page, criteria, facets)
+        return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/properties/export")
+async def export_properties(
+    min_price: Optional[float] = Query(None, description="Minimum price filter"),
+    max_price: Optional[float] = Query(None, description="Maximum price filter"),
+    location: Optional[str] = Query(None, description="Location filter"),
+    property_type: Optional[str] = Query(None, description="Type of property (e.g., Apartment, Villa)"),
+    q: Optional[str] = Query(None, description="Full-text query over descriptions; results are ranked by relevance"),
+    amenities_all: Optional[List[str]] = Query(None, description="Amenities that must all be present (e.g., Pool,Gym)"),
+    amenities_any: Optional[List[str]] = Query(None, description="Amenities of which at least one must be present"),
+    sort_key: Optional[SortKeyEnum] = Query("price", description="Field to sort by (price or timestamp)"),
+    descending: Optional[bool] = Query(False, description="Sort in descending order")
+):
+    """
+    Exports every available property matching the filters as an NDJSON stream.
+    Properties are produced lazily from the search indices, so memory stays bounded regardless of the result size.
+    Args:
+        min_price (Optional[float]): The minimum price filter. Defaults to None.
+        max_price (Optional[float]): The maximum price filter. Defaults to None.
+        location (Optional[str]): Filter properties by location. Defaults to None.
+        property_type (Optional[str]): Filter properties by type. Defaults to None.
+        q (Optional[str]): Full-text query over descriptions; exports in relevance order. Defaults to None.
+        amenities_all (Optional[List[str]]): Amenities that must all be present. Defaults to None.
+        amenities_any (Optional[List[str]]): Amenities of which at least one must be present. Defaults to None.
+        sort_key (Optional[SortKeyEnum]): The field to order the export by. Defaults to 'price'.
+        descending (Optional[bool]): Whether to export in descending order. Defaults to False.
+    Returns:
+        StreamingResponse: One `PropertyDetail` JSON object per line.
+    """
+    criteria = {
+        "min_price": min_price,
+        "max_price": max_price,
+        "location": location,
+        "property_type": property_type,
+        "q": q,
+        "amenities_all": _amenity_list(amenities_all),
+        "amenities_any": _amenity_list(amenities_any),
+        "status": StatusEnum.AVAILABLE,
+        "sort_key": sort_key,
+        "descending": descending,
+    }
+    return StreamingResponse(ndjson_stream(property_search.iter_properties(criteria)), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get("/locations/suggest", response_model=List[LocationSuggestion])
+async def suggest_locations(
+    prefix: str = Query(..., description="Beginning of the location typed so far (case-insensitive)"),
+    limit: Optional[int] = Query(5, description="Number of suggestions (at most 10)")
+):
+    """
+    Suggests locations for a search box, with the locations holding the most available listings first.
+    Args:
+        prefix (str): Beginning of the location name typed so far.
+        limit (Optional[int]): The number of suggestions to return, from 1 to 10. Defaults to 5.
+    Returns:
+        List[LocationSuggestion]: Matching locations with their number of available listings.
+    """
+    try:
+        return [
+            {"location": location, "count": count}
+            for location, count in property_search.suggest_locations(prefix, limit)
+        ]
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/properties/search/cache")
+async def get_search_cache_stats():
+    """
+    Reports the search result cache counters.
+    Returns:
+        dict: Number of cached entries, capacity, and hit/miss/eviction/invalidation counts.
+    """
+    return property_search.cache.stats()
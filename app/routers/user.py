@@ -1,41 +1,90 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from services.intializer import property_manager, property_search
-from models.schemas import PropertyDetail
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from services.intializer import property_manager, property_search, write_queue
+from models.schemas import (
+    PropertyDetail, SavedSearchCreate, SavedSearchDetail, SavedSearchMatch, ShortlistUpdate, ShortlistBatchResult,
+)
+from routers.properties import batch_result, check_batch_size
+from utils.streaming import json_array, matches_json, JSON_MEDIA_TYPE
+from utils.events import HEARTBEAT_SECONDS
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 1000  # Items per page of a user's listings or shortlist
+
 @router.get("/user/properties", response_model=List[PropertyDetail])
-async def get_user_properties(user_id: str):
+async def get_user_properties(
+    user_id: str,
+    page: Optional[int] = Query(1, description="Page number for pagination"),
+    limit: Optional[int] = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Number of items per page")
+):
     """
     Retrieves all available properties owned by a specific user.
     Args:
         user_id (str): The ID of the user whose properties are to be retrieved.
+        page (Optional[int]): The page number for paginated results. Defaults to 1.
+        limit (Optional[int]): The number of items per page, at most 1000. Defaults to 50.
     Returns:
-        List[PropertyDetail]: A list of properties owned by the user, sorted by creation date in descending order.
+        List[PropertyDetail]: A list of properties owned by the user, sorted by creation date in descending order,
+            assembled from the listings' cached JSON encodings.
     """
     try:
-        user_properties = property_manager.get_user_properties(user_id)
-        return user_properties
+        user_properties = property_manager.get_user_properties(user_id, page=page, limit=limit)
+        return Response(content=json_array(user_properties), media_type=JSON_MEDIA_TYPE)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/user/shortlist", response_model=List[PropertyDetail])
-async def get_shortlisted_properties(user_id: str):
+async def get_shortlisted_properties(
+    user_id: str,
+    page: Optional[int] = Query(1, description="Page number for pagination"),
+    limit: Optional[int] = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Number of items per page")
+):
     """
-    Retrieves all properties shortlisted by a specific user.
+    Retrieves the available properties shortlisted by a specific user.
     Args:
         user_id (str): The ID of the user whose shortlisted properties are to be retrieved.
+        page (Optional[int]): The page number for paginated results. Defaults to 1.
+        limit (Optional[int]): The number of items per page, at most 1000. Defaults to 50.
     Returns:
-        List[PropertyDetail]: A list of properties owned by the user, sorted by creation date in descending order.
+        List[PropertyDetail]: A list of shortlisted properties, most recently shortlisted first, assembled from
+            the listings' cached JSON encodings.
     """
     try:
         shortlisted_properties = property_search.get_shortlisted(
             user_id=user_id,
-            user_shortlists=property_manager.user_shortlists
+            user_shortlists=property_manager.user_shortlists,
+            page=page,
+            limit=limit
         )
-        return shortlisted_properties
+        return Response(content=json_array(shortlisted_properties), media_type=JSON_MEDIA_TYPE)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/user/shortlist/bulk", response_model=ShortlistBatchResult)
+async def update_shortlist(
+    update: ShortlistUpdate,
+    user_id: str
+):
+    """
+    Adds and removes many properties of the user's shortlist in one request, applied together under one lock
+    acquisition: additions first, then removals.
+    Args:
+        update (ShortlistUpdate): The property IDs to add and to remove, at most 1000 in total.
+        user_id (str): The ID of the user whose shortlist is updated.
+    Returns:
+        ShortlistBatchResult: Per-item results of the additions and of the removals, in input order; rejected
+            items carry the error code and message (PROPERTY_NOT_EXIST, ALREADY_SHORTLISTED, EMPTY_SHORTLIST or
+            NOT_IN_SHORTLIST) and do not prevent the others.
+    """
+    check_batch_size(len(update.add) + len(update.remove))
+    try:
+        added, removed = await write_queue.run(
+            property_search.update_shortlist, user_id, update.add, update.remove, property_manager.user_shortlists)
+        return {"add": batch_result(update.add, added), "remove": batch_result(update.remove, removed)}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -54,11 +103,8 @@ async def shortlist_property(
         dict: A success message confirming the property was added to the shortlist.
     """
     try:
-        success, message = property_search.shortlist_property(
-            user_id=user_id,
-            property_id=property_id,
-            user_shortlists=property_manager.user_shortlists
-        )
+        success, message = await write_queue.run(
+            property_search.shortlist_property, user_id, property_id, property_manager.user_shortlists)
         if not success:
             raise HTTPException(
                 status_code=400,
@@ -83,11 +129,8 @@ async def remove_from_shortlist(
         dict: A success message confirming the property was rmeoved from the shortlist.
     """
     try:
-        success, message = property_search.remove_shortlist_property(
-            user_id=user_id,
-            property_id=property_id,
-            user_shortlists=property_manager.user_shortlists
-        )
+        success, message = await write_queue.run(
+            property_search.remove_shortlist_property, user_id, property_id, property_manager.user_shortlists)
         if not success:
             raise HTTPException(
                 status_code=400,
@@ -95,4 +138,130 @@ async def remove_from_shortlist(
             )
         return {"message": f"Property {property_id} has been successfully removed from your shortlist."}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _saved_search_detail(saved) -> SavedSearchDetail:
+    return SavedSearchDetail(search_id=saved.search_id, user_id=saved.user_id, created_at=saved.created_at,
+                             **saved.criteria)
+
+
+@router.post("/user/saved-searches", response_model=SavedSearchDetail)
+async def save_search(
+    user_id: str,
+    criteria: SavedSearchCreate
+):
+    """
+    Saves search criteria; listings that later become available and match them are added to the user's matches.
+    Args:
+        user_id (str): The ID of the user saving the search.
+        criteria (SavedSearchCreate): The search filters; at least one must be set.
+    Returns:
+        SavedSearchDetail: The saved search with its ID.
+    """
+    try:
+        saved = await write_queue.run(property_manager.save_search, user_id, criteria.model_dump())
+        return _saved_search_detail(saved)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/user/saved-searches", response_model=List[SavedSearchDetail])
+async def get_saved_searches(
+    user_id: str
+):
+    """
+    Retrieves the saved searches of a specific user.
+    Args:
+        user_id (str): The ID of the user whose saved searches are to be retrieved.
+    Returns:
+        List[SavedSearchDetail]: The user's saved searches, oldest first.
+    """
+    try:
+        return [_saved_search_detail(saved) for saved in property_manager.get_saved_searches(user_id)]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/user/saved-searches/matches", response_model=List[SavedSearchMatch])
+async def get_search_matches(
+    user_id: str,
+    after: Optional[int] = Query(0, description="Sequence number of the last match already seen"),
+    limit: Optional[int] = Query(50, description="Maximum number of matches")
+):
+    """
+    Retrieves the listings that matched the user's saved searches since they were saved, so clients read new
+    matches instead of polling the search endpoint.
+    Args:
+        user_id (str): The ID of the user whose matches are to be retrieved.
+        after (Optional[int]): Only return matches with a higher `seq`. Defaults to 0 (all kept matches).
+        limit (Optional[int]): The maximum number of matches. Defaults to 50.
+    Returns:
+        List[SavedSearchMatch]: Matches of available listings, oldest first, assembled from the listings' cached
+            JSON encodings. Only the latest 1000 matches per user are kept.
+    """
+    try:
+        matches = property_manager.get_search_matches(user_id, after=after, limit=limit)
+        return Response(content=matches_json(matches), media_type=JSON_MEDIA_TYPE)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/user/saved-searches/{search_id}")
+async def delete_saved_search(
+    search_id: str,
+    user_id: str
+):
+    """
+    Deletes one of the user's saved searches.
+    Args:
+        search_id (str): The ID of the saved search to be deleted.
+        user_id (str): The ID of the user owning the saved search.
+    Returns:
+        dict: A success message confirming the saved search was deleted.
+    """
+    try:
+        success, message = await write_queue.run(property_manager.delete_saved_search, user_id, search_id)
+        if not success:
+            raise HTTPException(
+                status_code=400,
+                detail=message
+            )
+        return {"message": f"Saved search {search_id} has been successfully deleted."}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _event_stream(user_id: str):
+    subscription = property_manager.events.subscribe(user_id)
+    try:
+        yield b": connected\n\n"  # Sends the headers right away
+        while True:
+            batch = await subscription.next_batch(HEARTBEAT_SECONDS)
+            if batch is None:
+                # Idle: apply other workers' writes (their events queue up for the next batch) and keep the connection open
+                property_manager.refresh()
+                batch = b": keepalive\n\n"
+            yield batch
+    finally:
+        property_manager.events.unsubscribe(subscription)
+
+
+@router.get("/user/events")
+async def stream_user_events(
+    user_id: str
+):
+    """
+    Streams the user's events as server-sent events (text/event-stream), instead of re-fetching the shortlist
+    and the saved search matches to notice changes.
+    Args:
+        user_id (str): The ID of the user whose events are to be streamed.
+    Returns:
+        StreamingResponse: An endless stream of `status` events (a shortlisted listing was sold or relisted),
+            `match` events (a listing matched a saved search, as in `/user/saved-searches/matches`), and `lagged`
+            events (the client fell behind and events were dropped; re-fetch to resynchronize).
+    """
+    return StreamingResponse(_event_stream(user_id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
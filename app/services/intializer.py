@@ -1,12 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
 from services.property_manager import PropertyManager
 from services.search_manager import PropertySearch
+from services.write_queue import WriteQueue
+from utils.cache import SingleFlight
+from utils.metrics import REGISTRY, Gauge
+from config.settings import (
+    USE_COLUMNAR_STORE, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL, SEARCH_COALESCE,
+    DATA_DIR, WAL_SYNC_EVERY, WAL_SYNC_INTERVAL, SNAPSHOT_EVERY, SHARED_STORE, WRITE_THREAD, WRITE_BATCH_SIZE,
+)
 
-# Shared PropertyManager instance
-property_manager = PropertyManager()
+# Shared PropertyManager instance, restored from DATA_DIR when persistence is enabled.
+# With SHARED_STORE, every uvicorn worker builds its own replica and keeps it in sync through DATA_DIR.
+property_manager = PropertyManager(
+    columnar=USE_COLUMNAR_STORE,
+    data_dir=DATA_DIR,
+    wal_sync_every=WAL_SYNC_EVERY,
+    wal_sync_interval=WAL_SYNC_INTERVAL,
+    snapshot_every=SNAPSHOT_EVERY,
+    shared=SHARED_STORE,
+)
 
 # Shared PropertySearch instance, initialized with the PropertyManager's data
 property_search = PropertySearch(
     properties=property_manager.properties,
-    price_index=property_manager.price_index,
-    location_index=property_manager.location_index,
-)
\ No newline at end of file
+    indices=property_manager.indices,
+    columnar_store=property_manager.columnar_store,
+    generations=property_manager.generations,
+    cache_size=SEARCH_CACHE_SIZE,
+    cache_ttl=SEARCH_CACHE_TTL,
+    wal=property_manager.wal,
+    lock=property_manager.lock,
+    refresh=property_manager.refresh,
+    location_suggestions=property_manager.location_suggestions,
+)
+
+# Single writer in front of the PropertyManager; API handlers await their writes instead of taking the lock
+write_queue = WriteQueue(property_manager, max_batch=WRITE_BATCH_SIZE, threaded=WRITE_THREAD)
+
+# Identical concurrent searches of the search route share one computation, run one at a time on a search thread
+search_flights = SingleFlight(enabled=SEARCH_COALESCE, executor=ThreadPoolExecutor(1, thread_name_prefix="search"))
+
+def _register_gauges():
+    """
+    Index size, shortlist and cache gauges of the shared instances, read on every /metrics scrape.
+    """
+    current = lambda: property_manager.indices.current
+    cache_stat = lambda name: lambda: property_search.cache.stats()[name]
+    for metric in (
+        Gauge("plp_listings", "Listings in the store, Sold included.", lambda: len(property_manager.properties)),
+        Gauge("plp_price_index_entries", "Entries of the price index, i.e. Available listings.",
+              lambda: len(current().price_index)),
+        Gauge("plp_locations", "Locations with at least one Available listing.", lambda: len(current().location_index)),
+        Gauge("plp_owners", "Owners with at least one Available listing.", lambda: len(current().owner_index)),
+        Gauge("plp_text_index_terms", "Distinct terms of the full-text index.", lambda: len(current().term_index)),
+        Gauge("plp_shortlist_users", "Users with a shortlist.", lambda: len(property_manager.user_shortlists.users)),
+        Gauge("plp_shortlist_entries", "Shortlist entries across all users.",
+              lambda: property_manager.user_shortlists.entry_count),
+        Gauge("plp_saved_searches", "Saved searches percolated against new listings.",
+              lambda: len(property_manager.saved_searches.searches)),
+        Gauge("plp_saved_search_matches_total", "Listings filed into saved search inboxes.",
+              lambda: property_manager.saved_searches.seq, kind="counter"),
+        Gauge("plp_event_subscriptions", "Open server-sent event streams.",
+              lambda: property_manager.events.subscription_count),
+        Gauge("plp_search_cache_entries", "Cached search result pages.", cache_stat("entries")),
+        Gauge("plp_search_cache_hits_total", "Search result cache hits.", cache_stat("hits"), kind="counter"),
+        Gauge("plp_search_cache_misses_total", "Search result cache misses.", cache_stat("misses"), kind="counter"),
+        Gauge("plp_search_cache_evictions_total", "Search result cache evictions.", cache_stat("evictions"),
+              kind="counter"),
+        Gauge("plp_search_cache_invalidations_total", "Search results invalidated by writes.",
+              cache_stat("invalidations"), kind="counter"),
+        Gauge("plp_search_flights_total", "Searches computed by the search route, one per flight of identical searches.",
+              lambda: search_flights.leaders, kind="counter"),
+        Gauge("plp_search_coalesced_total", "Searches answered by an identical search in flight instead of computing.",
+              lambda: search_flights.shared, kind="counter"),
+    ):
+        REGISTRY.register(metric)
+
+
+_register_gauges()
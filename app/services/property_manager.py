@@ -1,22 +1,96 @@
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import threading
 from models.property import Property
 from models.schemas import StatusEnum, PropertyDetail
-from utils.indices import add_to_indices, remove_from_indices
+from utils.indices import (
+    add_to_indices, remove_from_indices, bulk_add_to_indices,
+    add_to_owner_index, remove_from_owner_index, bulk_add_to_owner_index,
+)
+from utils.columnar import ColumnarStore
+from utils.cache import GenerationCounters
+from utils.persistence import WriteAheadLog, SharedWriterLock, read_snapshot, write_snapshot
+from utils.versioning import IndexVersion, IndexDraft, VersionedIndices, PersistentSortedList, ShardedDict
+from utils.shortlists import ShortlistStore
+from utils.autocomplete import SuggestionTrie
+from utils.percolator import Percolator, SavedSearch, Match, CRITERIA, MAX_SAVED_SEARCHES
+from utils.metrics import REGISTRY, Histogram, Stopwatch, TimedLock
+from utils.events import EventHub, sse_event
+from utils.streaming import match_json
 from config.errors import ERROR_MESSAGES 
 
+WRITE_STAGES = REGISTRY.register(Histogram(
+    "plp_write_stage_seconds",
+    "Time spent per stage of a write under the writer lock (create, index, publish, percolate, log), and applying other workers' writes before a read (refresh/catch_up).",
+    ["operation", "stage"],
+))
+
 
 class PropertyManager:
-    def __init__(self):
+    def __init__(self, columnar: bool = False, data_dir: Optional[str] = None, wal_sync_every: int = 64,
+                 wal_sync_interval: float = 0.05, snapshot_every: int = 100000, shared: bool = False):
         """
         Initialize Property storage, User Shortlists, Search indices
+        Parameters:
+            `columnar`: Also keep a NumPy-backed columnar copy of the listings for vectorized search
+            `data_dir`: Directory for the write-ahead log and snapshots; None keeps everything in memory only
+            `wal_sync_every`, `wal_sync_interval`: fsync batching of the write-ahead log
+            `snapshot_every`: Number of logged writes after which a new snapshot is taken in the background
+            `shared`: Several worker processes serve `data_dir`. Each keeps a full in-memory replica, writers
+                      serialize on a file lock and apply the other workers' log records first, and reads
+                      `refresh` from the log, so every worker returns the same results
         """
+        if shared and data_dir is None:
+            raise ValueError("A shared store needs a data directory")
         self.properties: Dict[str, Property] = {}  # Dictionary of property_id -> Property
-        self.user_shortlists: Dict[str, List[Tuple[datetime,str]]] = {}  # Dictionary of user_id -> List of shortlisted (timestamp,property ID)
-        self.price_index: List[tuple] = []  # Sorted list of (price, property_id) for efficient range filtering
-        self.location_index: Dict[str, List[str]] = {}  # Dictionary of location -> List of property IDs
-        self.lock = threading.Lock()  # Lock for concurrent write operations
+        self.user_shortlists = ShortlistStore()  # Per-user shortlists with available views and a property -> users reverse index
+        self.indices = VersionedIndices()  # Immutable price/timestamp/location/owner index versions, swapped atomically on write
+        self.columnar_store: Optional[ColumnarStore] = ColumnarStore() if columnar else None  # Parallel arrays keyed by dense row ids
+        self.generations = GenerationCounters()  # Per-location write counters used to invalidate cached searches
+        self.location_suggestions = SuggestionTrie()  # Location typeahead weighted by Available listings per location
+        self.saved_searches = Percolator()  # Users' saved searches, matched against listings as they become Available
+        self.events = EventHub()  # Status changes of shortlisted listings and new matches, pushed to connected users
+        self.lock = TimedLock(threading.Lock(), "writer")  # Lock serializing writers; readers never take it
+        self.shared = shared
+
+        # Durability: snapshot + write-ahead log, replayed on startup
+        self.data_dir = data_dir
+        self.snapshot_every = snapshot_every
+        self.wal: Optional[WriteAheadLog] = None
+        self.writer_lock: Optional[SharedWriterLock] = None  # Lock shared with the other workers, if `shared`
+        self._snapshot_running = threading.Event()
+        if data_dir is not None:
+            self.wal = WriteAheadLog(data_dir, sync_every=wal_sync_every, sync_interval=wal_sync_interval, shared=shared)
+            if shared:
+                self.writer_lock = SharedWriterLock(data_dir)
+                self.lock = TimedLock(self.writer_lock, "writer")
+                with self.lock:  # No other worker appends while this one repairs and loads the log
+                    self.wal.repair()
+                    self._recover()
+                self.writer_lock.on_acquire = self._catch_up
+            else:
+                self._recover()
+
+    # Read-only views of the current index version
+    @property
+    def price_index(self) -> PersistentSortedList:
+        return self.indices.current.price_index
+
+    @property
+    def timestamp_index(self) -> PersistentSortedList:
+        return self.indices.current.timestamp_index
+
+    @property
+    def location_index(self) -> ShardedDict:
+        return self.indices.current.location_index
+
+    @property
+    def location_type_index(self) -> ShardedDict:
+        return self.indices.current.location_type_index
+
+    @property
+    def owner_index(self) -> ShardedDict:
+        return self.indices.current.owner_index
 
     def add_property(self, user_id: str, property_details: dict) -> PropertyDetail:
         """
@@ -25,29 +99,72 @@ class PropertyManager:
             created property object
         """
         with self.lock:  # Lock the critical section
-            # Generate unique property ID
-            property_id = f"property_{len(self.properties) + 1}"
-
-            # Create a new Property instance
-            new_property = Property(
-                property_id=property_id,
-                user_id=user_id,
-                location=property_details["location"],
-                price=property_details["price"],
-                property_type=property_details["property_type"],
-                status="Available",
-                timestamp=datetime.now(),
-                description=property_details.get("description"),
-                amenities=property_details.get("amenities")
-            )
-
-            # Store the property
-            self.properties[property_id] = new_property
-
-            # Update indices
-            add_to_indices(self.price_index,self.location_index,new_property)
-
-            return new_property
+            watch = Stopwatch(WRITE_STAGES, "add_property")
+            # Create a new Property instance with the next unique property ID
+            new_property = self._new_property(user_id, property_details, datetime.now())
+
+            # Store the property and publish indices that include it
+            draft = self.indices.begin()
+            self._insert(draft, new_property)
+            watch.lap("index")
+            self._publish(draft, [new_property.location])
+            watch.lap("publish")
+            self._percolate(new_property)
+            watch.lap("percolate")
+            self._log(self._create_record(new_property))
+            watch.lap("log")
+
+        self._maybe_snapshot()
+        return new_property
+
+    def add_properties(self, user_id: str, property_details: List[dict]) -> List[Property]:
+        """
+        Add a batch of property listings with IDs assigned in one block and a single sort-merge per index,
+        all under one short lock hold.
+        Returns:
+            created property objects, in input order
+        """
+        return self.add_listings([(user_id, details) for details in property_details])
+
+    def add_listings(self, listings: List[Tuple[str, dict]]) -> List[Property]:
+        """
+        Add a batch of listings of any number of owners, like `add_properties`: one block of IDs, one sort-merge
+        per index (and per owner in the owner index), one lock hold and one log append.
+        Parameters:
+            `listings`: (owner user_id, listing details) pairs
+        Returns:
+            created property objects, in input order
+        """
+        timestamp = datetime.now()
+        with self.lock:  # Lock the critical section
+            watch = Stopwatch(WRITE_STAGES, "add_properties")
+            new_properties = [
+                self._new_property(user_id, details, timestamp, offset)
+                for offset, (user_id, details) in enumerate(listings)
+            ]
+            watch.lap("create")
+
+            # Store the properties and merge them into the indices
+            self.properties.update((new_property.property_id, new_property) for new_property in new_properties)
+            draft = self.indices.begin()
+            bulk_add_to_indices(draft,new_properties)
+            bulk_add_to_owner_index(draft,new_properties)
+            if self.columnar_store is not None:
+                for new_property in new_properties:
+                    self.columnar_store.append(new_property)
+            watch.lap("index")
+            self._publish(draft, [new_property.location for new_property in new_properties])
+            watch.lap("publish")
+            for new_property in new_properties:
+                self._percolate(new_property)
+            watch.lap("percolate")
+
+            if self.wal is not None:
+                self.wal.append_many([self._create_record(new_property) for new_property in new_properties])
+            watch.lap("log")
+
+        self._maybe_snapshot()
+        return new_properties
 
     def update_property_status(self, property_id: str, status: str, user_id: str) -> Tuple[bool,str]:
         """
@@ -56,40 +173,533 @@ class PropertyManager:
         - True if successful, False otherwise with a message
         """
         with self.lock:  # Lock the critical section
-            if property_id not in self.properties:
-                return False, ERROR_MESSAGES["PROPERTY_NOT_EXIST"]   # Property does not exist
+            error = self._status_error(property_id, status, user_id)
+            if error is not None:
+                return False, ERROR_MESSAGES[error]
 
             property_obj = self.properties[property_id]
+            watch = Stopwatch(WRITE_STAGES, "update_property_status")
+            draft = self.indices.begin()
+            self._apply_status(draft, property_obj, status)
+            watch.lap("index")
+            self._publish(draft, [property_obj.location])
+            watch.lap("publish")
+            self._notify_status(property_obj)
+            if status == StatusEnum.AVAILABLE:
+                self._percolate(property_obj)
+            watch.lap("percolate")
+            self._log({"op": "status", "property_id": property_id, "status": status})
+            watch.lap("log")
+
+        self._maybe_snapshot()
+        return True, ""
+
+    def update_properties_status(self, updates: List[Tuple[str, str]], user_id: str) -> List[Optional[str]]:
+        """
+        Update the status of many properties under one lock hold, with a single index version published and
+        the log records appended and synced together. Updates are validated and applied in input order,
+        so a property listed twice is checked against the status set by its first update.
+        Parameters:
+            `updates`: (property_id, new status) pairs
+        Returns:
+            Per update, None if applied, else the `ERROR_MESSAGES` code of the reason it was rejected
+        """
+        errors: List[Optional[str]] = []
+        with self.lock:  # Lock the critical section
+            watch = Stopwatch(WRITE_STAGES, "update_properties_status")
+            draft = self.indices.begin()
+            changed = []
+            for property_id, status in updates:
+                error = self._status_error(property_id, status, user_id)
+                errors.append(error)
+                if error is None:
+                    property_obj = self.properties[property_id]
+                    self._apply_status(draft, property_obj, status)
+                    changed.append(property_obj)
+            watch.lap("index")
+            if not changed:
+                return errors
+            self._publish(draft, [property_obj.location for property_obj in changed])
+            watch.lap("publish")
+            for property_obj in changed:
+                self._notify_status(property_obj)
+                if property_obj.status == StatusEnum.AVAILABLE:
+                    self._percolate(property_obj)
+            watch.lap("percolate")
+            if self.wal is not None:
+                self.wal.append_many([
+                    {"op": "status", "property_id": property_obj.property_id, "status": property_obj.status}
+                    for property_obj in changed
+                ])
+            watch.lap("log")
+
+        self._maybe_snapshot()
+        return errors
+
+    def apply_writes(self, writes: List[Tuple[str, tuple]], sync: bool = True) -> List[object]:
+        """
+        Apply a group of writes in order under one lock hold, publishing one index version and appending
+        their log records with a single sync (group commit, see `services.write_queue`).
+        Parameters:
+            `writes`: (operation, arguments) pairs, where the operation is "add_property" or
+                      "update_property_status" and the arguments are those of that method
+            `sync`: Sync the records before returning; False leaves them to the log's batched syncs
+        Returns:
+            Per write, what the method of the same name returns, or the exception it raised
+        A listing whose status changes more than once in the group is notified and percolated once, with its
+        final status.
+        """
+        results: List[object] = []
+        with self.lock:  # Lock the critical section
+            watch = Stopwatch(WRITE_STAGES, "apply_writes")
+            draft = self.indices.begin()
+            records, locations, created, changed = [], [], [], {}
+            for operation, args in writes:
+                try:
+                    if operation == "add_property":
+                        user_id, property_details = args
+                        new_property = self._new_property(user_id, property_details, datetime.now())
+                        self._insert(draft, new_property)
+                        records.append(self._create_record(new_property))
+                        locations.append(new_property.location)
+                        created.append(new_property)
+                        results.append(new_property)
+                    elif operation == "update_property_status":
+                        property_id, status, user_id = args
+                        error = self._status_error(property_id, status, user_id)
+                        if error is not None:
+                            results.append((False, ERROR_MESSAGES[error]))
+                            continue
+                        property_obj = self.properties[property_id]
+                        self._apply_status(draft, property_obj, status)
+                        records.append({"op": "status", "property_id": property_id, "status": status})
+                        locations.append(property_obj.location)
+                        changed[property_id] = property_obj
+                        results.append((True, ""))
+                    else:
+                        raise ValueError(f"Unknown write operation: {operation}")
+                except Exception as e:
+                    results.append(e)
+            watch.lap("index")
+            if not records:
+                return results
+            self._publish(draft, locations)
+            watch.lap("publish")
+            for property_obj in changed.values():
+                self._notify_status(property_obj)
+            for property_obj in created + [p for p in changed.values() if p.status == StatusEnum.AVAILABLE]:
+                self._percolate(property_obj)
+            watch.lap("percolate")
+            if self.wal is not None:
+                if sync:
+                    self.wal.append_many(records)
+                else:
+                    for record in records:
+                        self.wal.append(record)
+            watch.lap("log")
+
+        self._maybe_snapshot()
+        return results
+
+    def _new_property(self, user_id: str, property_details: dict, timestamp: datetime, offset: int = 0) -> Property:
+        """
+        Build the next listing, with the next property ID, or the one `offset` places after it for the listings of
+        a batch built before any of them is stored. Caller holds `self.lock` and inserts it right away.
+        """
+        return Property(
+            property_id=f"property_{len(self.properties) + 1 + offset}",
+            user_id=user_id,
+            location=property_details["location"],
+            price=property_details["price"],
+            property_type=property_details["property_type"],
+            status="Available",
+            timestamp=timestamp,
+            description=property_details.get("description"),
+            amenities=property_details.get("amenities")
+        )
+
+    def _status_error(self, property_id: str, status: str, user_id: str) -> Optional[str]:
+        """
+        Check a status update. Caller holds `self.lock`.
+        Returns:
+            None if it can be applied, else the `ERROR_MESSAGES` code of the reason it cannot
+        """
+        property_obj = self.properties.get(property_id)
+        if property_obj is None:
+            return "PROPERTY_NOT_EXIST"  # Property does not exist
+        if property_obj.user_id != user_id:
+            return "UNAUTHORIZED"  # User does not own this property
+        if property_obj.status == status:
+            return "STATUS_UNCHANGED"  # Property is already in required status
+        return None
+
+    def _insert(self, draft: IndexDraft, new_property: Property):
+        """
+        Store a new property and add it to the next index version. Caller holds `self.lock`.
+        """
+        # Store the property; it only becomes searchable once the draft is published
+        self.properties[new_property.property_id] = new_property
+
+        # Update indices
+        add_to_indices(draft,new_property)
+        add_to_owner_index(draft,new_property)
+        if self.columnar_store is not None:
+            self.columnar_store.append(new_property)
+
+    def _apply_status(self, draft: IndexDraft, property_obj: Property, status: str):
+        """
+        Change the status of a property and move it in or out of the next index version. Caller holds `self.lock`.
+        """
+        # Remove property from indices if changing to 'Sold'
+        if property_obj.status == StatusEnum.AVAILABLE and status == StatusEnum.SOLD:
+            remove_from_indices(draft,property_obj)
+            remove_from_owner_index(draft,property_obj)
+            self.user_shortlists.set_available(property_obj.property_id, False)
+
+        # Add property back to indices if changing to 'Available'
+        if property_obj.status == StatusEnum.SOLD and status == StatusEnum.AVAILABLE:
+            add_to_indices(draft,property_obj)
+            add_to_owner_index(draft,property_obj)
+            self.user_shortlists.set_available(property_obj.property_id, True)
+
+        # Update the status; readers still on the previous version filter on it, so a sold listing is never returned
+        property_obj.status = status
+        if self.columnar_store is not None:
+            self.columnar_store.set_status(property_obj.property_id, status)
+
+    def _notify_status(self, property_obj: Property):
+        """
+        Push a listing's new status to the connected users who shortlisted it. Caller holds `self.lock`.
+        """
+        users = self.user_shortlists.shortlisted_by.get(property_obj.property_id)
+        if users:
+            self.events.publish(users, "status", {"property_id": property_obj.property_id,
+                                                  "status": getattr(property_obj.status, "value", property_obj.status)})
+
+    def _percolate(self, property_obj: Property):
+        """
+        File a listing that became Available into the inboxes of the matching saved searches and push the
+        matches to their connected users. Caller holds `self.lock`.
+        """
+        for user_id, match in self.saved_searches.percolate(property_obj):
+            if user_id in self.events.subscribers:
+                self.events.publish_encoded(user_id, sse_event("match", match_json(match, property_obj)))
 
-            if property_obj.user_id != user_id:
-                return False, ERROR_MESSAGES["UNAUTHORIZED"]  # User does not own this property
-            
-            if property_obj.status == status:
-                return False, ERROR_MESSAGES["STATUS_UNCHANGED"]  # Property is already in required status
+    def _publish(self, draft: IndexDraft, locations: List[str]):
+        """
+        Swap in the next index version, then invalidate cached searches of the touched locations and update
+        their weights in the location suggestions.
+        The generation bump comes after the swap, so no cache entry can pair a new generation with an old version.
+        """
+        if self.columnar_store is not None:
+            self.columnar_store.publish()
+        self.indices.publish(draft)
+        location_index = self.indices.current.location_index
+        for location in locations:
+            self.generations.bump(location)
+        for location in set(locations):
+            self.location_suggestions.set(location, len(location_index.get(location, ())))
+
+    @staticmethod
+    def _create_record(new_property: Property) -> dict:
+        """
+        Write-ahead log record for a newly created property.
+        """
+        return {
+            "op": "create", "property_id": new_property.property_id, "user_id": new_property.user_id,
+            "location": new_property.location, "price": new_property.price,
+            "property_type": new_property.property_type, "status": new_property.status,
+            "timestamp": new_property.timestamp, "description": new_property.description,
+            "amenities": new_property.amenities,
+        }
+
+    def _log(self, record: dict):
+        """
+        Append a write record to the write-ahead log, if persistence is enabled.
+        """
+        if self.wal is not None:
+            self.wal.append(record)
+
+    def _recover(self):
+        """
+        Restore the store from the latest snapshot, then replay the write-ahead log written after it.
+        The snapshot holds the index version in its sorted, chunked form, so it is loaded as-is instead of being rebuilt.
+        """
+        state = read_snapshot(self.data_dir)
+        if state is not None:
+            self._restore(state)
+        self._catch_up()
+
+    def _restore(self, state: dict):
+        """
+        Load a snapshot on top of the current store: unknown listings are added, known ones take the snapshot's
+        status, and the snapshot's index version replaces the current one. The log is then read from the first
+        segment the snapshot does not cover.
+        """
+        touched = set()
+        for fields in state["properties"]:
+            property_obj = self.properties.get(fields[0])
+            if property_obj is None:
+                property_obj = Property(*fields)
+                self.properties[property_obj.property_id] = property_obj
+                if self.columnar_store is not None:
+                    self.columnar_store.append(property_obj)
+            elif property_obj.status != fields[5]:
+                property_obj.status = fields[5]
+                if self.columnar_store is not None:
+                    self.columnar_store.set_status(property_obj.property_id, fields[5])
+            else:
+                continue
+            touched.add(property_obj.location)
+        if self.columnar_store is not None:
+            self.columnar_store.publish()
+        self.user_shortlists.load(state["user_shortlists"], self._is_available)
+        self.saved_searches.load(state["saved_searches"])
+        for property_id in state["row_ids"]:  # This worker's rows are a prefix: both follow log order
+            self.indices.row_ids.assign(property_id)
+        self.indices.current = IndexVersion(**state["indices"])
+        for location in touched:
+            self.generations.bump(location)
+        location_index = self.indices.current.location_index
+        for location in touched.union(location_index.keys()):
+            self.location_suggestions.set(location, len(location_index.get(location, ())))
+        self.wal.seek(state["wal_segment"])
+
+    def _catch_up(self):
+        """
+        Apply the log records after the read position (on startup, or written by other worker processes)
+        and publish them as one index version. Caller holds `self.lock`.
+        """
+        draft = self.indices.begin()
+        locations = set()
+        applied = 0
+        try:
+            for record in self.wal.tail():
+                locations.add(self._replay(draft, record))
+                applied += 1
+        except FileNotFoundError:
+            # Fell behind a snapshot that discarded the segments this worker had not read yet
+            state = read_snapshot(self.data_dir)
+            if state is None:
+                raise
+            self._publish(draft, locations - {None})
+            self._restore(state)
+            return self._catch_up()
+        if applied:
+            self._publish(draft, locations - {None})
+
+    def refresh(self):
+        """
+        Apply the writes other worker processes logged since the last refresh, so this worker serves reads
+        from the same data as every other one. Costs a `stat` call when nothing changed; a no-op unless shared.
+        """
+        if not self.shared or not self.wal.has_unread():
+            return
+        watch = Stopwatch(WRITE_STAGES, "refresh")
+        with self.lock.local:
+            self._catch_up()
+        watch.lap("catch_up")
+
+    def _replay(self, draft: IndexDraft, record: dict) -> Optional[str]:
+        """
+        Apply one write-ahead log record without logging it again.
+        Returns:
+            The location of the listing it changed, None for shortlist and saved search records
+        """
+        op = record["op"]
+        if op == "create":
+            fields = {key: value for key, value in record.items() if key != "op"}
+            fields["timestamp"] = datetime.fromisoformat(fields["timestamp"])
+            new_property = Property(**fields)
+            self._insert(draft, new_property)
+            self._percolate(new_property)
+            return fields["location"]
+        elif op == "status":
+            property_obj = self.properties[record["property_id"]]
+            self._apply_status(draft, property_obj, record["status"])
+            self._notify_status(property_obj)
+            if record["status"] == StatusEnum.AVAILABLE:
+                self._percolate(property_obj)
+            return property_obj.location
+        elif op == "shortlist_add":
+            # May already be in the snapshot, in which case `add` is a no-op
+            self.user_shortlists.add(record["user_id"], record["property_id"],
+                                     datetime.fromisoformat(record["timestamp"]), self._is_available(record["property_id"]))
+        elif op == "shortlist_remove":
+            self.user_shortlists.remove(record["user_id"], record["property_id"])
+        elif op == "saved_search_add":
+            # May already be in the snapshot, in which case `add` is a no-op
+            self.saved_searches.add(SavedSearch(record["search_id"], record["user_id"], record["criteria"],
+                                                datetime.fromisoformat(record["created_at"])))
+        elif op == "saved_search_remove":
+            self.saved_searches.remove(record["search_id"])
+
+    def _is_available(self, property_id: str) -> bool:
+        return self.properties[property_id].status == StatusEnum.AVAILABLE
+
+    def _maybe_snapshot(self):
+        """
+        Start a background snapshot once enough writes have been logged since the last one.
+        """
+        if self.wal is None or self.wal.records_since_snapshot < self.snapshot_every:
+            return
+        if self._snapshot_running.is_set():
+            return
+        self._snapshot_running.set()
+        threading.Thread(target=self.take_snapshot, kwargs={"if_due": True}, name="snapshot", daemon=True).start()
 
-            # Remove property from indices if changing to 'Sold'
-            if property_obj.status == StatusEnum.AVAILABLE and status == StatusEnum.SOLD:
-                remove_from_indices(self.price_index,self.location_index,property_obj)
+    def take_snapshot(self, if_due: bool = False):
+        """
+        Write a snapshot of the store and drop the log segments it covers. The state is captured under the
+        write lock together with a log rotation, so the snapshot and the remaining segments never overlap;
+        serialization happens after the lock is released.
+        Parameters:
+            `if_due`: Skip it if, once the lock is held, fewer than `snapshot_every` records are unsnapshotted
+                      (another worker of a shared store may have just taken one)
+        """
+        try:
+            with self.lock:
+                if if_due and self.wal.records_since_snapshot < self.snapshot_every:
+                    return
+                # Index versions, shortlist entry lists and match inboxes are immutable, so capturing them copies references only
+                version = self.indices.current
+                state = {
+                    "properties": [
+                        (p.property_id, p.user_id, p.location, p.price, p.property_type,
+                         getattr(p.status, "value", p.status), p.timestamp, p.description, p.amenities)
+                        for p in self.properties.values()
+                    ],
+                    "user_shortlists": self.user_shortlists.to_state(),
+                    "saved_searches": self.saved_searches.to_state(),
+                    "wal_segment": self.wal.rotate(),
+                }
+                rows = len(self.indices.row_ids)  # Append-only, so the prefix can be copied after the lock is released
+            state["indices"] = {name: getattr(version, name) for name in IndexVersion.__slots__}
+            state["row_ids"] = self.indices.row_ids.property_ids[:rows]
+            write_snapshot(self.data_dir, state)
+            self.wal.discard_before(state["wal_segment"])
+        finally:
+            self._snapshot_running.clear()
 
-            # Add property back to indices if changing to 'Available'
-            if property_obj.status == StatusEnum.SOLD and status == StatusEnum.AVAILABLE:
-                add_to_indices(self.price_index,self.location_index,property_obj)
+    def flush(self):
+        """
+        Force pending write-ahead log records to disk.
+        """
+        if self.wal is not None:
+            self.wal.sync()
+
+    def close(self):
+        """
+        Sync and close the write-ahead log, then release the shared writer lock file. The store stays readable
+        but can no longer be written.
+        """
+        if self.wal is not None:
+            self.wal.close()
+        if self.writer_lock is not None:
+            self.writer_lock.close()
 
-            # Update the status
-            property_obj.status = status
-            return True, ""
+    def get_properties(self, property_ids: List[str]) -> List[Optional[Property]]:
+        """
+        Look up listings by ID, whatever their status, in one dictionary lookup each.
+        Returns:
+            Per ID, in input order, the Property or None if it does not exist
+        """
+        self.refresh()
+        return [self.properties.get(property_id) for property_id in property_ids]
 
-    def get_user_properties(self, user_id: str) -> List[Property]:
+    def get_user_properties(self, user_id: str, page: int = 1, limit: Optional[int] = None) -> List[Property]:
         """
-        Retrieve all available properties for a user:
+        Retrieve available properties for a user, most recent first, from the owner index.
+        Cost depends on the size of the page, not on the size of the catalog.
+        Parameters:
+            `page`: Page number for pagination
+            `limit`: Number of items per page; None returns every listing
         Returns:
             List of Property objects
         """
-        
-        user_properties = []
-        for _, prop in self.properties.items():
-            if prop.user_id == user_id and prop.status == StatusEnum.AVAILABLE :
-                user_properties.append(prop)
+        self.refresh()
+        listings = self.owner_index.get(user_id, [])
+        count = len(listings)
+        if limit is None:
+            selected = listings[::-1]
+        else:
+            # The index is oldest-first, so newest-first page n is a slice counted from the end
+            start = (page - 1) * limit
+            selected = listings[max(count - start - limit, 0):max(count - start, 0)][::-1]
+        return [self.properties[property_id] for _, property_id in selected]
+
+    def save_search(self, user_id: str, criteria: dict) -> SavedSearch:
+        """
+        Save a user's search criteria; listings that later become Available and match them (created, or
+        relisted after being Sold) are appended to the user's match inbox.
+        Parameters:
+            `criteria`: The filters of `CRITERIA` (`location`, `property_type`, `min_price`, `max_price`,
+                        `amenities_all`, `amenities_any`, `q`); at least one must be set
+        Returns:
+            The saved search
+        Raises:
+            ValueError: No criteria, an empty price range, a query without searchable words,
+                        or more than `MAX_SAVED_SEARCHES` searches for the user
+        """
+        criteria = {name: criteria.get(name) for name in CRITERIA}
+        if not any(value not in (None, "", []) for value in criteria.values()):
+            raise ValueError(ERROR_MESSAGES["EMPTY_SAVED_SEARCH"])
+        if criteria["min_price"] is not None and criteria["max_price"] is not None \
+                and criteria["min_price"] > criteria["max_price"]:
+            raise ValueError(ERROR_MESSAGES["INVALID_PRICE_RANGE"])
+        with self.lock:  # Lock the critical section
+            if len(self.saved_searches.by_user.get(user_id, ())) >= MAX_SAVED_SEARCHES:
+                raise ValueError(ERROR_MESSAGES["TOO_MANY_SAVED_SEARCHES"])
+            saved = SavedSearch(self.saved_searches.new_id(), user_id, criteria, datetime.now())
+            if criteria["q"] and not saved.terms:
+                raise ValueError(ERROR_MESSAGES["EMPTY_QUERY"])
+            self.saved_searches.add(saved)
+            self._log({"op": "saved_search_add", "search_id": saved.search_id, "user_id": user_id,
+                       "criteria": saved.criteria, "created_at": saved.created_at})
+        self._maybe_snapshot()
+        return saved
+
+    def delete_saved_search(self, user_id: str, search_id: str) -> Tuple[bool, str]:
+        """
+        Delete one of the user's saved searches; its matches disappear from the inbox.
+        Returns:
+        - True if successful, False otherwise with a message
+        """
+        with self.lock:  # Lock the critical section
+            saved = self.saved_searches.searches.get(search_id)
+            if saved is None or saved.user_id != user_id:
+                return False, ERROR_MESSAGES["SAVED_SEARCH_NOT_EXIST"]
+            self.saved_searches.remove(search_id)
+            self._log({"op": "saved_search_remove", "search_id": search_id, "user_id": user_id})
+        self._maybe_snapshot()
+        return True, ""
 
-        # Sort by timestamp (most recent first)
-        return sorted(user_properties, key=lambda x: x.timestamp, reverse=True)
+    def get_saved_searches(self, user_id: str) -> List[SavedSearch]:
+        """
+        Returns:
+            The user's saved searches, oldest first
+        """
+        self.refresh()
+        return self.saved_searches.user_searches(user_id)
+
+    def get_search_matches(self, user_id: str, after: int = 0, limit: Optional[int] = None) -> List[Tuple[Match, Property]]:
+        """
+        Read the user's match inbox: listings that became Available and matched one of their saved searches,
+        oldest first. Matches of deleted searches and listings sold since are skipped. Cost depends on the
+        number of matches returned, not on the size of the catalog or on the number of saved searches.
+        Parameters:
+            `after`: Sequence number of the last match already seen; 0 reads the inbox from its start
+            `limit`: Maximum number of matches; None returns all of them
+        Returns:
+            List of ((seq, search_id, property_id), Property) pairs
+        """
+        self.refresh()
+        searches = self.saved_searches.searches
+        selected = []
+        for match in self.saved_searches.matches(user_id, after):
+            if limit is not None and len(selected) >= limit:
+                break
+            property_obj = self.properties[match[2]]
+            if match[1] in searches and property_obj.status == StatusEnum.AVAILABLE:
+                selected.append((match, property_obj))
+        return selected
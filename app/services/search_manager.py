@@ -1,144 +1,522 @@
-import bisect
+import heapq
+from itertools import islice
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterator, Callable
 from models.property import Property
 from models.schemas import StatusEnum
 from config.errors import ERROR_MESSAGES
+from utils.columnar import ColumnarStore
+from utils.pagination import decode_cursor
+from utils.cache import GenerationCounters, SearchCache
+from utils.persistence import WriteAheadLog
+from utils.shortlists import ShortlistStore
+from utils.bitmap import Bitmap, EMPTY_BITMAP
+from utils.indices import amenity_keys
+from utils.text_index import BM25, tokenize
+from utils.autocomplete import SuggestionTrie, TOP_K
+from utils.facets import FacetCounter, PRICE_EDGES, facet_result
+from utils.metrics import REGISTRY, Histogram, Stopwatch
+from utils.versioning import VersionedIndices, IndexVersion, PersistentSortedList, EMPTY, HIGHEST
 import threading
 
+LOOKUP_COST = 4  # Cost of scoring one candidate on one term by binary search, in postings walked sequentially
+SEARCH_STAGES = REGISTRY.register(Histogram(
+    "plp_search_stage_seconds",
+    "Time spent per stage of a search: cache, plan, walk, sort, columnar, rank or facets.",
+    ["stage"],
+))
 
 class PropertySearch:
-    def __init__(self, properties: Dict[str, Property], price_index: List[tuple], location_index: Dict[str, List[str]]):
+    def __init__(self, properties: Dict[str, Property], indices: VersionedIndices,
+                 columnar_store: Optional[ColumnarStore] = None, generations: Optional[GenerationCounters] = None,
+                 cache_size: int = 0, cache_ttl: float = 30.0, wal: Optional[WriteAheadLog] = None,
+                 lock: Optional[threading.Lock] = None, refresh: Optional[Callable[[], None]] = None,
+                 location_suggestions: Optional[SuggestionTrie] = None):
         """
         Initialize the search system with:
             `properties`: Central dictionary of all properties
-            `price_index`: Sorted list of (price, property_id) tuples
-            `location_index`: Dictionary of location -> List of property IDs
+            `indices`: Versioned price/timestamp/location/owner indices published by the PropertyManager
+            `columnar_store`: Optional columnar copy of the listings; when given, searches run as vectorized masks
+            `generations`: Write generations of the PropertyManager; required for the result cache
+            `cache_size`, `cache_ttl`: Bounds of the search result cache (0 entries disables it)
+            `wal`: Write-ahead log of the PropertyManager; shortlist changes are appended to it
+            `lock`: Writer lock shared with the PropertyManager, so every write is serialized by one lock
+            `refresh`: Called before every read to apply writes made by other worker processes (`PropertyManager.refresh`)
+            `location_suggestions`: Location typeahead trie maintained by the PropertyManager
+        Reads never lock: each search works on the index version current when it started.
         """
         self.properties = properties
-        self.price_index = price_index
-        self.location_index = location_index
-        self.lock = threading.Lock()  # Lock for concurrent write operations
+        self.indices = indices
+        self.columnar_store = columnar_store
+        self.generations = generations if generations is not None else GenerationCounters()
+        self.cache = SearchCache(self.generations, max_entries=cache_size if generations is not None else 0, ttl=cache_ttl)
+        self.wal = wal
+        self.lock = lock if lock is not None else threading.Lock()  # Lock for concurrent write operations
+        self.refresh = refresh if refresh is not None else (lambda: None)
+        self.location_suggestions = location_suggestions if location_suggestions is not None else SuggestionTrie()
 
     def search_properties(self, criteria: dict) -> List[Property]:
         """
         Search properties based on Price range, Location, Property type
         Parameters:
-            `criteria`: A dictionary with search filters like `min_price`, `max_price`, `location`, `property_type`.
+            `criteria`: A dictionary with search filters like `min_price`, `max_price`, `location`, `property_type`,
+                        `amenities_all` (every amenity required) and `amenities_any` (at least one required).
+                        A full-text query `q` ranks the matches by BM25 relevance of their descriptions instead
+                        of `sort_key`; only listings containing at least one query term are returned.
+                        An opaque `cursor` (see `utils.pagination`) replaces `page` and resumes right after
+                        the last property of the previous page.
         Returns:
             List of filtered Property objects
         """
-        # Initial result: all properties
-        filtered_properties = set(self.properties.keys())
+        self.refresh()  # Before the cache lookup, so writes of other workers invalidate their cached results
+        watch = Stopwatch(SEARCH_STAGES)
+        if self.cache.max_entries <= 0:
+            return self._execute_search(criteria, watch)
 
-        # Apply price range filter
-        min_price = float("-inf") if criteria.get("min_price",None) is None else criteria.get("min_price")
-        max_price = float("inf") if criteria.get("max_price",None) is None else criteria.get("max_price")
-        filtered_properties &= set(self._filter_by_price(min_price, max_price))
+        key = self._cache_key(criteria)
+        location = criteria.get("location")
+        result = self.cache.get(key, location)
+        watch.lap("cache")
+        if result is None:
+            token = self.generations.token(location)  # Taken before computing, so a concurrent write leaves the entry stale
+            result = self._execute_search(criteria, watch)
+            self.cache.put(key, location, token, result)
+        return result
 
-        # Apply location filter
+    def flight_key(self, criteria: dict, facets: bool = False) -> Optional[tuple]:
+        """
+        Key under which identical concurrent searches share one computation (`utils.cache.SingleFlight`).
+        Parameters:
+            `facets`: Whether the facets of the search are computed too (see `search_facets`)
+        Returns:
+            The normalized criteria with the write generation they are read at, so a search that starts after
+            a write to its location never joins one that started before it. None when the page is in the result
+            cache and no facets are wanted: serving it costs less than waiting for identical searches.
+        """
+        self.refresh()
+        key = self._cache_key(criteria)
         location = criteria.get("location")
-        if location:
-            filtered_properties &= set(self.location_index.get(location, []))
+        if not facets and self.cache.max_entries > 0 and self.cache.contains(key, location):
+            return None
+        return key, facets, self.generations.token(location)
 
-        # Apply property type filter
-        property_type = criteria.get("property_type")
-        if property_type:
-            filtered_properties = set(
-                prop_id for prop_id in filtered_properties
-                if self.properties[prop_id].property_type == property_type
-            )
+    @staticmethod
+    def _cache_key(criteria: dict) -> tuple:
+        """
+        Normalizes the search criteria into a hashable cache key.
+        """
+        def number(value):
+            return None if value is None else float(value)
 
-        # Apply status filter
-        status = criteria.get("status", StatusEnum.AVAILABLE)
-        filtered_properties = set(
-            prop_id for prop_id in filtered_properties
-            if self.properties[prop_id].status == status
-        )
+        def plain(value):
+            return getattr(value, "value", value)
 
-        # Convert to list of Property objects
-        result = [self.properties[prop_id] for prop_id in filtered_properties]
+        return (
+            number(criteria.get("min_price")),
+            number(criteria.get("max_price")),
+            criteria.get("location") or None,
+            criteria.get("property_type") or None,
+            plain(criteria.get("status", StatusEnum.AVAILABLE)),
+            plain(criteria.get("sort_key", "price")),
+            bool(criteria.get("descending", False)),
+            criteria.get("page", 1),
+            criteria.get("limit", 10),
+            criteria.get("cursor") or None,
+            tuple(sorted(amenity_keys(criteria.get("amenities_all") or ()))),
+            tuple(sorted(amenity_keys(criteria.get("amenities_any") or ()))),
+            tuple(tokenize(criteria.get("q"))),
+        )
 
-        # Apply sorting
+    def _execute_search(self, criteria: dict, watch: Stopwatch) -> List[Property]:
+        """
+        Runs a search without the result cache (see `search_properties`), timing each stage with `watch`.
+        """
         sort_key = criteria.get("sort_key", "price")  # Default sort by price
         descending = criteria.get("descending", False)
-        result = sorted(result, key=lambda x: getattr(x, sort_key), reverse=descending)
-
-        # Apply pagination
         page = criteria.get("page", 1)
         limit = criteria.get("limit", 10)
-        start = (page - 1) * limit
+
+        if criteria.get("q"):
+            if criteria.get("cursor"):
+                raise ValueError("Cursor pagination is not supported with a text query; use page instead")
+            start = (page - 1) * limit
+            result = self._ranked(criteria, self.indices.current, start + limit)[start:]
+            watch.lap("rank")
+            return result
+
+        after = decode_cursor(criteria["cursor"], sort_key, descending) if criteria.get("cursor") else None
+
+        if self.columnar_store is not None and not self._has_amenity_filter(criteria):
+            result = [self.properties[prop_id] for prop_id in self.columnar_store.search(criteria, after)]
+            watch.lap("columnar")
+            return result
+
+        start = 0 if after is not None else (page - 1) * limit
         end = start + limit
+
+        version = self.indices.current  # Consistent snapshot for the whole search
+        plan = self._plan(criteria, version)
+        watch.lap("plan")
+
+        # Every access path is price-sorted: walk it in order, no sort needed
+        if sort_key == "price":
+            result = self._walk(plan.index, plan.start, plan.end, plan.residual, descending, after, start, limit)
+            watch.lap("walk")
+            return result
+
+        # Timestamp order: walking the timestamp index pays off when matches are dense enough to fill the page quickly
+        if plan.walk_cost(end) < plan.count:
+            result = self._walk(version.timestamp_index, 0, len(version.timestamp_index), plan.full_check,
+                                descending, after, start, limit)
+            watch.lap("walk")
+            return result
+
+        result = [
+            prop for prop in (self.properties[prop_id] for _, prop_id in plan.index.iter_range(plan.start, plan.end))
+            if plan.residual(prop)
+        ]
+        key = lambda x: (getattr(x, sort_key), x.property_id)  # Ties are broken by property_id so cursors see a total order
+        if after is not None:
+            result = [prop for prop in result if (key(prop) < after if descending else key(prop) > after)]
+
+        if end < len(result) // 2:
+            # Shallow page: heap-based top-k selection instead of a full sort
+            select = heapq.nlargest if descending else heapq.nsmallest
+            result = select(end, result, key=key)
+        else:
+            result = sorted(result, key=key, reverse=descending)
+        watch.lap("sort")
+
+        # Apply pagination
         return result[start:end]
 
-    def _filter_by_price(self, min_price: float, max_price: float) -> List[str]:
+    def _plan(self, criteria: dict, version: IndexVersion) -> "_AccessPlan":
         """
-        Filter property IDs by price range using binary search for efficiency.
+        Cost-based choice of access path. Every candidate index holds price-sorted (price, property_id) entries, so the
+        number of entries matching the price range on each one is the exact width of a bisect slice. The narrowest slice
+        wins and only the predicates it does not already cover are post-filtered. With amenity filters, the bitmap
+        result is a candidate too: when it holds fewer rows than the narrowest slice, its matches become the slice.
+        Parameters:
+            `criteria`: Search criteria (see `search_properties`)
+            `version`: Index version the search runs against
         Returns:
-            List of property IDs in the specified price range.
+            The chosen `_AccessPlan`
         """
-        # Define the target ranges for binary search
-        start_index = bisect.bisect_left(self.price_index, (min_price, ""))
-        end_index = bisect.bisect_right(self.price_index, (max_price, ""))
-        # bisect_right stops at the first element greater than or equal to the max price.
-        while end_index < len(self.price_index) and self.price_index[end_index][0] == max_price:
-            end_index += 1
-        # Slice the range and extract property IDs
-        return [property_id for _, property_id in self.price_index[start_index:end_index]]
+        min_price = float("-inf") if criteria.get("min_price") is None else criteria["min_price"]
+        max_price = float("inf") if criteria.get("max_price") is None else criteria["max_price"]
+        location = criteria.get("location")
+        property_type = criteria.get("property_type")
+        status = criteria.get("status", StatusEnum.AVAILABLE)
+        amenity_rows = self._amenity_rows(criteria, version)
+        row_of = self.indices.row_ids.row_of
+
+        candidates = [(version.price_index, False, False)]  # (index, covers location, covers property_type)
+        if location:
+            candidates.append((version.location_index.get(location, EMPTY), True, False))
+            if property_type:
+                candidates.append((version.location_type_index.get((location, property_type), EMPTY), True, True))
+
+        best = None
+        for index, covers_location, covers_type in candidates:
+            lo, hi = self._price_bounds(index, min_price, max_price)
+            if best is None or hi - lo < best[2] - best[1]:
+                best = (index, lo, hi, covers_location, covers_type)
+        index, lo, hi, covers_location, covers_type = best
 
+        def has_amenities(prop: Property) -> bool:
+            if amenity_rows is None:
+                return True
+            row = row_of.get(prop.property_id)
+            return row is not None and row in amenity_rows
+
+        def residual(prop: Property) -> bool:
+            return (
+                (covers_location or not location or prop.location == location)
+                and (covers_type or not property_type or prop.property_type == property_type)
+                and prop.status == status
+                and has_amenities(prop)
+            )
 
-    def get_shortlisted(self, user_id: str, user_shortlists: Dict[str, List[Tuple[datetime,str]]]) -> List[Property]:
+        def full_check(prop: Property) -> bool:
+            return (
+                min_price <= prop.price <= max_price
+                and (not location or prop.location == location)
+                and (not property_type or prop.property_type == property_type)
+                and prop.status == status
+                and has_amenities(prop)
+            )
+
+        if amenity_rows is not None and len(amenity_rows) < hi - lo:
+            # The amenity postings are the narrowest access path: their matches, price-sorted, become the slice
+            property_ids = self.indices.row_ids.property_ids
+            matches = PersistentSortedList(
+                (prop.price, prop.property_id)
+                for prop in (self.properties[property_ids[row]] for row in amenity_rows)
+                if full_check(prop)
+            )
+            return _AccessPlan(matches, 0, len(matches), len(version.timestamp_index), full_check, full_check)
+
+        return _AccessPlan(index, lo, hi, len(version.timestamp_index), residual, full_check)
+
+    def search_facets(self, criteria: dict) -> dict:
         """
-        Get the user's shortlisted properties:
+        Aggregate the listings matching the criteria: count per location, per property type and per price bucket,
+        plus the total number of hits. Without filters the counters kept in the index version are returned as-is;
+        otherwise the candidates are counted in one pass (one `np.bincount` per facet on the columnar store),
+        without collecting or sorting Property objects.
         Parameters:
-            `user_id`: ID of the user
-            `user_shortlists`: Dictionary mapping user IDs to list of (timestamp,property IDs)
+            `criteria`: Search criteria (see `search_properties`); `page`, `limit`, `cursor` and sorting are ignored
         Returns:
-            List of Property objects
+            Dictionary with `total`, `location`, `property_type` and `price_histogram` (see `utils.facets.facet_result`)
         """
-        if user_id not in user_shortlists:
+        self.refresh()
+        watch = Stopwatch(SEARCH_STAGES)
+        result = self._count_facets(criteria)
+        watch.lap("facets")
+        return result
+
+    def _count_facets(self, criteria: dict) -> dict:
+        """
+        Computes the facets of `search_facets`.
+        """
+        version = self.indices.current
+        filtered = (
+            criteria.get("min_price") is not None or criteria.get("max_price") is not None
+            or any(criteria.get(name) for name in ("location", "property_type", "amenities_all", "amenities_any", "q"))
+        )
+        if not filtered and criteria.get("status", StatusEnum.AVAILABLE) == StatusEnum.AVAILABLE:
+            return facet_result(version.location_counts, version.type_counts, version.price_histogram)
+
+        if self.columnar_store is not None and not self._has_amenity_filter(criteria) and not criteria.get("q"):
+            return facet_result(*self.columnar_store.facets(criteria, PRICE_EDGES))
+
+        counter = FacetCounter()
+        plan = self._plan(criteria, version)
+        if criteria.get("q"):
+            # Every listing containing a query term, filtered like a ranked search
+            rows = set()
+            for term in dict.fromkeys(tokenize(criteria["q"])):
+                postings = version.term_index.get(term)
+                if postings is not None:
+                    rows.update(row for row, _, _ in postings.entries)
+            property_ids = self.indices.row_ids.property_ids
+            candidates = (self.properties[property_ids[row]] for row in rows)
+            matches = plan.full_check
+        else:
+            candidates = (self.properties[prop_id] for _, prop_id in plan.index.iter_range(plan.start, plan.end))
+            matches = plan.residual
+        for prop in candidates:
+            if matches(prop):
+                counter.add(prop.location, prop.property_type, prop.price)
+        return counter.result()
+
+    def _ranked(self, criteria: dict, version: IndexVersion, k: Optional[int]) -> List[Property]:
+        """
+        BM25-ranked full-text search combined with the other filters. When scoring the planner's slice one candidate
+        at a time is cheaper than walking the posting lists of the query terms, the slice is scored; otherwise the
+        posting lists are walked with MaxScore top-k and the filters only run on listings that would make the top k.
+        Parameters:
+            `criteria`: Search criteria with a `q` (see `search_properties`)
+            `version`: Index version the search runs against
+            `k`: Number of best results wanted; None ranks every match
+        Returns:
+            Up to `k` Property objects, most relevant first; ties go to the earliest indexed listing
+        """
+        terms = dict.fromkeys(tokenize(criteria["q"]))  # Deduplicated, in query order
+        postings = [version.term_index[term] for term in terms if term in version.term_index]
+        if not postings or k == 0:
             return []
+        doc_count, total_length = version.text_stats
+        scorer = BM25(postings, doc_count, total_length)
+        plan = self._plan(criteria, version)
+        row_ids = self.indices.row_ids
 
-        shortlisted_properties = [
-            self.properties[prop_id]
-            for _, prop_id in reversed(user_shortlists[user_id])
-            if self.properties[prop_id].status == StatusEnum.AVAILABLE
-        ]
+        if plan.count * len(postings) * LOOKUP_COST < sum(len(p) for p in postings):
+            scored = []
+            for _, prop_id in plan.index.iter_range(plan.start, plan.end):
+                row = row_ids.row_of.get(prop_id)
+                if row is not None and plan.residual(self.properties[prop_id]):
+                    score = scorer.score(row)
+                    if score > 0:
+                        scored.append((score, -row))
+            best = heapq.nlargest(k, scored) if k is not None else sorted(scored, reverse=True)
+            ranked = [-negative_row for _, negative_row in best]
+        else:
+            accept = lambda row: plan.full_check(self.properties[row_ids.property_ids[row]])
+            ranked = [row for _, row in scorer.top_k(k, accept)]
+        return [self.properties[row_ids.property_ids[row]] for row in ranked]
 
-        return shortlisted_properties
+    @staticmethod
+    def _has_amenity_filter(criteria: dict) -> bool:
+        return bool(criteria.get("amenities_all") or criteria.get("amenities_any"))
 
+    @staticmethod
+    def _amenity_rows(criteria: dict, version: IndexVersion) -> Optional[Bitmap]:
+        """
+        Evaluates the amenity filters on the bitmap index: AND over `amenities_all` (smallest posting first,
+        stopping as soon as the result is empty), OR over `amenities_any`, then AND of both.
+        Returns:
+            Row ids of the available listings passing the filters, or None when there is no amenity filter
+        """
+        postings = version.amenity_index
+        rows = None
+        required = sorted(amenity_keys(criteria.get("amenities_all") or ()),
+                          key=lambda amenity: len(postings.get(amenity, EMPTY_BITMAP)))
+        for amenity in required:
+            posting = postings.get(amenity, EMPTY_BITMAP)
+            rows = posting if rows is None else rows & posting
+            if not rows:
+                return EMPTY_BITMAP
+
+        if criteria.get("amenities_any"):
+            union = EMPTY_BITMAP
+            for amenity in amenity_keys(criteria["amenities_any"]):
+                union = union | postings.get(amenity, EMPTY_BITMAP)
+            rows = union if rows is None else rows & union
+        return rows
+
+    def iter_properties(self, criteria: dict) -> Iterator[Property]:
+        """
+        Lazily yield every property matching the criteria, in sort order, without pagination.
+        Walks the presorted access path chosen by the planner, so memory stays bounded and the
+        first result is available as soon as it is found.
+        Parameters:
+            `criteria`: Search criteria (see `search_properties`); `page`, `limit` and `cursor` are ignored.
+                        With a text query `q`, every match is ranked before the first one is yielded.
+        Returns:
+            Iterator of Property objects
+        """
+        self.refresh()
+        sort_key = criteria.get("sort_key", "price")
+        descending = criteria.get("descending", False)
+
+        if criteria.get("q"):
+            yield from self._ranked(criteria, self.indices.current, None)
+            return
+
+        if self.columnar_store is not None and not self._has_amenity_filter(criteria):
+            for prop_id in self.columnar_store.iter_ids(criteria):
+                yield self.properties[prop_id]
+            return
+
+        version = self.indices.current  # The whole stream reads one consistent version
+        plan = self._plan(criteria, version)
+        if sort_key == "price":
+            yield from self._iter_walk(plan.index, plan.start, plan.end, plan.residual, descending, None)
+        else:
+            yield from self._iter_walk(version.timestamp_index, 0, len(version.timestamp_index), plan.full_check,
+                                       descending, None)
+
+    def _iter_walk(self, index: PersistentSortedList, lo: int, hi: int, matches, descending: bool,
+                   after: Optional[tuple]) -> Iterator[Property]:
+        """
+        Walk positions [lo, hi) of `index` in sort order from the cursor position (or the start), yielding properties that pass `matches`.
+        Parameters:
+            `index`: Sorted (sort value, property_id) entries
+            `lo`, `hi`: Bounds of the slice to walk
+            `matches`: Predicate applied to every visited property
+            `after`: Decoded cursor, the (sort value, property_id) of the last property already returned
+        Returns:
+            Iterator of Property objects
+        """
+        if after is not None:
+            if descending:
+                hi = min(hi, index.bisect_left(after))
+            else:
+                lo = max(lo, index.bisect_right(after))
+
+        for _, prop_id in index.iter_range(lo, hi, reverse=descending):
+            prop = self.properties[prop_id]
+            if matches(prop):
+                yield prop
+
+    def _walk(self, index: PersistentSortedList, lo: int, hi: int, matches, descending: bool, after: Optional[tuple],
+              skip: int, limit: int) -> List[Property]:
+        """
+        Collect one page from `_iter_walk`. Cost depends on how far the page is from the walk start, not on the slice size.
+        Parameters:
+            `skip`: Number of matching properties to skip before collecting (offset pagination)
+            `limit`: Page size
+        Returns:
+            List of Property objects
+        """
+        return list(islice(self._iter_walk(index, lo, hi, matches, descending, after), skip, skip + limit))
+
+    @staticmethod
+    def _price_bounds(index: PersistentSortedList, min_price: float, max_price: float) -> Tuple[int, int]:
+        """
+        Locate a price range in a price-sorted index using binary search.
+        Returns:
+            (start, end) positions of the entries within the price range
+        """
+        # "" sorts before and HIGHEST after every property_id, so both bounds are inclusive of the prices themselves
+        start_index = index.bisect_left((min_price, ""))
+        end_index = index.bisect_right((max_price, HIGHEST))
+        return start_index, end_index
+
+    def suggest_locations(self, prefix: str, limit: int = 5) -> List[Tuple[str, int]]:
+        """
+        Complete a location prefix, case-insensitive, with the locations holding the most Available listings.
+        Parameters:
+            `prefix`: Beginning of the location name typed so far
+            `limit`: Number of suggestions, at most `utils.autocomplete.TOP_K`
+        Returns:
+            (location, number of Available listings) pairs, most listings first
+        """
+        if not 1 <= limit <= TOP_K:
+            raise ValueError(f"limit must be between 1 and {TOP_K}")
+        self.refresh()
+        return [(location, count) for count, location in self.location_suggestions.complete(prefix, limit)]
 
-    def shortlist_property(self, user_id: str, property_id: str, user_shortlists: Dict[str, List[Tuple[datetime,str]]]) -> Tuple[bool,str]:
+    def get_shortlisted(self, user_id: str, user_shortlists: ShortlistStore, page: int = 1,
+                        limit: Optional[int] = None) -> List[Property]:
+        """
+        Get the user's available shortlisted properties, most recently shortlisted first:
+        Parameters:
+            `user_id`: ID of the user
+            `user_shortlists`: Shortlists of every user (see `utils.shortlists`)
+            `page`: Page number for pagination
+            `limit`: Number of items per page; None returns the whole shortlist
+        Returns:
+            List of Property objects
+        """
+        self.refresh()
+        # Sold listings are already out of the user's available view, so nothing is filtered here
+        return [self.properties[prop_id] for prop_id in user_shortlists.page(user_id, page=page, limit=limit)]
+
+
+    def shortlist_property(self, user_id: str, property_id: str, user_shortlists: ShortlistStore) -> Tuple[bool,str]:
         """
         Add a property to the user's shortlist:
         Parameters:
             `user_id`: ID of the user
             `property_id`: ID of the property to shortlist
-            `user_shortlists`: Dictionary mapping user IDs to list of (timestamp,property IDs)
+            `user_shortlists`: Shortlists of every user (see `utils.shortlists`)
         Returns:
             `True` if successfully shortlisted, `False` otherwise with a message
         """
         with self.lock:  # Lock the critical section
-            if property_id not in self.properties:
+            property_obj = self.properties.get(property_id)
+            if property_obj is None:
                 return False, ERROR_MESSAGES["PROPERTY_NOT_EXIST"] # Property doesn't exist
-    
-            if user_id not in user_shortlists:
-                user_shortlists[user_id] = []
-    
-            if any(prop_id == property_id for _, prop_id in user_shortlists[user_id]):
+
+            if user_shortlists.contains(user_id, property_id):
                 return False, ERROR_MESSAGES["ALREADY_SHORTLISTED"]
 
-            bisect.insort(user_shortlists[user_id], (datetime.now(), property_id))  # keep the shortlist in sorted order of shortlist time 
+            shortlisted_at = datetime.now()
+            user_shortlists.add(user_id, property_id, shortlisted_at, property_obj.status == StatusEnum.AVAILABLE)
+            if self.wal is not None:
+                self.wal.append({"op": "shortlist_add", "user_id": user_id, "property_id": property_id, "timestamp": shortlisted_at})
             return True, ""
 
     
-    def remove_shortlist_property(self, user_id: str, property_id: str, user_shortlists: Dict[str, List[Tuple[datetime,str]]]) -> Tuple[bool,str]:
+    def remove_shortlist_property(self, user_id: str, property_id: str, user_shortlists: ShortlistStore) -> Tuple[bool,str]:
         """
         Remove a property from the user's shortlist:
         Parameters:
             `user_id`: ID of the user
             `property_id`: ID of the property to shortlist
-            `user_shortlists`: Dictionary mapping user IDs to list of (timestamp,property IDs)
+            `user_shortlists`: Shortlists of every user (see `utils.shortlists`)
         Returns:
             `True` if successfully removed, `False` otherwise with a message
         """
@@ -147,13 +525,79 @@ class PropertySearch:
                 return False, ERROR_MESSAGES["EMPTY_SHORTLIST"]
 
             # Check if the property exists in the shortlist
-            user_shortlist = user_shortlists[user_id]
-            if not any(prop_id == property_id for _,prop_id in user_shortlist):
+            if not user_shortlists.remove(user_id, property_id):
                 return False, ERROR_MESSAGES["NOT_IN_SHORTLIST"]
-            
-            # Remove the property from the shortlist
-            user_shortlists[user_id] = [
-                entry for entry in user_shortlist if entry[1] != property_id
-            ]
+
+            if self.wal is not None:
+                self.wal.append({"op": "shortlist_remove", "user_id": user_id, "property_id": property_id})
     
-            return True, ""
\ No newline at end of file
+            return True, ""
+
+    def update_shortlist(self, user_id: str, add: List[str], remove: List[str],
+                         user_shortlists: ShortlistStore) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """
+        Add and remove many properties of the user's shortlist under one lock hold, with the log records
+        appended and synced together. Additions are applied first, then removals, each in input order;
+        added properties share one shortlist time.
+        Parameters:
+            `user_id`: ID of the user
+            `add`: IDs of the properties to shortlist
+            `remove`: IDs of the properties to remove from the shortlist
+            `user_shortlists`: Shortlists of every user (see `utils.shortlists`)
+        Returns:
+            (per added ID, per removed ID): None if applied, else the `ERROR_MESSAGES` code of the reason it was not
+        """
+        added: List[Optional[str]] = []
+        removed: List[Optional[str]] = []
+        records = []
+        with self.lock:
+            shortlisted_at = datetime.now()
+            for property_id in add:
+                property_obj = self.properties.get(property_id)
+                if property_obj is None:
+                    added.append("PROPERTY_NOT_EXIST")
+                elif not user_shortlists.add(user_id, property_id, shortlisted_at,
+                                             property_obj.status == StatusEnum.AVAILABLE):
+                    added.append("ALREADY_SHORTLISTED")
+                else:
+                    added.append(None)
+                    records.append({"op": "shortlist_add", "user_id": user_id, "property_id": property_id,
+                                    "timestamp": shortlisted_at})
+            for property_id in remove:
+                if user_id not in user_shortlists:
+                    removed.append("EMPTY_SHORTLIST")
+                elif not user_shortlists.remove(user_id, property_id):
+                    removed.append("NOT_IN_SHORTLIST")
+                else:
+                    removed.append(None)
+                    records.append({"op": "shortlist_remove", "user_id": user_id, "property_id": property_id})
+            if self.wal is not None and records:
+                self.wal.append_many(records)
+        return added, removed
+
+class _AccessPlan:
+    def __init__(self, index: PersistentSortedList, start: int, end: int, total: int, residual, full_check):
+        """
+        Access path chosen by `PropertySearch._plan`:
+            `index`, `start`, `end`: Price-sorted slice holding every candidate
+            `total`: Number of available listings, used to estimate selectivity
+            `residual`: Predicate for the filters the slice does not cover
+            `full_check`: Predicate for every filter, used when walking another index
+        """
+        self.index = index
+        self.start = start
+        self.end = end
+        self.total = total
+        self.residual = residual
+        self.full_check = full_check
+
+    @property
+    def count(self) -> int:
+        """Number of entries in the chosen slice."""
+        return self.end - self.start
+
+    def walk_cost(self, wanted: int) -> float:
+        """Expected number of entries visited in a full-catalog walk before `wanted` matches are found."""
+        if self.count == 0:
+            return float("inf")
+        return wanted * self.total / self.count
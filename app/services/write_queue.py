@@ -0,0 +1,163 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from services.property_manager import PropertyManager
+from utils.metrics import REGISTRY, Histogram
+
+GROUPED = ("add_property", "update_property_status")  # Operations `PropertyManager.apply_writes` commits as a group
+
+WRITE_GROUP_SIZE = REGISTRY.register(Histogram(
+    "plp_write_group_size",
+    "Writes committed together by the write queue (one lock hold, one index publish, one log sync).",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+))
+
+# (operation, arguments, future of the caller: a concurrent Future, or an asyncio Future of the caller's loop)
+Write = Tuple[str, tuple, Union[Future, asyncio.Future]]
+
+
+class WriteQueue:
+    def __init__(self, manager: PropertyManager, max_batch: int = 64, threaded: bool = True):
+        """
+        Single-writer queue in front of the PropertyManager, so request handlers never block the event loop on
+        the writer lock or on index updates:
+            `manager`: The store the writes apply to
+            `max_batch`: Most writes taken off the queue at once
+            `threaded`: False applies each write right away on the caller's thread, as a group of one; this
+                        saves the hand-off to the writer thread when the loop is never blocked by the lock
+        A dedicated thread drains the queue. Consecutive `add_property` and `update_property_status` calls are
+        applied as one group (`PropertyManager.apply_writes`): one lock hold, one index version published and
+        one log append and sync for the whole group, i.e. a group commit. Other writes (`run`) are applied one
+        at a time, in submission order. Callers await a future that resolves once their write is published,
+        while the event loop keeps serving reads.
+        The results of a drained batch are handed to each event loop in one `call_soon_threadsafe`: waking a
+        busy loop means waiting for the GIL, so doing it once per caller would make every write in the batch
+        wait for every other one.
+        """
+        self.manager = manager
+        self.max_batch = max_batch
+        self.threaded = threaded
+        self._queue: "queue.Queue[Optional[Write]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, operation: str, *args) -> Future:
+        """
+        Queues a write from any thread and returns a future of its result:
+            `operation`: One of `GROUPED` (arguments and result as for the PropertyManager method of that name),
+                         or "call" with a function and its arguments as `args`
+        """
+        future = Future()
+        self._put((operation, args, future))
+        return future
+
+    async def add_property(self, user_id: str, property_details: dict):
+        return await self._submit_async("add_property", user_id, property_details)
+
+    async def update_property_status(self, property_id: str, status: str, user_id: str) -> Tuple[bool, str]:
+        return await self._submit_async("update_property_status", property_id, status, user_id)
+
+    async def run(self, function: Callable, *args):
+        """Applies any other write (bulk ingestion, shortlists, saved searches) on the writer thread."""
+        return await self._submit_async("call", function, *args)
+
+    def close(self):
+        """Applies the writes already queued, then stops the writer thread."""
+        with self._start_lock:
+            if self._thread is None:
+                return
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _submit_async(self, operation: str, *args) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._put((operation, args, future))
+        return future
+
+    def _put(self, write: Write):
+        if not self.threaded:
+            for future, result in self._apply([write]):
+                _set_outcome(future, result)
+            return
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._drain, name="writer", daemon=True)
+                    self._thread.start()
+        self._queue.put(write)
+
+    def _drain(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            self._resolve(self._apply([write for write in batch if write is not None]))
+            if stop:
+                return
+
+    def _apply(self, batch: List[Write]) -> List[Tuple[Union[Future, asyncio.Future], object]]:
+        """
+        Applies drained writes in order, grouping runs of `GROUPED` operations.
+        Returns:
+            (future, result or exception) per write
+        """
+        outcomes, group = [], []
+        for write in batch:
+            if write[0] in GROUPED:
+                group.append(write)
+                continue
+            outcomes.extend(self._commit(group))
+            group = []
+            _, (function, *args), future = write
+            try:
+                outcomes.append((future, function(*args)))
+            except Exception as e:
+                outcomes.append((future, e))
+        outcomes.extend(self._commit(group))
+        return outcomes
+
+    def _commit(self, group: List[Write]) -> List[Tuple[Union[Future, asyncio.Future], object]]:
+        if not group:
+            return []
+        WRITE_GROUP_SIZE.observe(len(group))
+        try:
+            # Inline writes are not synced one by one: like direct calls, they leave it to the log's batched syncs
+            results = self.manager.apply_writes([(operation, args) for operation, args, _ in group], sync=self.threaded)
+        except Exception as e:
+            results = [e] * len(group)
+        return [(future, result) for (_, _, future), result in zip(group, results)]
+
+    @staticmethod
+    def _resolve(outcomes: List[Tuple[Union[Future, asyncio.Future], object]]):
+        by_loop: Dict[asyncio.AbstractEventLoop, list] = {}
+        for future, result in outcomes:
+            if isinstance(future, Future):
+                _set_outcome(future, result)
+            else:
+                by_loop.setdefault(future.get_loop(), []).append((future, result))
+        for loop, loop_outcomes in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_set_outcomes, loop_outcomes)
+            except RuntimeError:
+                pass  # The loop closed; nobody awaits these writes anymore
+
+
+def _set_outcome(future, result):
+    if future.cancelled() or future.done():
+        return  # The caller stopped waiting; the write is applied all the same
+    if isinstance(result, Exception):
+        future.set_exception(result)
+    else:
+        future.set_result(result)
+
+
+def _set_outcomes(outcomes):
+    for future, result in outcomes:
+        _set_outcome(future, result)
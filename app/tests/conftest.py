@@ -1,6 +1,48 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app  
+from services.property_manager import PropertyManager
+from services.search_manager import PropertySearch
+
+LISTINGS = [
+    ("user_1", "New York", 5000, "Apartment"),
+    ("user_1", "New York", 7000, "Villa"),
+    ("user_2", "Boston", 3000, "Apartment"),
+    ("user_2", "New York", 9000, "Apartment"),
+    ("user_3", "Boston", 7500, "Villa"),
+    ("user_3", "New York", 1000, "Apartment"),
+]
+
+
+def _build(columnar=False):
+    """
+    Builds an isolated manager/search pair loaded with `LISTINGS`.
+    """
+    manager = PropertyManager(columnar=columnar)
+    for user_id, location, price, property_type in LISTINGS:
+        manager.add_property(user_id, {
+            "location": location,
+            "price": price,
+            "property_type": property_type,
+            "description": f"{property_type} in {location}",
+            "amenities": ["Pool"],
+        })
+    search = PropertySearch(
+        properties=manager.properties,
+        indices=manager.indices,
+        columnar_store=manager.columnar_store,
+        location_suggestions=manager.location_suggestions,
+    )
+    return manager, search
+
+
+@pytest.fixture
+def build():
+    """
+    Factory for isolated service instances, independent of the shared app state.
+    """
+    return _build
+
 
 @pytest.fixture
 def client():
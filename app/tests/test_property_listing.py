@@ -1,3 +1,4 @@
+import json
 import pytest
 
 @pytest.mark.order(1)
@@ -159,3 +160,226 @@ def test_search_properties(client):
     data = response.json()
     assert isinstance(data, list)
     assert len(data) == 1  # Out of three properties, only one is within the range (9600)
+
+
+@pytest.mark.order(8)
+def test_search_properties_cursor(client):
+    """
+    Test resuming a search from the X-Next-Cursor header.
+    """
+    response = client.get("/api/v1/properties/search", params={"limit": 1})
+    assert response.status_code == 200
+    first = response.json()
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get("/api/v1/properties/search", params={"limit": 1, "cursor": cursor})
+    assert response.status_code == 200
+    second = response.json()
+    assert len(second) == 1
+    assert second[0]["price"] > first[0]["price"]
+
+    # A cursor issued for another sort order is rejected
+    response = client.get("/api/v1/properties/search", params={"limit": 1, "cursor": cursor, "descending": True})
+    assert response.status_code == 400
+
+
+@pytest.mark.order(9)
+def test_search_cache_stats(client):
+    """
+    Test that repeated searches are served from the result cache.
+    """
+    before = client.get("/api/v1/properties/search/cache").json()
+    client.get("/api/v1/properties/search", params={"location": "America"})
+    client.get("/api/v1/properties/search", params={"location": "America"})
+    after = client.get("/api/v1/properties/search/cache").json()
+    assert after["hits"] == before["hits"] + 1
+
+
+@pytest.mark.order(10)
+def test_bulk_create_properties(client):
+    """
+    Test bulk ingestion from a JSON array and from NDJSON, with per-record results.
+    """
+    listing = {"location": "Chicago", "price": 700, "property_type": "Flat", "description": "Loft", "amenities": []}
+    response = client.post(
+        "/api/v1/properties/bulk",
+        json=[listing, {**listing, "price": -1}, {**listing, "price": 800}],
+        params={"user_id": "user_5"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 1)
+    assert data["results"][0]["property_id"] is not None
+    assert data["results"][1]["error"] is not None
+
+    ndjson = "\n".join([json.dumps(listing), "{not json", json.dumps({**listing, "price": 900})]) + "\n"
+    response = client.post(
+        "/api/v1/properties/bulk",
+        content=ndjson,
+        headers={"Content-Type": "application/x-ndjson"},
+        params={"user_id": "user_5"}
+    )
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 1)
+
+    response = client.get("/api/v1/properties/search", params={"location": "Chicago", "limit": 10})
+    assert [p["price"] for p in response.json()] == [700, 700, 800, 900]
+
+
+@pytest.mark.order(11)
+def test_export_properties_ndjson(client):
+    """
+    Test streaming every matching property as NDJSON, from the export endpoint and from search.
+    """
+    response = client.get("/api/v1/properties/export", params={"location": "Chicago"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["price"] for row in rows] == [700, 700, 800, 900]
+
+    response = client.get(
+        "/api/v1/properties/search",
+        params={"location": "Chicago", "stream": True, "descending": True, "limit": 1}
+    )
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["price"] for row in rows] == [900, 800, 700, 700]
+
+
+@pytest.mark.order(12)
+def test_suggest_locations(client):
+    """
+    Test completing a location prefix with its number of available listings.
+    """
+    response = client.get("/api/v1/locations/suggest", params={"prefix": "chi"})
+    assert response.status_code == 200
+    assert response.json() == [{"location": "Chicago", "count": 4}]
+
+    response = client.get("/api/v1/locations/suggest", params={"prefix": "chi", "limit": 11})
+    assert response.status_code == 400
+
+
+@pytest.mark.order(13)
+def test_search_properties_facets(client):
+    """
+    Test that a faceted search wraps the page with the total hit count and the facet counts.
+    """
+    response = client.get("/api/v1/properties/search", params={"location": "Chicago", "limit": 2, "facets": True})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["price"] for item in data["items"]] == [700, 700]
+    assert data["total"] == 4
+    assert data["facets"]["location"] == {"Chicago": 4}
+    assert sum(bucket["count"] for bucket in data["facets"]["price_histogram"]) == 4
+
+
+@pytest.mark.order(14)
+def test_metrics(client):
+    """
+    Test that stage timings, lock and request histograms and index gauges are exposed in Prometheus text format.
+    """
+    client.get("/api/v1/properties/search", params={"location": "Chicago", "descending": True})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = dict(line.rsplit(" ", 1) for line in response.text.splitlines() if not line.startswith("#"))
+    assert float(samples['plp_search_stage_seconds_count{stage="cache"}']) >= 1
+    assert float(samples['plp_write_stage_seconds_count{operation="apply_writes",stage="publish"}']) >= 1
+    assert float(samples['plp_lock_hold_seconds_count{lock="writer"}']) >= 1
+    assert float(samples["plp_search_flights_total"]) >= 1 and "plp_search_coalesced_total" in samples
+    assert 'plp_http_request_duration_seconds_count{method="GET",route="/api/v1/properties/search",status="200"}' in samples
+    available = client.get("/api/v1/properties/search", params={"limit": 1000}).json()
+    assert samples["plp_price_index_entries"] == str(len(available))
+    assert samples["plp_locations"] == str(len({prop["location"] for prop in available}))
+
+
+@pytest.mark.order(15)
+def test_saved_search_matches(client):
+    """
+    Test saving a search, reading the listings that matched it since, and deleting it.
+    """
+    response = client.post("/api/v1/user/saved-searches", params={"user_id": "buyer_1"},
+                           json={"location": "Denver", "max_price": 3000, "amenities_all": ["pool"]})
+    assert response.status_code == 200
+    search_id = response.json()["search_id"]
+    assert response.json()["location"] == "Denver"
+    listing = {"location": "Denver", "price": 2500, "property_type": "Condo", "description": "Condo near the park",
+               "amenities": ["Pool"]}
+    client.post("/api/v1/properties", json=listing, params={"user_id": "user_9"})
+    client.post("/api/v1/properties", json={**listing, "price": 3500}, params={"user_id": "user_9"})
+
+    matches = client.get("/api/v1/user/saved-searches/matches", params={"user_id": "buyer_1"}).json()
+    assert [(match["search_id"], match["property"]["price"]) for match in matches] == [(search_id, 2500)]
+    assert client.get("/api/v1/user/saved-searches/matches",
+                      params={"user_id": "buyer_1", "after": matches[-1]["seq"]}).json() == []
+    assert [saved["search_id"] for saved in
+            client.get("/api/v1/user/saved-searches", params={"user_id": "buyer_1"}).json()] == [search_id]
+
+    assert client.post("/api/v1/user/saved-searches", params={"user_id": "buyer_1"}, json={}).status_code == 400
+    assert client.delete(f"/api/v1/user/saved-searches/{search_id}", params={"user_id": "buyer_2"}).status_code == 400
+    assert client.delete(f"/api/v1/user/saved-searches/{search_id}", params={"user_id": "buyer_1"}).status_code == 200
+    assert client.get("/api/v1/user/saved-searches/matches", params={"user_id": "buyer_1"}).json() == []
+
+
+@pytest.mark.order(16)
+def test_batch_endpoints(client):
+    """
+    Test fetching, updating and shortlisting many properties in one request each.
+    """
+    response = client.get("/api/v1/properties/bulk", params={"property_ids": "property_1,property_404"})
+    assert response.status_code == 200
+    assert [prop["property_id"] for prop in response.json()["items"]] == ["property_1"]
+    assert response.json()["missing"] == ["property_404"]
+    original = response.json()["items"][0]["status"]
+    flipped = "Available" if original == "Sold" else "Sold"
+
+    response = client.patch("/api/v1/properties/bulk", params={"user_id": "user_1"},
+                            json=[{"property_id": "property_1", "status": flipped},
+                                  {"property_id": "property_1", "status": flipped},
+                                  {"property_id": "property_404", "status": "Sold"}])
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (1, 2)
+    assert [item["code"] for item in result["results"]] == [None, "STATUS_UNCHANGED", "PROPERTY_NOT_EXIST"]
+    assert result["results"][2]["error"] == "Property does not exist."
+    assert client.get("/api/v1/properties/bulk", params={"property_ids": "property_1"}).json()["items"][0]["status"] == flipped
+    client.patch("/api/v1/properties/bulk", params={"user_id": "user_1"},
+                 json=[{"property_id": "property_1", "status": original}])
+
+    response = client.post("/api/v1/user/shortlist/bulk", params={"user_id": "batch_user"},
+                           json={"add": ["property_1", "property_404"], "remove": ["property_2"]})
+    assert response.status_code == 200
+    result = response.json()
+    assert [item["code"] for item in result["add"]["results"]] == [None, "PROPERTY_NOT_EXIST"]
+    assert result["remove"]["results"][0]["code"] == "NOT_IN_SHORTLIST"
+    shortlisted = client.get("/api/v1/user/shortlist", params={"user_id": "batch_user"}).json()
+    assert [prop["property_id"] for prop in shortlisted] == (["property_1"] if original == "Available" else [])
+    assert client.patch("/api/v1/properties/bulk", params={"user_id": "user_1"},
+                        json=[{"property_id": "property_1", "status": "Sold"}] * 1001).status_code == 400
+
+
+def test_user_properties_pages_by_default(client):
+    """
+    Test that owner listings are paged 50 at a time when no limit is given, and that the limit is capped.
+    """
+    listing = {"location": "Pagetown", "price": 10 ** 9, "property_type": "Flat", "description": "Flat", "amenities": []}
+    client.post("/api/v1/properties/bulk", json=[listing] * 51, params={"user_id": "paged_owner"})
+    response = client.get("/api/v1/user/properties", params={"user_id": "paged_owner"})
+    assert response.status_code == 200 and len(response.json()) == 50
+    assert len(client.get("/api/v1/user/properties", params={"user_id": "paged_owner", "page": 2}).json()) == 1
+    response = client.get("/api/v1/user/properties", params={"user_id": "paged_owner", "limit": 1001})
+    assert response.status_code == 422
+
+
+def test_shortlist_pages_by_default(client):
+    """
+    Test that a shortlist is paged 50 at a time when no limit is given, and that the limit is capped.
+    """
+    listing = {"location": "Pagetown", "price": 10 ** 9, "property_type": "Flat", "description": "Flat", "amenities": []}
+    created = client.post("/api/v1/properties/bulk", json=[listing] * 51, params={"user_id": "paged_owner_2"}).json()
+    property_ids = [result["property_id"] for result in created["results"]]
+    client.post("/api/v1/user/shortlist/bulk", params={"user_id": "paged_shopper"}, json={"add": property_ids})
+    response = client.get("/api/v1/user/shortlist", params={"user_id": "paged_shopper"})
+    assert response.status_code == 200 and len(response.json()) == 50
+    assert len(client.get("/api/v1/user/shortlist", params={"user_id": "paged_shopper", "page": 2}).json()) == 1
+    response = client.get("/api/v1/user/shortlist", params={"user_id": "paged_shopper", "limit": 0})
+    assert response.status_code == 422
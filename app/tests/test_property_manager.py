@@ -0,0 +1,264 @@
+import asyncio
+import threading
+from services.property_manager import PropertyManager
+from services.search_manager import PropertySearch
+from services.write_queue import WriteQueue
+from models.schemas import StatusEnum, PropertyDetail
+from config.errors import ERROR_MESSAGES
+
+
+def test_get_user_properties_uses_owner_index(build):
+    """
+    Test that owner listings come back newest-first, paginated, and without sold listings.
+    """
+    manager, _ = build()
+    manager.add_property("user_1", {
+        "location": "Boston",
+        "price": 2500,
+        "property_type": "Flat",
+        "description": "Studio flat",
+        "amenities": [],
+    })
+    newest_first = ["property_7", "property_2", "property_1"]
+    assert [p.property_id for p in manager.get_user_properties("user_1")] == newest_first
+    assert [p.property_id for p in manager.get_user_properties("user_1", page=1, limit=2)] == newest_first[:2]
+    assert [p.property_id for p in manager.get_user_properties("user_1", page=2, limit=2)] == newest_first[2:]
+    assert manager.get_user_properties("user_1", page=3, limit=2) == []
+
+    manager.update_property_status("property_2", StatusEnum.SOLD, "user_1")
+    assert [p.property_id for p in manager.get_user_properties("user_1")] == ["property_7", "property_1"]
+
+    manager.update_property_status("property_2", StatusEnum.AVAILABLE, "user_1")
+    assert [p.property_id for p in manager.get_user_properties("user_1")] == newest_first
+    assert manager.get_user_properties("user_9") == []
+
+
+def test_restart_restores_state_from_snapshot_and_log(tmp_path):
+    """
+    Test that a new manager on the same data directory sees every write made before the restart.
+    """
+    listing = {"location": "Boston", "price": 100, "property_type": "Flat", "description": "Flat", "amenities": ["AC"]}
+    manager = PropertyManager(data_dir=str(tmp_path))
+    search = PropertySearch(
+        properties=manager.properties,
+        indices=manager.indices,
+        wal=manager.wal,
+    )
+    manager.add_property("user_1", listing)
+    manager.add_property("user_1", {**listing, "price": 50})
+    search.shortlist_property("user_2", "property_1", manager.user_shortlists)
+    manager.save_search("user_4", {"location": "Austin"})
+    manager.take_snapshot()
+
+    # Writes after the snapshot only live in the log
+    manager.add_property("user_3", {**listing, "location": "Austin"})
+    manager.update_property_status("property_2", StatusEnum.SOLD, "user_1")
+    search.shortlist_property("user_2", "property_3", manager.user_shortlists)
+    search.remove_shortlist_property("user_2", "property_1", manager.user_shortlists)
+    manager.save_search("user_4", {"max_price": 60})
+    manager.add_property("user_3", {**listing, "location": "Austin", "price": 60})
+    manager.delete_saved_search("user_4", "search_1")
+    manager.save_search("user_4", {"q": "flat"})
+    manager.wal.close()
+
+    restored = PropertyManager(data_dir=str(tmp_path))
+    assert list(restored.properties) == ["property_1", "property_2", "property_3", "property_4"]
+    assert restored.properties["property_2"].status == StatusEnum.SOLD
+    assert restored.price_index == manager.price_index
+    assert restored.location_index == manager.location_index
+    assert restored.location_type_index == manager.location_type_index
+    assert restored.owner_index == manager.owner_index
+    assert restored.indices.current.amenity_index == manager.indices.current.amenity_index
+    assert restored.indices.current.term_index == manager.indices.current.term_index
+    assert restored.indices.current.text_stats == manager.indices.current.text_stats
+    assert restored.location_suggestions.complete("") == manager.location_suggestions.complete("")
+    assert restored.indices.current.type_counts == manager.indices.current.type_counts
+    assert restored.indices.current.price_histogram == manager.indices.current.price_histogram
+    assert restored.user_shortlists == manager.user_shortlists
+    assert [saved.search_id for saved in restored.get_saved_searches("user_4")] == ["search_2", "search_3"]
+    assert restored.saved_searches.inboxes == manager.saved_searches.inboxes
+    assert [match for match, _ in restored.get_search_matches("user_4")] == [(3, "search_2", "property_4")]
+    assert restored.save_search("user_4", {"location": "Boston"}).search_id == "search_4"
+    restored.wal.close()
+
+
+def test_add_properties_merges_like_sequential_adds(build):
+    """
+    Test that a bulk insert leaves every index in the same state as one-by-one inserts.
+    """
+    bulk, _ = build()
+    sequential, _ = build()
+    batch = [
+        {"location": location, "price": price, "property_type": "Flat", "description": "Flat", "amenities": []}
+        for location, price in (("Boston", 4000), ("Austin", 5000), ("Boston", 1000), ("New York", 5000))
+    ]
+    created = bulk.add_properties("user_4", batch)
+    for details in batch:
+        sequential.add_property("user_4", details)
+
+    assert [p.property_id for p in created] == ["property_7", "property_8", "property_9", "property_10"]
+    assert bulk.price_index == sequential.price_index
+    assert bulk.location_index == sequential.location_index
+    assert bulk.location_type_index == sequential.location_type_index
+    # A batch shares one creation timestamp, so only membership is compared for the owner index
+    assert {pid for _, pid in bulk.owner_index["user_4"]} == {pid for _, pid in sequential.owner_index["user_4"]}
+    assert bulk.owner_index["user_4"] == sorted(bulk.owner_index["user_4"])
+
+
+def test_add_listings_takes_several_owners(build):
+    """
+    Test that a bulk insert across owners assigns IDs in input order and files each listing under its owner.
+    """
+    bulk, _ = build()
+    sequential, _ = build()
+    listings = [
+        (user_id, {"location": location, "price": price, "property_type": "Flat", "description": "Flat",
+                   "amenities": []})
+        for user_id, location, price in (("user_4", "Boston", 4000), ("user_5", "Austin", 5000),
+                                         ("user_4", "Boston", 1000), ("user_1", "New York", 5000))
+    ]
+    created = bulk.add_listings(listings)
+    for user_id, details in listings:
+        sequential.add_property(user_id, details)
+
+    assert [(p.property_id, p.user_id) for p in created] == \
+        [("property_7", "user_4"), ("property_8", "user_5"), ("property_9", "user_4"), ("property_10", "user_1")]
+    assert bulk.price_index == sequential.price_index
+    assert bulk.location_type_index == sequential.location_type_index
+    assert {user: {pid for _, pid in entries} for user, entries in bulk.owner_index.items()} == \
+        {user: {pid for _, pid in entries} for user, entries in sequential.owner_index.items()}
+    assert [p.property_id for p in bulk.get_user_properties("user_1")][0] == "property_10"
+
+
+def test_batch_status_update_matches_sequential_updates(build):
+    """
+    Test that a batch status update publishes the same indices as one-by-one updates and reports per-item errors.
+    """
+    batch, _ = build()
+    sequential, _ = build()
+    updates = [("property_1", StatusEnum.SOLD), ("property_3", StatusEnum.SOLD), ("property_2", StatusEnum.SOLD),
+               ("property_9", StatusEnum.SOLD), ("property_2", StatusEnum.SOLD), ("property_1", StatusEnum.AVAILABLE)]
+    version = batch.indices.current
+    errors = batch.update_properties_status(updates, "user_1")
+    assert errors == [None, "UNAUTHORIZED", None, "PROPERTY_NOT_EXIST", "STATUS_UNCHANGED", None]
+    for property_id, status in updates:
+        sequential.update_property_status(property_id, status, "user_1")
+
+    assert batch.indices.current is not version
+    assert batch.price_index == sequential.price_index
+    assert batch.location_type_index == sequential.location_type_index
+    assert {user: [pid for _, pid in listings] for user, listings in batch.owner_index.items()} == \
+        {user: [pid for _, pid in listings] for user, listings in sequential.owner_index.items()}
+    assert [p.status for p in batch.get_properties(["property_1", "property_2"])] == [StatusEnum.AVAILABLE, StatusEnum.SOLD]
+    assert batch.get_properties(["property_9"]) == [None]
+
+    version = batch.indices.current
+    assert batch.update_properties_status([("property_2", StatusEnum.SOLD)], "user_1") == ["STATUS_UNCHANGED"]
+    assert batch.indices.current is version  # Nothing applied, nothing published
+
+
+def test_write_queue_commits_groups_in_order(tmp_path):
+    """
+    Test that queued writes are applied in submission order, grouped into single commits, with each caller
+    receiving its own result or error, and that the log replays to the same store.
+    """
+    listing = {"location": "Boston", "price": 100, "property_type": "Flat", "description": "Flat", "amenities": []}
+    manager = PropertyManager(data_dir=str(tmp_path))
+    writes = WriteQueue(manager, max_batch=8)
+    commits = []
+    apply_writes = manager.apply_writes
+    manager.apply_writes = lambda group, sync: commits.append(len(group)) or apply_writes(group, sync)
+
+    release = threading.Event()
+    writes.submit("call", release.wait)  # Holds the writer until every write below is queued
+    futures = [writes.submit("add_property", "user_1", {**listing, "price": price}) for price in (300, 100, 200)]
+    futures.append(writes.submit("update_property_status", "property_2", StatusEnum.SOLD, "user_1"))
+    futures.append(writes.submit("update_property_status", "property_2", StatusEnum.SOLD, "user_1"))
+    futures.append(writes.submit("add_property", "user_1", {"location": "Boston"}))  # Missing fields
+    futures.append(writes.submit("call", manager.save_search, "user_2", {"location": "Austin"}))
+    futures.append(writes.submit("add_property", "user_1", {**listing, "location": "Austin"}))
+    release.set()
+
+    async def await_writes():
+        return await writes.update_property_status("property_1", StatusEnum.SOLD, "user_2")
+    assert asyncio.run(await_writes()) == (False, ERROR_MESSAGES["UNAUTHORIZED"])
+    writes.close()
+
+    assert [future.result().property_id for future in futures[:3]] == ["property_1", "property_2", "property_3"]
+    assert futures[3].result() == (True, "")
+    assert futures[4].result() == (False, ERROR_MESSAGES["STATUS_UNCHANGED"])
+    assert isinstance(futures[5].exception(), KeyError)
+    assert futures[7].result().property_id == "property_4"
+    assert [match for match, _ in manager.get_search_matches("user_2")] == [(1, "search_1", "property_4")]
+    assert commits[0] == 6 and sum(commits) == 8  # The first group ends at the call
+    assert [p.property_id for p in manager.get_user_properties("user_1")] == ["property_4", "property_3", "property_1"]
+    manager.wal.close()
+
+    restored = PropertyManager(data_dir=str(tmp_path))
+    assert restored.price_index == manager.price_index
+    assert restored.saved_searches.inboxes == manager.saved_searches.inboxes
+    restored.wal.close()
+
+
+def test_shared_workers_serve_the_same_data(tmp_path):
+    """
+    Test that two workers on one shared data directory see each other's writes, including after a snapshot
+    discarded log segments one of them had not read yet.
+    """
+    listing = {"location": "Boston", "price": 100, "property_type": "Flat", "description": "Flat", "amenities": []}
+    workers = []
+    for _ in range(2):
+        manager = PropertyManager(data_dir=str(tmp_path), shared=True)
+        search = PropertySearch(
+            properties=manager.properties,
+            indices=manager.indices,
+            generations=manager.generations,
+            cache_size=16,
+            wal=manager.wal,
+            lock=manager.lock,
+            refresh=manager.refresh,
+        )
+        workers.append((manager, search))
+    (first, first_search), (second, second_search) = workers
+
+    first.add_property("user_1", listing)
+    assert [p.property_id for p in second_search.search_properties({"location": "Boston"})] == ["property_1"]
+
+    # IDs stay unique: the second writer applies the first one's records before assigning its own
+    second.add_property("user_2", {**listing, "price": 50})
+    second_search.shortlist_property("user_3", "property_1", second.user_shortlists)
+    first.update_property_status("property_2", StatusEnum.SOLD, "user_2")
+    for manager, search in workers:
+        assert [p.property_id for p in search.search_properties({"location": "Boston"})] == ["property_1"]
+        assert [p.property_id for p in search.get_shortlisted("user_3", manager.user_shortlists)] == ["property_1"]
+
+    # The second worker lags behind a snapshot that deletes the segment it was reading
+    first.add_property("user_1", {**listing, "location": "Austin"})
+    first.take_snapshot()
+    first.add_property("user_1", {**listing, "location": "Austin", "price": 10})
+    assert [p.property_id for p in second_search.search_properties({"location": "Austin"})] == ["property_4", "property_3"]
+    assert second.price_index == first.price_index
+    assert second.owner_index == first.owner_index
+    for manager, _ in workers:
+        manager.close()
+
+
+def test_listings_share_categorical_strings(build):
+    """
+    Test that listings are slotted records sharing one copy of each categorical string, and serialize as before.
+    """
+    manager, _ = build()
+    first, second = manager.properties["property_1"], manager.properties["property_2"]
+    assert not hasattr(first, "__dict__")
+    assert first.location is second.location and first.amenities[0] is second.amenities[0]
+
+    manager.update_property_status("property_1", StatusEnum.SOLD, "user_1")
+    assert first.status == StatusEnum.SOLD and type(first.status) is str
+    detail = PropertyDetail.model_validate(first)
+    assert detail.status == StatusEnum.SOLD and detail.amenities == ["Pool"]
+
+    # Bulk ingestion builds its listings the same way
+    [bulk] = manager.add_properties("user_1", [{"location": "New York", "price": 10, "property_type": "Flat",
+                                                "description": "Flat", "amenities": ["Pool"]}])
+    assert bulk.property_id == f"property_{len(manager.properties)}"
+    assert bulk.location is second.location and bulk.amenities[0] is second.amenities[0]
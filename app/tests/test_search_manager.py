@@ -0,0 +1,582 @@
+import asyncio
+import json
+import math
+import random
+import threading
+import numpy as np
+from collections import Counter, deque
+from services.property_manager import PropertyManager
+from services.search_manager import PropertySearch
+from models.schemas import StatusEnum, PropertyDetail, FacetedSearchResult
+from utils.pagination import encode_cursor
+from utils.facets import PRICE_EDGES
+from utils.text_index import tokenize
+from utils.streaming import json_array, faceted_json, matches_json
+from utils.events import EventHub
+from utils.cache import SingleFlight
+
+
+def ids(properties):
+    return [prop.property_id for prop in properties]
+
+
+def test_columnar_search_matches_index_search(build):
+    """
+    Test that the columnar backend returns the same pages as the index-based search.
+    """
+    manager, search = build()
+    columnar_manager, columnar_search = build(columnar=True)
+    for m in (manager, columnar_manager):
+        m.update_property_status("property_4", StatusEnum.SOLD, "user_2")
+
+    for criteria in (
+        {},
+        {"min_price": 3000, "max_price": 7000},
+        {"location": "New York", "property_type": "Apartment"},
+        {"location": "Nowhere"},
+        {"sort_key": "timestamp", "descending": True, "limit": 2, "page": 2},
+    ):
+        assert ids(columnar_search.search_properties(criteria)) == ids(search.search_properties(criteria))
+
+
+def test_columnar_search_breaks_ties_like_index_search(monkeypatch):
+    """
+    Test that listings with equal sort keys come in property_id string order (property_11 before property_3)
+    on both backends, across pages, cursors and exports.
+    """
+    import utils.columnar
+    monkeypatch.setattr(utils.columnar, "ITER_CHUNK", 3)  # Chunk edges fall inside runs of equal prices
+    searches = []
+    for columnar in (False, True):
+        manager = PropertyManager(columnar=columnar)
+        manager.add_properties("user_1", [
+            {"location": "Austin", "price": 100 * (number % 2 + 1), "property_type": "Flat"} for number in range(12)
+        ])
+        searches.append(PropertySearch(properties=manager.properties, indices=manager.indices,
+                                       columnar_store=manager.columnar_store))
+    index_search, columnar_search = searches
+
+    for descending in (False, True):
+        criteria = {"sort_key": "price", "descending": descending, "limit": 5}
+        expected = ids(index_search.search_properties({**criteria, "limit": 12}))
+        assert expected[:2] == (["property_8", "property_6"] if descending else ["property_1", "property_11"])
+        assert ids(columnar_search.iter_properties(criteria)) == expected
+        for page in (1, 2, 3):
+            assert ids(columnar_search.search_properties({**criteria, "page": page})) == expected[5 * (page - 1):5 * page]
+        for cursor_at in range(11):
+            cursor = encode_cursor("price", descending, index_search.properties[expected[cursor_at]])
+            page = ids(columnar_search.search_properties({**criteria, "cursor": cursor}))
+            assert page == ids(index_search.search_properties({**criteria, "cursor": cursor})) == \
+                expected[cursor_at + 1:cursor_at + 6]
+
+
+def test_columnar_status_batch_copies_the_column_once(build):
+    """
+    Test that a batch of status updates writes into a single copy of the columnar status column, swapped in on
+    publish, while a search holding the previous column keeps seeing the previous statuses.
+    """
+    class CountingColumn(np.ndarray):
+        copies = 0
+
+        def copy(self, *args, **kwargs):
+            CountingColumn.copies += 1
+            return super().copy(*args, **kwargs)
+
+    manager, search = build(columnar=True)
+    store = manager.columnar_store
+    store.status = previous = store.status.view(CountingColumn)
+    errors = manager.update_properties_status([("property_1", StatusEnum.SOLD), ("property_2", StatusEnum.SOLD),
+                                               ("property_1", StatusEnum.AVAILABLE)], "user_1")
+    assert errors == [None, None, None]
+    assert CountingColumn.copies == 1
+    assert store.pending_status is None and store.status is not previous
+    assert previous[:store.size].tolist() == [0] * 6
+    assert store.status[:store.size].tolist() == [0, 1, 0, 0, 0, 0]
+    assert "property_2" not in ids(search.search_properties({"limit": 10}))
+
+
+def test_cursor_pagination_walks_every_listing_once(build):
+    """
+    Test that following cursors returns the same sequence as one large page, for both backends.
+    """
+    for columnar in (False, True):
+        _, search = build(columnar=columnar)
+        for sort_key, descending in (("price", False), ("price", True), ("timestamp", True)):
+            criteria = {"sort_key": sort_key, "descending": descending, "limit": 2}
+            expected = ids(search.search_properties({**criteria, "limit": 100}))
+
+            seen, cursor = [], None
+            while True:
+                page = search.search_properties({**criteria, "cursor": cursor})
+                seen += ids(page)
+                if len(page) < 2:
+                    break
+                cursor = encode_cursor(sort_key, descending, page[-1])
+            assert seen == expected
+
+
+def test_planner_matches_brute_force():
+    """
+    Test that every access path the planner can pick returns the same page as a brute-force filter and sort.
+    """
+    rng = random.Random(7)
+    manager = PropertyManager()
+    for n in range(300):
+        manager.add_property(f"user_{n % 5}", {
+            "location": rng.choice(["New York", "Boston", "Austin"]),
+            "price": round(rng.uniform(1000, 10000), 2),
+            "property_type": rng.choice(["Apartment", "Villa", "Flat"]),
+            "description": "Listing",
+            "amenities": rng.sample(["Pool", "Gym", "Parking", "Garden"], rng.randint(0, 3)),
+        })
+    for n in range(1, 300, 4):
+        manager.update_property_status(f"property_{n}", StatusEnum.SOLD, f"user_{(n - 1) % 5}")
+    search = PropertySearch(
+        properties=manager.properties,
+        indices=manager.indices,
+    )
+
+    for _ in range(200):
+        criteria = {
+            "min_price": rng.choice([None, 2000, 4000]),
+            "max_price": rng.choice([None, 6000, 9000]),
+            "location": rng.choice([None, "New York", "Austin"]),
+            "property_type": rng.choice([None, "Villa", "Flat"]),
+            # Case-insensitive; the three-amenity filter is narrow enough for the planner to start from the bitmaps
+            "amenities_all": rng.choice([None, ["pool"], ["Pool", "Gym", "Garden"], ["Sauna"]]),
+            "amenities_any": rng.choice([None, ["Garden", "Parking"]]),
+            "sort_key": rng.choice(["price", "timestamp"]),
+            "descending": rng.choice([False, True]),
+            "page": rng.choice([1, 2, 5]),
+            "limit": rng.choice([3, 10]),
+        }
+        expected = sorted(
+            (
+                prop for prop in manager.properties.values()
+                if prop.status == StatusEnum.AVAILABLE
+                and (criteria["min_price"] is None or prop.price >= criteria["min_price"])
+                and (criteria["max_price"] is None or prop.price <= criteria["max_price"])
+                and (criteria["location"] is None or prop.location == criteria["location"])
+                and (criteria["property_type"] is None or prop.property_type == criteria["property_type"])
+                and all(amenity.title() in prop.amenities for amenity in criteria["amenities_all"] or [])
+                and (not criteria["amenities_any"] or any(a in prop.amenities for a in criteria["amenities_any"]))
+            ),
+            key=lambda x: (getattr(x, criteria["sort_key"]), x.property_id),
+            reverse=criteria["descending"],
+        )
+        start = (criteria["page"] - 1) * criteria["limit"]
+        assert ids(search.search_properties(criteria)) == ids(expected[start:start + criteria["limit"]])
+
+
+def test_search_cache_invalidated_per_location():
+    """
+    Test that a write invalidates cached searches for its own location and location-less searches only.
+    """
+    manager = PropertyManager()
+    search = PropertySearch(
+        properties=manager.properties,
+        indices=manager.indices,
+        generations=manager.generations,
+        cache_size=2,
+    )
+    listing = {"price": 100, "property_type": "Flat", "description": "Flat", "amenities": []}
+    manager.add_property("user_1", {**listing, "location": "Boston"})
+    manager.add_property("user_1", {**listing, "location": "Austin"})
+
+    boston, austin, everywhere = {"location": "Boston"}, {"location": "Austin"}, {}
+    assert ids(search.search_properties(boston)) == ["property_1"]
+    assert ids(search.search_properties(austin)) == ["property_2"]
+    assert ids(search.search_properties(boston)) == ["property_1"]
+    assert search.cache.stats()["hits"] == 1
+
+    manager.add_property("user_1", {**listing, "location": "Boston"})
+    assert ids(search.search_properties(austin)) == ["property_2"]  # Still cached
+    assert ids(search.search_properties(boston)) == ["property_1", "property_3"]  # Recomputed
+    stats = search.cache.stats()
+    assert (stats["hits"], stats["invalidations"]) == (2, 1)
+
+    search.search_properties(everywhere)  # Third key evicts the least recently used one
+    assert search.cache.stats()["evictions"] == 1
+
+
+def test_identical_concurrent_searches_share_one_computation():
+    """
+    Test that identical searches arriving while one computes share its computation, that a cached page or a write
+    to the location starts a new one, and that a failed computation fails every search that shared it.
+    """
+    manager = PropertyManager()
+    search = PropertySearch(
+        properties=manager.properties,
+        indices=manager.indices,
+        generations=manager.generations,
+        cache_size=8,
+    )
+    listing = {"price": 100, "property_type": "Flat", "description": "Flat", "amenities": ["Pool", "Gym"]}
+    manager.add_property("user_1", {**listing, "location": "Boston"})
+    manager.add_property("user_1", {**listing, "location": "Austin"})
+    flights = SingleFlight()
+    computed = Counter()
+    landing = threading.Event()
+
+    def page(criteria):
+        computed[criteria["location"]] += 1
+        landing.wait(5)  # Keeps the flight in the air until the identical requests arrived
+        return ids(search.search_properties(criteria))
+
+    async def request(criteria, facets=False):
+        key = search.flight_key(criteria, facets)
+        return page(criteria) if key is None else await flights.run(key, page, criteria)
+
+    def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        boston = {"location": "Boston", "amenities_all": ["Pool", "Gym"]}
+        same = {"location": "Boston", "amenities_all": ["gym", "pool"]}
+        leader = asyncio.ensure_future(request(boston))
+        await asyncio.sleep(0.05)  # Its search is now running off the loop; the later requests still join it
+        followers = asyncio.gather(*(request(boston) for _ in range(3)), request(same), request({"location": "Austin"}))
+        await asyncio.sleep(0.05)
+        landing.set()
+        results = [await leader] + await followers
+        assert results == [["property_1"]] * 5 + [["property_2"]]
+        assert computed == {"Boston": 1, "Austin": 1}
+        assert (flights.leaders, flights.shared) == (2, 4) and not flights.flights
+
+        assert await request(boston) == ["property_1"]  # Cached page: no flight
+        assert flights.leaders == 2
+        key = search.flight_key(boston, facets=True)
+        assert key is not None and search.flight_key(boston, facets=True) == key
+        manager.add_property("user_1", {**listing, "location": "Boston"})
+        assert search.flight_key(boston, facets=True) != key
+
+        failures = await asyncio.gather(flights.run("key", fail), flights.run("key", fail), return_exceptions=True)
+        assert [str(error) for error in failures] == ["boom", "boom"] and flights.shared == 5
+
+    asyncio.run(scenario())
+
+
+def test_shortlist_views_follow_status_changes(build):
+    """
+    Test that shortlists page newest-first and that status changes update every shortlisting user's view.
+    """
+    manager, search = build()
+    shortlists = manager.user_shortlists
+    for property_id in ("property_1", "property_2", "property_3"):
+        assert search.shortlist_property("user_9", property_id, shortlists) == (True, "")
+    search.shortlist_property("user_8", "property_2", shortlists)
+    assert search.shortlist_property("user_9", "property_2", shortlists)[0] is False
+    assert shortlists.shortlisted_by["property_2"] == {"user_8", "user_9"}
+
+    def shortlisted(user_id, **page):
+        return ids(search.get_shortlisted(user_id, shortlists, **page))
+
+    assert shortlisted("user_9") == ["property_3", "property_2", "property_1"]
+    assert shortlisted("user_9", page=2, limit=2) == ["property_1"]
+
+    manager.update_property_status("property_2", StatusEnum.SOLD, "user_1")
+    assert shortlisted("user_9") == ["property_3", "property_1"]
+    assert shortlisted("user_8") == []
+    manager.update_property_status("property_2", StatusEnum.AVAILABLE, "user_1")
+    assert shortlisted("user_8") == ["property_2"]
+
+    assert search.remove_shortlist_property("user_9", "property_2", shortlists) == (True, "")
+    assert shortlists.shortlisted_by["property_2"] == {"user_8"}
+    assert shortlisted("user_9") == ["property_3", "property_1"]
+
+
+def test_batch_shortlist_update(build):
+    """
+    Test that a batch shortlist update applies additions, then removals, and reports per-item error codes.
+    """
+    manager, search = build()
+    shortlists = manager.user_shortlists
+    assert search.update_shortlist("user_9", [], ["property_1"], shortlists) == ([], ["EMPTY_SHORTLIST"])
+    added, removed = search.update_shortlist(
+        "user_9", ["property_1", "property_2", "property_1", "property_99"], ["property_2", "property_3"], shortlists)
+    assert added == [None, None, "ALREADY_SHORTLISTED", "PROPERTY_NOT_EXIST"]
+    assert removed == [None, "NOT_IN_SHORTLIST"]
+    assert ids(search.get_shortlisted("user_9", shortlists)) == ["property_1"]
+    assert shortlists.entry_count == 1
+
+
+def test_events_reach_subscribers(build):
+    """
+    Test that status changes of shortlisted listings and saved search matches are pushed to the subscribed
+    users only, from the event loop and from other threads, and that a full queue drops its oldest events.
+    """
+    manager, search = build()
+    search.shortlist_property("user_8", "property_2", manager.user_shortlists)
+    manager.save_search("user_8", {"location": "Austin"})
+    sold = {"event": "status", "data": {"property_id": "property_2", "status": "Sold"}}
+
+    def decode(batch):
+        events = [dict(line.split(": ", 1) for line in block.split("\n")) for block in batch.decode().split("\n\n") if block]
+        return [{"event": event["event"], "data": json.loads(event["data"])} for event in events]
+
+    async def scenario():
+        subscription = manager.events.subscribe("user_8")
+        other = manager.events.subscribe("user_9")
+        assert await subscription.next_batch(0.01) is None
+        manager.update_property_status("property_2", StatusEnum.SOLD, "user_1")
+        created = await asyncio.to_thread(manager.add_property, "user_1", {
+            "location": "Austin", "price": 800, "property_type": "Flat", "description": "Flat", "amenities": [],
+        })
+        events = decode(await subscription.next_batch(1))
+        assert events[0] == sold
+        assert events[1]["event"] == "match" and events[1]["data"]["search_id"] == "search_1"
+        assert events[1]["data"]["property"]["property_id"] == created.property_id
+        assert await other.next_batch(0.01) is None
+
+        manager.events.unsubscribe(subscription)
+        manager.update_property_status("property_2", StatusEnum.AVAILABLE, "user_1")
+        assert subscription.queue == deque() and "user_8" not in manager.events.subscribers
+
+        hub = EventHub(queue_size=2)
+        slow = hub.subscribe("user_8")
+        for n in range(5):
+            hub.publish(["user_8"], "status", {"n": n})
+        events = decode(await slow.next_batch(1))
+        assert events == [{"event": "lagged", "data": {"dropped": 3}},
+                          {"event": "status", "data": {"n": 3}}, {"event": "status", "data": {"n": 4}}]
+
+    asyncio.run(scenario())
+
+
+def test_text_search_matches_brute_force_bm25():
+    """
+    Test that ranked text search (MaxScore over postings, or scoring the planner's slice) returns the same scores
+    as brute-force BM25 over every available listing, with the other filters applied.
+    """
+    rng = random.Random(11)
+    words = ["sunny", "loft", "garden", "quiet", "river", "view", "modern", "spacious", "cozy", "downtown"]
+    manager = PropertyManager()
+    manager.add_properties("user_1", [
+        {
+            "location": rng.choice(["New York", "Boston"]),
+            "price": round(rng.uniform(1000, 10000), 2),
+            "property_type": rng.choice(["Apartment", "Villa"]),
+            # Skewed term frequencies, so some postings are long and others short
+            "description": " ".join(rng.choices(words, weights=range(10, 0, -1), k=rng.randint(3, 12))),
+            "amenities": [],
+        }
+        for _ in range(400)
+    ])
+    for n in range(1, 400, 3):
+        manager.update_property_status(f"property_{n}", StatusEnum.SOLD, "user_1")
+    search = PropertySearch(properties=manager.properties, indices=manager.indices)
+    available = [prop for prop in manager.properties.values() if prop.status == StatusEnum.AVAILABLE]
+
+    tokens = {prop.property_id: tokenize(prop.description) for prop in available}
+    average = sum(len(t) for t in tokens.values()) / len(available)
+
+    def bm25(prop, terms):
+        score = 0.0
+        for term in terms:
+            df = sum(term in t for t in tokens.values())
+            tf = tokens[prop.property_id].count(term)
+            if tf:
+                idf = math.log(1 + (len(available) - df + 0.5) / (df + 0.5))
+                score += idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * len(tokens[prop.property_id]) / average))
+        return score
+
+    for _ in range(40):
+        criteria = {
+            "q": " ".join(rng.sample(words, rng.randint(1, 4))) + rng.choice(["", " the Unknown"]),
+            "max_price": rng.choice([None, 5000]),
+            "location": rng.choice([None, "Boston"]),
+            "property_type": rng.choice([None, "Villa"]),
+            "page": rng.choice([1, 2]),
+            "limit": rng.choice([5, 20]),
+        }
+        terms = set(tokenize(criteria["q"]))
+        expected = sorted(
+            (
+                score for score in (
+                    bm25(prop, terms) for prop in available
+                    if (criteria["max_price"] is None or prop.price <= criteria["max_price"])
+                    and (criteria["location"] is None or prop.location == criteria["location"])
+                    and (criteria["property_type"] is None or prop.property_type == criteria["property_type"])
+                )
+                if score > 0
+            ),
+            reverse=True,
+        )
+        start = (criteria["page"] - 1) * criteria["limit"]
+        result = search.search_properties(criteria)
+        assert [round(bm25(prop, terms), 9) for prop in result] == \
+            [round(score, 9) for score in expected[start:start + criteria["limit"]]]
+
+
+def test_location_suggestions_follow_available_counts(build):
+    """
+    Test that location completions match a brute-force count of available listings per location after
+    adds, bulk adds and status changes.
+    """
+    rng = random.Random(5)
+    manager, search = build()
+    locations = ["San Diego", "San Jose", "Santa Fe", "Santa Clara", "Salem", "Boston", "Boise", "new york",
+                 "Newark", "Newport", "Springfield", "springfield"]
+    for n in range(150):
+        manager.add_property("user_1", {"location": rng.choice(locations), "price": 100, "property_type": "Flat",
+                                        "description": "Flat", "amenities": []})
+    manager.add_properties("user_2", [
+        {"location": rng.choice(locations), "price": 100, "property_type": "Flat", "description": "Flat",
+         "amenities": []}
+        for _ in range(50)
+    ])
+    for property_id, prop in manager.properties.items():
+        if rng.random() < 0.4:
+            manager.update_property_status(property_id, StatusEnum.SOLD, prop.user_id)
+
+    counts = {}
+    for prop in manager.properties.values():
+        if prop.status == StatusEnum.AVAILABLE:
+            counts[prop.location] = counts.get(prop.location, 0) + 1
+    for prefix in ("", "s", "SAN", "sant", "santa f", "b", "new", "Newp", "springfield", "x", "san diegoo"):
+        for limit in (1, 3, 10):
+            expected = sorted(
+                ((location, count) for location, count in counts.items() if location.lower().startswith(prefix.lower())),
+                key=lambda item: (-item[1], item[0]),
+            )[:limit]
+            assert search.suggest_locations(prefix, limit) == expected
+
+
+def test_facets_match_brute_force_counts():
+    """
+    Test that facet counts (maintained counters, the single pass over the planner's slice and the columnar
+    bincounts) match counting the filtered listings one by one.
+    """
+    rng = random.Random(3)
+    for columnar in (False, True):
+        manager = PropertyManager(columnar=columnar)
+        listings = [
+            {
+                "location": rng.choice(["New York", "Boston", "Austin"]),
+                "price": rng.choice([250, 999.99, 1000, 4500, 75000, 2000000]),
+                "property_type": rng.choice(["Apartment", "Villa"]),
+                "description": rng.choice(["sunny loft", "quiet villa", "loft with garden"]),
+                "amenities": rng.sample(["Pool", "Gym"], rng.randint(0, 2)),
+            }
+            for _ in range(120)
+        ]
+        manager.add_properties("user_1", listings[:60])
+        for listing in listings[60:]:
+            manager.add_property("user_1", listing)
+        for n in range(1, 121, 4):
+            manager.update_property_status(f"property_{n}", StatusEnum.SOLD, "user_1")
+        search = PropertySearch(properties=manager.properties, indices=manager.indices,
+                                columnar_store=manager.columnar_store)
+
+        for criteria in (
+            {},
+            {"min_price": 1000},
+            {"location": "Boston", "max_price": 5000},
+            {"location": "Austin", "property_type": "Villa"},
+            {"amenities_all": ["pool"]},
+            {"q": "loft"},
+        ):
+            matching = [
+                prop for prop in manager.properties.values()
+                if prop.status == StatusEnum.AVAILABLE
+                and prop.price >= criteria.get("min_price", 0)
+                and prop.price <= criteria.get("max_price", float("inf"))
+                and criteria.get("location", prop.location) == prop.location
+                and criteria.get("property_type", prop.property_type) == prop.property_type
+                and ("amenities_all" not in criteria or "Pool" in prop.amenities)
+                and ("q" not in criteria or "loft" in prop.description)
+            ]
+            facets = search.search_facets(criteria)
+            assert facets["total"] == len(matching)
+            assert facets["location"] == dict(Counter(prop.location for prop in matching))
+            assert facets["property_type"] == dict(Counter(prop.property_type for prop in matching))
+            histogram = {bucket["min"]: bucket["count"] for bucket in facets["price_histogram"] if bucket["count"]}
+            assert histogram == dict(Counter(
+                max(edge for edge in PRICE_EDGES if edge <= prop.price) for prop in matching
+            ))
+
+
+def test_cached_json_matches_response_model(build):
+    """
+    Response bodies assembled from cached encodings are byte-identical to FastAPI's `response_model` output,
+    including after a status change.
+    """
+    manager, search = build()
+    manager.properties["property_1"].description = "Vue sur la rivière"  # Non-ASCII stays raw UTF-8, as in JSONResponse
+    render = lambda model, value: json.dumps(
+        model.model_validate(value).model_dump(mode="json"), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+    page = search.search_properties({"limit": 10})
+    assert json_array(page) == b"[" + b",".join(render(PropertyDetail, prop) for prop in page) + b"]"
+    assert json_array(page) == json_array(page)  # Served from the cache
+    counts = search.search_facets({})
+    total = counts.pop("total")
+    assert faceted_json(page, total, counts) == render(FacetedSearchResult,
+                                                       {"items": page, "total": total, "facets": counts})
+
+    prop = manager.properties["property_1"]
+    before = json_array([prop])
+    manager.update_property_status("property_1", StatusEnum.SOLD, "user_1")
+    assert json.loads(json_array([prop]))[0]["status"] == "Sold"
+    assert json_array([prop]) == b"[" + render(PropertyDetail, prop) + b"]" != before
+
+
+def test_saved_searches_match_like_searches():
+    """
+    Test that the percolator files every listing that becomes Available (created one at a time, in bulk, or
+    relisted) under exactly the saved searches whose results it would appear in.
+    """
+    rng = random.Random(5)
+    locations, types = ["New York", "Boston", "Austin"], ["Apartment", "Villa"]
+    manager = PropertyManager()
+    search = PropertySearch(properties=manager.properties, indices=manager.indices)
+    saved = []
+    for n in range(60):
+        criteria = {
+            "location": rng.choice(locations + [None]),
+            "property_type": rng.choice(types + [None]),
+            "min_price": rng.choice([None, 500, 1000, 4500]),
+            "max_price": rng.choice([None, 999.99, 5000, 100000]),
+            "amenities_all": rng.choice([None, ["pool"], ["Pool", "Gym"]]),
+            "amenities_any": rng.choice([None, None, ["Gym", "Sauna"]]),
+            "q": rng.choice([None, None, "loft", "quiet garden"]),
+        }
+        if criteria["min_price"] and criteria["max_price"] and criteria["min_price"] > criteria["max_price"]:
+            criteria["max_price"] = None
+        if not any(criteria.values()):
+            criteria["location"] = "Boston"
+        saved.append(manager.save_search(f"user_{n % 2}", criteria))
+    manager.delete_saved_search("user_1", saved.pop(1).search_id)
+
+    listings = [
+        {
+            "location": rng.choice(locations),
+            "price": rng.choice([250, 999.99, 1000, 4500, 75000]),
+            "property_type": rng.choice(types),
+            "description": rng.choice(["sunny loft", "quiet villa", "loft with garden"]),
+            "amenities": rng.sample(["Pool", "Gym"], rng.randint(0, 2)),
+        }
+        for _ in range(100)
+    ]
+    manager.add_properties("owner", listings[:50])
+    for listing in listings[50:]:
+        manager.add_property("owner", listing)
+    for n in range(1, 101, 3):
+        manager.update_property_status(f"property_{n}", StatusEnum.SOLD, "owner")
+    for n in range(1, 101, 6):
+        manager.update_property_status(f"property_{n}", StatusEnum.AVAILABLE, "owner")
+
+    for user_id in ("user_0", "user_1"):
+        matches = manager.get_search_matches(user_id)
+        assert [seq for (seq, _, _), _ in matches] == sorted(seq for (seq, _, _), _ in matches)
+        for saved_search in manager.get_saved_searches(user_id):
+            matched = {prop.property_id for (_, search_id, _), prop in matches if search_id == saved_search.search_id}
+            expected = search.search_properties({**saved_search.criteria, "limit": 1000})
+            assert matched == set(ids(expected)), saved_search.criteria
+        latest = matches[-1][0][0]
+        assert manager.get_search_matches(user_id, after=latest) == []
+        assert manager.get_search_matches(user_id, after=matches[1][0][0], limit=2) == matches[2:4]
+    encoded = json.loads(matches_json(matches[:1]))
+    assert encoded == [{"seq": matches[0][0][0], "search_id": matches[0][0][1],
+                        "property": PropertyDetail.model_validate(matches[0][1]).model_dump(mode="json")}]
@@ -0,0 +1,100 @@
+import bisect
+import random
+from utils.versioning import CHUNK_SIZE, SHARDS, PersistentSortedList, shard_of
+
+
+def test_persistent_sorted_list_matches_sorted_list():
+    """
+    Test that random inserts/removes keep the list sorted, and that older versions are never modified.
+    """
+    rng = random.Random(3)
+    reference = []
+    current = PersistentSortedList()
+    versions = []
+    for _ in range(3000):
+        item = (rng.randrange(500), f"property_{rng.randrange(100)}")
+        if reference and rng.random() < 0.3:
+            item = rng.choice(reference)
+            reference.remove(item)
+            current = current.remove(item)
+        else:
+            reference.append(item)
+            reference.sort()
+            current = current.insert(item)
+        if rng.random() < 0.01:
+            versions.append((list(reference), current))
+
+    assert list(current) == reference
+    for expected, version in versions:
+        assert list(version) == expected
+
+    probe = (250, "")
+    assert current.bisect_left(probe) == sum(1 for item in reference if item < probe)
+    assert list(current.iter_range(10, 900, reverse=True)) == reference[10:900][::-1]
+    assert current[123] == reference[123]
+    assert list(current.merge([(1, "a"), (499, "z")])) == sorted(reference + [(1, "a"), (499, "z")])
+
+
+def test_merge_rebuilds_only_the_chunks_it_lands_in():
+    """
+    Test that merging a batch matches a full sort, splits overfull chunks, and shares every chunk the batch
+    does not land in with the original list, which stays unchanged.
+    """
+    rng = random.Random(5)
+    reference = sorted((rng.randrange(10 ** 6), f"property_{n}") for n in range(10 * CHUNK_SIZE))
+    original = PersistentSortedList(reference)
+    assert original.merge([]) is original
+    assert list(PersistentSortedList().merge(reversed(reference))) == reference
+
+    for batch in (
+        [(-1, "first"), (10 ** 7, "last")],  # Before the first and after the last entry
+        [(reference[5 * CHUNK_SIZE][0], "middle")],  # Into one chunk of the middle
+        [(rng.randrange(10 ** 6), f"batch_{n}") for n in range(3 * CHUNK_SIZE)],  # Into every chunk, some overfull
+        [(reference[CHUNK_SIZE][0], f"run_{n}") for n in range(3 * CHUNK_SIZE)],  # One chunk, split into pieces
+    ):
+        merged = original.merge(batch)
+        assert list(merged) == sorted(reference + batch)
+        assert all(len(chunk) <= 2 * CHUNK_SIZE for chunk in merged._chunks)
+        assert merged._maxes == [chunk[-1] for chunk in merged._chunks]
+        last = len(original._chunks) - 1
+        touched = {min(bisect.bisect_left(original._maxes, item), last) for item in batch}
+        shared = {id(chunk) for chunk in merged._chunks}
+        assert [id(chunk) in shared for chunk in original._chunks] == \
+            [number not in touched for number in range(len(original._chunks))]
+    assert list(original) == reference
+
+
+def test_stream_reads_one_index_version(build):
+    """
+    Test that a search stream started before a write keeps reading the index version it started on.
+    """
+    manager, search = build()
+    stream = search.iter_properties({"location": "New York"})
+    first = next(stream)
+
+    manager.add_property("user_9", {
+        "location": "New York", "price": 8000, "property_type": "Villa", "description": "Villa", "amenities": []
+    })
+    rest = list(stream)
+    assert "property_7" not in [prop.property_id for prop in [first, *rest]]
+    assert len([first, *rest]) == 4  # The New York listings as of the start of the stream
+
+    # A new search sees the write
+    assert "property_7" in [prop.property_id for prop in search.iter_properties({"location": "New York"})]
+
+
+def test_write_copies_one_shard_of_the_owner_and_location_indices(build):
+    """
+    Test that adding a listing copies only the shard holding its key in the owner and location indices.
+    """
+    manager, _ = build()
+    before = manager.indices.current
+    manager.add_property("user_1", {
+        "location": "Boston", "price": 2500, "property_type": "Flat", "description": "Studio flat", "amenities": []
+    })
+    after = manager.indices.current
+    for name, key in (("owner_index", "user_1"), ("location_index", "Boston"),
+                      ("location_type_index", ("Boston", "Flat"))):
+        copied = [old is not new for old, new in zip(getattr(before, name).shards, getattr(after, name).shards)]
+        assert copied == [number == shard_of(key) for number in range(SHARDS)]
+    assert manager.owner_index.get("user_1") and manager.location_type_index[("Boston", "Flat")]
@@ -0,0 +1,127 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOP_K = 10  # Completions cached per trie node, i.e. the most a suggestion request can return
+_SEPARATOR = "\x00"  # Ends the casefolded part of a key, so "Springfield" and "springfield" get separate leaves
+
+Entry = Tuple[int, str]  # (weight, value)
+
+
+def _rank(entry: Entry):
+    return -entry[0], entry[1]  # Heaviest first, ties in alphabetical order
+
+
+class _Node:
+    __slots__ = ("label", "children", "value", "weight", "top")
+
+    def __init__(self, label: str, children: Optional[Dict[str, "_Node"]] = None, value: Optional[str] = None,
+                 weight: int = 0, top: Tuple[Entry, ...] = ()):
+        self.label = label  # Edge label from the parent; never changes once the node is reachable
+        self.children = children if children is not None else {}  # First character of the label -> child
+        self.value = value  # Set on leaves only
+        self.weight = weight
+        self.top = top  # Up to TOP_K best (weight, value) entries of the subtree, replaced as a whole
+
+
+class SuggestionTrie:
+    def __init__(self, weights: Optional[Dict[str, int]] = None):
+        """
+        Radix trie over casefolded values (e.g. locations) for typeahead: every node caches the `TOP_K` heaviest
+        values below it, so a completion is a walk down the prefix plus a tuple slice, independent of how many
+        values share the prefix. Weights are updated in place along one root-to-leaf path, and a path stops being
+        updated as soon as a node's cached completions are unaffected.
+        Readers never lock: nodes are replaced rather than relabeled when an edge splits, and cached completions
+        are swapped as whole tuples. Writers are serialized by the caller's lock.
+        """
+        self.root = _Node("")
+        for value, weight in (weights or {}).items():
+            self.set(value, weight)
+
+    def complete(self, prefix: str, limit: int = TOP_K) -> List[Entry]:
+        """
+        Returns:
+            Up to `limit` (weight, value) pairs of the heaviest values starting with `prefix`, case-insensitive,
+            heaviest first; values of weight 0 are left out
+        """
+        node, rest = self.root, prefix.casefold()
+        while rest:
+            node = node.children.get(rest[0])
+            if node is None:
+                return []
+            if rest.startswith(node.label):
+                rest = rest[len(node.label):]
+            elif node.label.startswith(rest):
+                break
+            else:
+                return []
+        return list(node.top[:limit])
+
+    def set(self, value: str, weight: int):
+        """Sets the weight of a value, adding it on first sight."""
+        path = self._path(value.casefold() + _SEPARATOR + value)
+        leaf = path[-1]
+        if leaf.weight == weight:
+            return
+        previous, leaf.weight = leaf.weight, weight
+        leaf.top = ((weight, value),) if weight > 0 else ()
+        for node in reversed(path[:-1]):
+            if not self._refresh(node, value, weight, previous):
+                break
+
+    def _path(self, key: str) -> List[_Node]:
+        """Returns the nodes from the root to the leaf of `key`, creating the leaf (and splitting an edge) if needed."""
+        path, node, rest = [self.root], self.root, key
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                child = _Node(rest, value=key.split(_SEPARATOR, 1)[1])
+                node.children[rest[0]] = child
+                path.append(child)
+                break
+            common = 0
+            for a, b in zip(child.label, rest):
+                if a != b:
+                    break
+                common += 1
+            if common < len(child.label):
+                # Split the edge: a copy of the child under a new middle node, swapped in with one assignment
+                lower = _Node(child.label[common:], child.children, child.value, child.weight, child.top)
+                child = _Node(child.label[:common], {lower.label[0]: lower}, top=child.top)
+                node.children[rest[0]] = child
+            path.append(child)
+            node, rest = child, rest[common:]
+        return path
+
+    @staticmethod
+    def _refresh(node: _Node, value: str, weight: int, previous: int) -> bool:
+        """
+        Updates the cached completions of an inner node after the weight of `value` below it changed from
+        `previous` to `weight`; its children are already up to date.
+        Returns:
+            True if they changed, i.e. the parent may need an update too
+        """
+        top = node.top
+        listed = any(entry[1] == value for entry in top)
+        if listed and weight >= previous:
+            # Heavier: the same values, reordered
+            top = tuple(sorted(((weight, value) if entry[1] == value else entry for entry in top), key=_rank))
+        elif listed:
+            # Lighter: another value may take its place, so merge the children's completions again
+            top = tuple(heapq.nsmallest(TOP_K, (entry for child in node.children.values() for entry in child.top),
+                                        key=_rank))
+        elif weight > 0 and (len(top) < TOP_K or _rank((weight, value)) < _rank(top[-1])):
+            top = tuple(sorted(top + ((weight, value),), key=_rank)[:TOP_K])
+        else:
+            return False
+        node.top = top
+        return True
+
+    def __len__(self) -> int:
+        """Number of values of non-zero weight."""
+        return sum(1 for leaf in self._leaves(self.root) if leaf.weight > 0)
+
+    def _leaves(self, node: _Node) -> Iterable[_Node]:
+        if node.value is not None:
+            yield node
+        for child in node.children.values():
+            yield from self._leaves(child)
@@ -0,0 +1,195 @@
+import bisect
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+ARRAY_LIMIT = 4096  # A container holding more rows than this is stored as a bitset instead of a sorted tuple
+CHUNK_BITS = 16  # Rows are grouped in chunks of 2**16 by their high bits, as in Roaring bitmaps
+
+# Positions of the set bits of every byte value, used to expand bitset containers
+_BYTE_POSITIONS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+Container = Union[tuple, int]  # Sorted tuple of the low 16 bits of each row (sparse) or an int bitset (dense)
+
+
+def _count(container: Container) -> int:
+    return len(container) if isinstance(container, tuple) else container.bit_count()
+
+
+def _lows(container: Container) -> Iterator[int]:
+    """Yields the low bits stored in a container, in ascending order."""
+    if isinstance(container, tuple):
+        yield from container
+        return
+    for byte_number, byte in enumerate(container.to_bytes((container.bit_length() + 7) // 8, "little")):
+        if byte:
+            base = byte_number * 8
+            for bit in _BYTE_POSITIONS[byte]:
+                yield base + bit
+
+
+def _bitset(lows: Iterable[int]) -> int:
+    bits = bytearray(1 << (CHUNK_BITS - 3))
+    for low in lows:
+        bits[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _compact(container: Container) -> Optional[Container]:
+    """Returns the cheaper representation of a container, or None if it is empty."""
+    count = _count(container)
+    if count == 0:
+        return None
+    if isinstance(container, int) and count <= ARRAY_LIMIT:
+        return tuple(_lows(container))
+    if isinstance(container, tuple) and count > ARRAY_LIMIT:
+        return _bitset(container)
+    return container
+
+
+def _and(a: Container, b: Container) -> Container:
+    if isinstance(a, int) and isinstance(b, int):
+        return a & b
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        return tuple(low for low in a if b >> low & 1)
+    return tuple(sorted(set(a).intersection(b)))
+
+
+def _or(a: Container, b: Container) -> Container:
+    if isinstance(a, int) and isinstance(b, int):
+        return a | b
+    if isinstance(a, int) or isinstance(b, int):
+        bits, lows = (a, b) if isinstance(a, int) else (b, a)
+        return bits | _bitset(lows)
+    return tuple(sorted(set(a).union(b)))
+
+
+class Bitmap:
+    __slots__ = ("_containers", "_count")
+
+    def __init__(self, rows: Iterable[int] = ()):
+        """
+        Immutable compressed set of dense row ids. Rows are split by their high 16 bits into containers:
+        a sorted tuple while a container holds at most `ARRAY_LIMIT` rows, an int bitset (8 KiB at most) beyond.
+        `add` and `remove` return a new bitmap sharing every untouched container, so index versions holding
+        the old bitmap are unaffected.
+        """
+        chunks: Dict[int, List[int]] = {}
+        for row in sorted(set(rows)):
+            chunks.setdefault(row >> CHUNK_BITS, []).append(row & 0xFFFF)
+        self._containers: Dict[int, Container] = {high: _compact(tuple(lows)) for high, lows in chunks.items()}
+        self._count = sum(len(lows) for lows in chunks.values())
+
+    @classmethod
+    def _from_containers(cls, containers: Dict[int, Container], count: Optional[int] = None) -> "Bitmap":
+        new = cls.__new__(cls)
+        new._containers = containers
+        new._count = count if count is not None else sum(_count(container) for container in containers.values())
+        return new
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __contains__(self, row: int) -> bool:
+        container = self._containers.get(row >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = row & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        position = bisect.bisect_left(container, low)
+        return position < len(container) and container[position] == low
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self._containers):
+            base = high << CHUNK_BITS
+            for low in _lows(self._containers[high]):
+                yield base + low
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Bitmap):
+            return self._count == other._count and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Bitmap({list(self)!r})"
+
+    def add(self, row: int) -> "Bitmap":
+        """Returns a new bitmap that also contains `row`."""
+        if row in self:
+            return self
+        high, low = row >> CHUNK_BITS, row & 0xFFFF
+        container = self._containers.get(high, ())
+        if isinstance(container, int):
+            container = container | (1 << low)
+        else:
+            position = bisect.bisect_left(container, low)
+            container = _compact(container[:position] + (low,) + container[position:])
+        containers = dict(self._containers)
+        containers[high] = container
+        return Bitmap._from_containers(containers, self._count + 1)
+
+    def remove(self, row: int) -> "Bitmap":
+        """Returns a new bitmap without `row`."""
+        if row not in self:
+            return self
+        high, low = row >> CHUNK_BITS, row & 0xFFFF
+        container = self._containers[high]
+        if isinstance(container, int):
+            container = _compact(container & ~(1 << low))
+        else:
+            position = bisect.bisect_left(container, low)
+            container = _compact(container[:position] + container[position + 1:])
+        containers = dict(self._containers)
+        if container is None:
+            del containers[high]
+        else:
+            containers[high] = container
+        return Bitmap._from_containers(containers, self._count - 1)
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        containers = {}
+        for high in self._containers.keys() & other._containers.keys():
+            container = _compact(_and(self._containers[high], other._containers[high]))
+            if container is not None:
+                containers[high] = container
+        return Bitmap._from_containers(containers)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        containers = dict(self._containers)
+        for high, container in other._containers.items():
+            containers[high] = _compact(_or(containers[high], container)) if high in containers else container
+        return Bitmap._from_containers(containers)
+
+
+EMPTY_BITMAP = Bitmap()
+
+
+class RowIds:
+    def __init__(self, property_ids: Iterable[str] = ()):
+        """
+        Append-only mapping between property IDs and the dense row ids used by bitmaps:
+            `property_ids`: row id -> property_id
+            `row_of`: property_id -> row id
+        A row is assigned the first time a listing is indexed and never changes, so it is shared by every
+        index version; readers only resolve rows that a published version references.
+        """
+        self.property_ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        for property_id in property_ids:
+            self.assign(property_id)
+
+    def __len__(self) -> int:
+        return len(self.property_ids)
+
+    def assign(self, property_id: str) -> int:
+        """Returns the row of `property_id`, assigning the next one on first sight."""
+        row = self.row_of.get(property_id)
+        if row is None:
+            row = len(self.property_ids)
+            self.property_ids.append(property_id)
+            self.row_of[property_id] = row
+        return row
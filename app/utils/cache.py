@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Callable, Dict, Hashable, Optional
+
+
+class GenerationCounters:
+    def __init__(self):
+        """
+        Write generations used to invalidate cached search results:
+            `by_location`: location -> number of writes that touched a listing in that location
+            `total`: number of writes across all locations
+        """
+        self.by_location: Dict[str, int] = {}
+        self.total = 0
+
+    def bump(self, location: str):
+        """Records a write to a listing in `location`."""
+        self.by_location[location] = self.by_location.get(location, 0) + 1
+        self.total += 1
+
+    def token(self, location: Optional[str]) -> tuple:
+        """
+        Returns the generation a cached result depends on: the location's counter for location-scoped
+        searches, the global counter otherwise.
+        """
+        if location:
+            return location, self.by_location.get(location, 0)
+        return None, self.total
+
+
+class SearchCache:
+    def __init__(self, generations: GenerationCounters, max_entries: int = 1024, ttl: float = 30.0):
+        """
+        Bounded LRU cache of search results with a TTL and generation-based invalidation:
+            `generations`: Write generations maintained by the PropertyManager
+            `max_entries`: Maximum number of cached results; 0 disables the cache
+            `ttl`: Maximum age of a cached result in seconds
+        """
+        self.generations = generations
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (result, generation token, expiry)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, location: Optional[str]):
+        """
+        Returns the cached result for `key`, or None on a miss. Expired results and results computed
+        before a write to their location count as misses and are dropped.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                result, token, expiry = entry
+                if token == self.generations.token(location) and expiry > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self.entries[key]
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def contains(self, key: Hashable, location: Optional[str]) -> bool:
+        """Whether `get` would hit, without counting it or refreshing the entry's recency."""
+        entry = self.entries.get(key)
+        return entry is not None and entry[1] == self.generations.token(location) and entry[2] > time.monotonic()
+
+    def put(self, key: Hashable, location: Optional[str], token: tuple, result):
+        """
+        Caches `result`, computed while the generation was `token`, evicting the least recently used
+        entry when full.
+        """
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (result, token, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Returns the cache counters."""
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class SingleFlight:
+    def __init__(self, enabled: bool = True, executor: Optional[Executor] = None):
+        """
+        Coalesces identical concurrent computations on an event loop ("single flight"):
+            `enabled`: False computes every call right away on the loop, without waiting for identical ones
+            `executor`: Where flights are computed; None is the loop's default thread pool
+            `flights`: key -> future of the computation running for that key
+            `leaders`: computations run, one per flight
+            `shared`: calls answered by a flight started by another call instead of computing again
+        The first call for a key computes in the executor, off the loop, so every identical call that arrives
+        until the result lands joins the flight and awaits it. Nothing is kept once a flight lands: the next
+        call computes again (`SearchCache` keeps results).
+        The hand-off to a thread costs latency on a CPU-saturated process, as the computation then competes with
+        the loop for the GIL.
+        """
+        self.enabled = enabled
+        self.executor = executor
+        self.flights: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def run(self, key: Hashable, function: Callable, *args):
+        """
+        Returns:
+            `function(*args)`, computed by this call or by the flight of an identical call; a failed flight
+            raises its exception in every call that shared it
+        """
+        if not self.enabled:
+            self.leaders += 1
+            return function(*args)
+        loop = asyncio.get_running_loop()
+        future = self.flights.get(key)
+        if future is not None and future.get_loop() is loop:
+            self.shared += 1
+        else:
+            future = self.flights[key] = loop.run_in_executor(self.executor, function, *args)
+            future.add_done_callback(lambda landed: self._land(key, landed))
+            self.leaders += 1
+        return await asyncio.shield(future)  # A call that goes away leaves the flight to the others
+
+    def _land(self, key: Hashable, future: asyncio.Future):
+        if self.flights.get(key) is future:
+            del self.flights[key]
+        if not future.cancelled():
+            future.exception()  # Retrieved here, so a flight left by all its calls logs no unhandled error
@@ -0,0 +1,246 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+STATUS_CODES = {"Available": 0, "Sold": 1}
+ITER_CHUNK = 1024  # Rows whose property IDs `iter_ids` orders and produces at a time
+
+
+def _plain(value):
+    """Returns the raw string behind a `StatusEnum` (or any str Enum) value."""
+    return getattr(value, "value", value)
+
+
+class _Dictionary:
+    def __init__(self):
+        """
+        Dictionary encoding for a categorical column:
+            `codes`: value -> dense integer code
+            `values`: code -> value
+        """
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: str) -> int:
+        """Returns the code for `value`, assigning a new one on first sight."""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        """Returns the code for `value`, or None if it was never encoded."""
+        return self.codes.get(value)
+
+
+class ColumnarStore:
+    def __init__(self, initial_capacity: int = 1024):
+        """
+        Columnar copy of the property listings, keyed by dense row ids:
+            `price`, `timestamp`: float64 columns (timestamp as POSIX seconds)
+            `status`: int8 column of `STATUS_CODES`
+            `location`, `property_type`, `owner`: int32 dictionary-encoded columns
+            `property_ids`: row id -> property_id
+            `row_of`: property_id -> row id
+        """
+        self.size = 0
+        self.price = np.empty(initial_capacity, dtype=np.float64)
+        self.timestamp = np.empty(initial_capacity, dtype=np.float64)
+        self.status = np.empty(initial_capacity, dtype=np.int8)
+        self.location = np.empty(initial_capacity, dtype=np.int32)
+        self.property_type = np.empty(initial_capacity, dtype=np.int32)
+        self.owner = np.empty(initial_capacity, dtype=np.int32)
+        self.property_ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.pending_status: Optional[np.ndarray] = None  # Private copy of `status` written by the unpublished batch
+        self.locations = _Dictionary()
+        self.property_types = _Dictionary()
+        self.owners = _Dictionary()
+
+    def _grow(self):
+        """Doubles the capacity of every column."""
+        capacity = 2 * len(self.price)
+        for name in ("price", "timestamp", "status", "location", "property_type", "owner"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        if self.pending_status is not None:
+            new = np.empty(capacity, dtype=self.pending_status.dtype)
+            new[:self.size] = self.pending_status[:self.size]
+            self.pending_status = new
+
+    def append(self, property_obj) -> int:
+        """
+        Appends a property as a new row.
+        Returns:
+            The row id assigned to the property
+        """
+        if self.size == len(self.price):
+            self._grow()
+        row = self.size
+        self.price[row] = property_obj.price
+        self.timestamp[row] = property_obj.timestamp.timestamp()
+        self.status[row] = STATUS_CODES[_plain(property_obj.status)]
+        if self.pending_status is not None:
+            self.pending_status[row] = self.status[row]
+        self.location[row] = self.locations.encode(property_obj.location)
+        self.property_type[row] = self.property_types.encode(property_obj.property_type)
+        self.owner[row] = self.owners.encode(property_obj.user_id)
+        self.property_ids.append(property_obj.property_id)
+        self.row_of[property_obj.property_id] = row
+        self.size = row + 1  # Publish the row only once every column is written
+        return row
+
+    def set_status(self, property_id: str, status: str):
+        """
+        Updates the status of an existing row in the pending batch. The column is copied on the batch's first
+        change and swapped in by `publish`, rather than written in place, so a search that already holds the
+        previous column keeps a consistent view.
+        """
+        if self.pending_status is None:
+            self.pending_status = self.status.copy()
+        self.pending_status[self.row_of[property_id]] = STATUS_CODES[_plain(status)]
+
+    def publish(self):
+        """Makes the status changes of the pending batch visible to every new search."""
+        if self.pending_status is not None:
+            self.status = self.pending_status
+            self.pending_status = None
+
+    def mask(self, criteria: dict) -> np.ndarray:
+        """
+        Evaluates the search criteria as a vectorized boolean mask over all rows.
+        Parameters:
+            `criteria`: Same dictionary accepted by `PropertySearch.search_properties`
+        Returns:
+            Boolean array of length `size`
+        """
+        size = self.size
+        status_code = STATUS_CODES.get(_plain(criteria.get("status", "Available")))
+        if status_code is None:
+            return np.zeros(size, dtype=bool)
+        mask = self.status[:size] == status_code
+
+        if criteria.get("min_price") is not None:
+            mask &= self.price[:size] >= criteria["min_price"]
+        if criteria.get("max_price") is not None:
+            mask &= self.price[:size] <= criteria["max_price"]
+
+        for column, dictionary, value in (
+            (self.location, self.locations, criteria.get("location")),
+            (self.property_type, self.property_types, criteria.get("property_type")),
+            (self.owner, self.owners, criteria.get("user_id")),
+        ):
+            if not value:
+                continue
+            code = dictionary.lookup(value)
+            if code is None:
+                return np.zeros(size, dtype=bool)
+            mask &= column[:size] == code
+        return mask
+
+    def facets(self, criteria: dict, price_edges: Sequence[float]) -> Tuple[Dict[str, int], Dict[str, int], List[int]]:
+        """
+        Counts the matching rows per location, per property type and per price bucket with `np.bincount`,
+        without sorting or producing property IDs.
+        Parameters:
+            `criteria`: Same dictionary accepted by `PropertySearch.search_properties`
+            `price_edges`: Ascending lower bounds of the price buckets; the last bucket is open-ended
+        Returns:
+            (location -> count, property type -> count, count per price bucket)
+        """
+        rows = np.flatnonzero(self.mask(criteria))
+        counts = []
+        for column, dictionary in ((self.location, self.locations), (self.property_type, self.property_types)):
+            per_code = np.bincount(column[rows], minlength=len(dictionary.values))
+            counts.append({dictionary.values[code]: int(per_code[code]) for code in np.flatnonzero(per_code)})
+        buckets = np.maximum(np.searchsorted(np.asarray(price_edges), self.price[rows], side="right") - 1, 0)
+        histogram = np.bincount(buckets, minlength=len(price_edges))
+        return counts[0], counts[1], histogram.tolist()
+
+    def _ordered_ids(self, rows: np.ndarray, keys: np.ndarray, descending: bool) -> List[str]:
+        """
+        Returns the property IDs of rows already sorted by key, with each run of equal keys ordered by property_id
+        (reversed when descending), which is the tie order of the sorted indices.
+        """
+        property_ids = [self.property_ids[row] for row in rows.tolist()]
+        tied = np.flatnonzero(keys[1:] == keys[:-1]).tolist()  # Positions whose next row has the same key
+        run_start = None
+        for number, position in enumerate(tied):
+            if run_start is None:
+                run_start = position
+            if number + 1 == len(tied) or tied[number + 1] != position + 1:
+                property_ids[run_start:position + 2] = sorted(property_ids[run_start:position + 2], reverse=descending)
+                run_start = None
+        return property_ids
+
+    def search(self, criteria: dict, after: Optional[tuple] = None) -> List[str]:
+        """
+        Filters, sorts and paginates rows on the columns. Rows are ordered by (sort key, property_id), like the
+        sorted indices; only the page and the ties at its edges are ordered by property_id outside NumPy.
+        Parameters:
+            `criteria`: Same dictionary accepted by `PropertySearch.search_properties`
+            `after`: Optional decoded cursor (sort value, property_id); the page starts right after it
+        Returns:
+            Property IDs of the requested page, in sort order
+        """
+        mask = self.mask(criteria)
+        sort_key = _plain(criteria.get("sort_key", "price"))
+        column = (self.price if sort_key == "price" else self.timestamp)[:len(mask)]
+        descending = criteria.get("descending", False)
+
+        page = criteria.get("page", 1)
+        limit = criteria.get("limit", 10)
+        start = (page - 1) * limit
+        if after is not None:
+            value, property_id = after
+            if sort_key == "timestamp":
+                value = value.timestamp()
+            tied = np.flatnonzero(mask & (column == value))
+            mask &= (column < value) if descending else (column > value)
+            mask[[row for row in tied.tolist()
+                  if (self.property_ids[row] < property_id if descending else self.property_ids[row] > property_id)]] = True
+            start = 0
+        end = start + limit
+
+        rows = np.flatnonzero(mask)
+        keys = column[rows]
+        if descending:
+            keys = -keys
+        if 0 < end < len(rows) // 2:
+            # Shallow page: keep only rows up to the end-th smallest key (ties included) before sorting
+            kth = np.partition(keys, end - 1)[end - 1]
+            keep = keys <= kth
+            rows, keys = rows[keep], keys[keep]
+        if start >= len(rows) or end <= start:
+            return []
+        order = np.argsort(keys, kind="stable")
+        rows, keys = rows[order], keys[order]
+        end = min(end, len(rows))
+        # Widen the page to whole runs of equal keys, so its edges are ordered by property_id too
+        lo = int(np.searchsorted(keys, keys[start], side="left"))
+        hi = int(np.searchsorted(keys, keys[end - 1], side="right"))
+        return self._ordered_ids(rows[lo:hi], keys[lo:hi], descending)[start - lo:end - lo]
+
+    def iter_ids(self, criteria: dict) -> Iterator[str]:
+        """
+        Yields the property IDs of every matching row in (sort key, property_id) order, without pagination.
+        Only the sorted row numbers are materialized; IDs are produced lazily, one chunk of whole runs of equal keys
+        at a time.
+        """
+        mask = self.mask(criteria)
+        sort_key = _plain(criteria.get("sort_key", "price"))
+        descending = criteria.get("descending", False)
+        rows = np.flatnonzero(mask)
+        keys = (self.price if sort_key == "price" else self.timestamp)[rows]
+        if descending:
+            keys = -keys
+        order = np.argsort(keys, kind="stable")
+        rows, keys = rows[order], keys[order]
+        start = 0
+        while start < len(rows):
+            end = int(np.searchsorted(keys, keys[min(start + ITER_CHUNK, len(rows)) - 1], side="right"))
+            yield from self._ordered_ids(rows[start:end], keys[start:end], descending)
+            start = end
@@ -0,0 +1,120 @@
+import asyncio
+import json
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, Optional
+
+QUEUE_SIZE = 256  # Events buffered per subscriber before the oldest are dropped
+HEARTBEAT_SECONDS = 15.0  # Comment line sent on an idle stream, so proxies keep the connection open
+
+
+def sse_event(event: str, data: bytes) -> bytes:
+    """Encodes one server-sent event; `data` must be single-line JSON."""
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+class Subscription:
+    __slots__ = ("user_id", "loop", "queue", "wakeup", "dropped")
+
+    def __init__(self, user_id: str, loop: asyncio.AbstractEventLoop, size: int):
+        """
+        One connected stream of a user's events:
+            `queue`: Encoded events not yet sent, at most `size`; when full, the oldest one is dropped
+            `wakeup`: Set when an event is queued, awaited by the stream while the queue is empty
+            `dropped`: Events dropped since the stream last caught up, reported to the client in a `lagged` event
+        An idle subscription costs a deque, an asyncio.Event and a suspended coroutine, not a thread.
+        """
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = deque(maxlen=size)
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, event: bytes):
+        """Queues an event. Runs on the subscription's event loop."""
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1  # A slow client loses its oldest events instead of holding back the writer
+        self.queue.append(event)
+        self.wakeup.set()
+
+    async def next_batch(self, timeout: float) -> Optional[bytes]:
+        """
+        Waits up to `timeout` seconds for events.
+        Returns:
+            Every queued event, preceded by a `lagged` event if some were dropped; None on timeout
+        """
+        if not self.queue:
+            self.wakeup.clear()
+            # A timer handle instead of `asyncio.wait_for`, which wraps the wait in a task per call
+            timer = self.loop.call_later(timeout, self.wakeup.set)
+            try:
+                await self.wakeup.wait()
+            finally:
+                timer.cancel()
+            if not self.queue:
+                return None
+        events = list(self.queue)
+        self.queue.clear()
+        if self.dropped:
+            events.insert(0, sse_event("lagged", b'{"dropped":%d}' % self.dropped))
+            self.dropped = 0
+        return b"".join(events)
+
+
+class EventHub:
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        """
+        In-process publish/subscribe of per-user events:
+            `subscribers`: user_id -> the user's open subscriptions (one per connected stream). The sets are
+                           replaced, never changed in place, so writers iterate them without a lock
+        Writers publish from any thread while holding the writer lock; each event is encoded once and handed to
+        the subscriptions' event loops, so publishing never waits for a client. Without subscribers for the
+        target users, publishing costs one dictionary lookup per user.
+        """
+        self.queue_size = queue_size
+        self.subscribers: Dict[str, FrozenSet[Subscription]] = {}
+
+    def subscribe(self, user_id: str) -> Subscription:
+        """Opens a subscription on the running event loop; pair it with `unsubscribe`."""
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        self.subscribers[user_id] = self.subscribers.get(user_id, frozenset()) | {subscription}
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self.subscribers.get(subscription.user_id, frozenset()) - {subscription}
+        if subscriptions:
+            self.subscribers[subscription.user_id] = subscriptions
+        else:
+            self.subscribers.pop(subscription.user_id, None)
+
+    def publish(self, user_ids: Iterable[str], event: str, payload: dict):
+        """Sends an event with a JSON payload to every subscription of the given users."""
+        targets = [subscription for user_id in user_ids for subscription in self.subscribers.get(user_id, ())]
+        if not targets:
+            return
+        encoded = sse_event(event, json.dumps(payload, separators=(",", ":"), default=str).encode())
+        self._deliver(targets, encoded)
+
+    def publish_encoded(self, user_id: str, encoded: bytes):
+        """Sends an event already encoded with `sse_event` to every subscription of the user."""
+        targets = self.subscribers.get(user_id)
+        if targets:
+            self._deliver(targets, encoded)
+
+    @staticmethod
+    def _deliver(targets: Iterable[Subscription], encoded: bytes):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for subscription in targets:
+            if subscription.loop is running:
+                subscription.push(encoded)
+            else:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.push, encoded)
+                except RuntimeError:
+                    pass  # The loop closed; its streams are gone
+
+    @property
+    def subscription_count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self.subscribers.values())
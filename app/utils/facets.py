@@ -0,0 +1,53 @@
+import bisect
+from typing import Dict, Iterable, List
+
+# Lower bounds of the price histogram buckets; the last bucket is open-ended
+PRICE_EDGES = (0, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 250000, 500000, 1000000)
+EMPTY_HISTOGRAM = (0,) * len(PRICE_EDGES)
+
+
+def price_bucket(price: float) -> int:
+    """Returns the histogram bucket of a price."""
+    return max(bisect.bisect_right(PRICE_EDGES, price) - 1, 0)
+
+
+class FacetCounter:
+    __slots__ = ("location", "property_type", "histogram")
+
+    def __init__(self):
+        """
+        Facet counts of a set of listings, accumulated in one pass:
+            `location`, `property_type`: value -> number of listings
+            `histogram`: number of listings per `PRICE_EDGES` bucket
+        """
+        self.location: Dict[str, int] = {}
+        self.property_type: Dict[str, int] = {}
+        self.histogram: List[int] = [0] * len(PRICE_EDGES)
+
+    def add(self, location: str, property_type: str, price: float):
+        self.location[location] = self.location.get(location, 0) + 1
+        self.property_type[property_type] = self.property_type.get(property_type, 0) + 1
+        self.histogram[price_bucket(price)] += 1
+
+    def result(self) -> dict:
+        return facet_result(self.location, self.property_type, self.histogram)
+
+
+def facet_result(location: Dict[str, int], property_type: Dict[str, int], histogram: Iterable[int]) -> dict:
+    """
+    Formats facet counts for the API:
+        `total`: Number of listings counted
+        `location`, `property_type`: value -> count, largest first, zero counts left out
+        `price_histogram`: {"min", "max", "count"} per bucket, "max" exclusive and None for the last one
+    """
+    histogram = list(histogram)
+    ranked = lambda counts: dict(sorted(((k, v) for k, v in counts.items() if v), key=lambda kv: (-kv[1], kv[0])))
+    bounds = zip(PRICE_EDGES, PRICE_EDGES[1:] + (None,))
+    return {
+        "total": sum(histogram),
+        "location": ranked(location),
+        "property_type": ranked(property_type),
+        "price_histogram": [
+            {"min": low, "max": high, "count": count} for (low, high), count in zip(bounds, histogram)
+        ],
+    }
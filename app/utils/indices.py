@@ -1,39 +1,243 @@
-import bisect
+from utils.bitmap import Bitmap, EMPTY_BITMAP
+from utils.facets import price_bucket
+from utils.text_index import Postings, term_frequencies
+from utils.versioning import EMPTY
 
-def add_to_indices(price_index, location_index, property_obj):
+# Every function below updates an `IndexDraft` (see utils/versioning.py): sorted lists and bitmaps are replaced by
+# new versions sharing untouched chunks, and dictionaries (or, for the term, location and owner indices, dictionary
+# shards) are copied once per draft before being modified.
+
+def amenity_keys(amenities):
+    """
+    Returns the amenity index keys of a listing's amenities: casefolded and deduplicated, so "Pool" and "pool" match.
+    """
+    return {amenity.casefold() for amenity in amenities}
+
+def add_to_term_index(indices, property_obj):
+    """
+    Adds a property's description to the term index and the BM25 corpus statistics.
+    Args:
+        indices (IndexDraft): The next index version being built by the writer.
+        property_obj: The property object to add to the index.
+    """
+    frequencies, length = term_frequencies(property_obj.description)
+    if not frequencies:
+        return
+    row = indices.row_ids.assign(property_obj.property_id)
+    for term, tf in frequencies.items():
+        shard = indices.writable_shard("term_index", term)
+        shard[term] = shard.get(term, Postings()).add(row, tf, length)
+    doc_count, total_length = indices.text_stats
+    indices.text_stats = (doc_count + 1, total_length + length)
+
+def remove_from_term_index(indices, property_obj):
+    """
+    Removes a property's description from the term index and the BM25 corpus statistics.
+    Args:
+        indices (IndexDraft): The next index version being built by the writer.
+        property_obj: The property object to remove from the index.
+    """
+    frequencies, length = term_frequencies(property_obj.description)
+    if not frequencies:
+        return
+    row = indices.row_ids.assign(property_obj.property_id)
+    for term, tf in frequencies.items():
+        shard = indices.writable_shard("term_index", term)
+        if term in shard:
+            shard[term] = shard[term].remove(row, tf, length)
+            # Clean up empty postings
+            if not shard[term]:
+                del shard[term]
+    doc_count, total_length = indices.text_stats
+    indices.text_stats = (doc_count - 1, total_length - length)
+
+def count_facets(indices, properties, delta):
+    """
+    Adds `delta` (1 or -1) per property to the unfiltered facet counters: listings per location, per property type
+    and per price bucket.
+    Args:
+        indices (IndexDraft): The next index version being built by the writer.
+        properties (list): The property objects counted in or out.
+        delta (int): 1 when they become available, -1 when they stop being available.
     """
-    Adds a property to the price and location indices.
+    location_counts = indices.writable("location_counts")
+    type_counts = indices.writable("type_counts")
+    histogram = list(indices.price_histogram)
+    for property_obj in properties:
+        for counts, key in ((location_counts, property_obj.location), (type_counts, property_obj.property_type)):
+            counts[key] = counts.get(key, 0) + delta
+            if not counts[key]:
+                del counts[key]
+        histogram[price_bucket(property_obj.price)] += delta
+    indices.price_histogram = tuple(histogram)
+
+def add_to_indices(indices, property_obj):
+    """
+    Adds a property to the price, location, amenity and term indices and to the facet counters.
     Args:
-        price_index (list): The sorted list of (price, property_id) tuples.
-        location_index (dict): The dictionary mapping locations to property IDs.
+        indices (IndexDraft): The next index version being built by the writer.
         property_obj: The property object to add to the indices.
     """
+    price_entry = (property_obj.price, property_obj.property_id)
+
     # Add to price index
-    bisect.insort(price_index, (property_obj.price, property_obj.property_id))
+    indices.price_index = indices.price_index.insert(price_entry)
+
+    # Add to timestamp index
+    indices.timestamp_index = indices.timestamp_index.insert((property_obj.timestamp, property_obj.property_id))
+
+    # Add to location index, kept in price order so a price range within a location is a single bisect slice
+    location_index = indices.writable_shard("location_index", property_obj.location)
+    location_index[property_obj.location] = location_index.get(property_obj.location, EMPTY).insert(price_entry)
+
+    # Add to composite (location, property_type) index
+    key = (property_obj.location, property_obj.property_type)
+    location_type_index = indices.writable_shard("location_type_index", key)
+    location_type_index[key] = location_type_index.get(key, EMPTY).insert(price_entry)
+
+    # Add to amenity bitmaps
+    if property_obj.amenities:
+        row = indices.row_ids.assign(property_obj.property_id)
+        amenity_index = indices.writable("amenity_index")
+        for amenity in amenity_keys(property_obj.amenities):
+            amenity_index[amenity] = amenity_index.get(amenity, EMPTY_BITMAP).add(row)
+
+    # Add to term index
+    add_to_term_index(indices, property_obj)
 
-    # Add to location index
-    if property_obj.location not in location_index:
-        location_index[property_obj.location] = []
-    location_index[property_obj.location].append(property_obj.property_id)
+    # Count in facet counters
+    count_facets(indices, [property_obj], 1)
 
-def remove_from_indices(price_index, location_index, property_obj):
+def remove_from_indices(indices, property_obj):
     """
-    Removes a property from the price and location indices.
+    Removes a property from the price, location, amenity and term indices and from the facet counters.
     Args:
-        price_index (list): The sorted list of (price, property_id) tuples.
-        location_index (dict): The dictionary mapping locations to property IDs.
+        indices (IndexDraft): The next index version being built by the writer.
         property_obj: The property object to remove from the indices.
     """
-    # Remove from price index using bisect to find the position
-    index = bisect.bisect_left(price_index, (property_obj.price, property_obj.property_id))
+    price_entry = (property_obj.price, property_obj.property_id)
 
-    # Check if the element exists at the found position
-    if index < len(price_index) and price_index[index] == (property_obj.price, property_obj.property_id):
-        del price_index[index]  # Remove the element efficiently
+    # Remove from price index
+    indices.price_index = indices.price_index.remove(price_entry)
+
+    # Remove from timestamp index
+    indices.timestamp_index = indices.timestamp_index.remove((property_obj.timestamp, property_obj.property_id))
 
     # Remove from location index
+    location_index = indices.writable_shard("location_index", property_obj.location)
     if property_obj.location in location_index:
-        location_index[property_obj.location].remove(property_obj.property_id)
+        location_index[property_obj.location] = location_index[property_obj.location].remove(price_entry)
         # Clean up empty lists
         if not location_index[property_obj.location]:
             del location_index[property_obj.location]
+
+    # Remove from composite (location, property_type) index
+    key = (property_obj.location, property_obj.property_type)
+    location_type_index = indices.writable_shard("location_type_index", key)
+    if key in location_type_index:
+        location_type_index[key] = location_type_index[key].remove(price_entry)
+        if not location_type_index[key]:
+            del location_type_index[key]
+
+    # Remove from amenity bitmaps
+    if property_obj.amenities:
+        row = indices.row_ids.assign(property_obj.property_id)
+        amenity_index = indices.writable("amenity_index")
+        for amenity in amenity_keys(property_obj.amenities):
+            if amenity in amenity_index:
+                amenity_index[amenity] = amenity_index[amenity].remove(row)
+                if not amenity_index[amenity]:
+                    del amenity_index[amenity]
+
+    # Remove from term index
+    remove_from_term_index(indices, property_obj)
+
+    # Count out of facet counters
+    count_facets(indices, [property_obj], -1)
+
+def bulk_add_to_indices(indices, properties):
+    """
+    Adds a batch of properties to the price, location, amenity and term indices with one sort-merge (or bitmap union)
+    per index or term, and to the facet counters.
+    Args:
+        indices (IndexDraft): The next index version being built by the writer.
+        properties (list): The property objects to add to the indices.
+    """
+    by_location, by_location_type, by_amenity, by_term = {}, {}, {}, {}
+    doc_count, total_length = indices.text_stats
+    for property_obj in properties:
+        price_entry = (property_obj.price, property_obj.property_id)
+        by_location.setdefault(property_obj.location, []).append(price_entry)
+        by_location_type.setdefault((property_obj.location, property_obj.property_type), []).append(price_entry)
+        if property_obj.amenities:
+            row = indices.row_ids.assign(property_obj.property_id)
+            for amenity in amenity_keys(property_obj.amenities):
+                by_amenity.setdefault(amenity, []).append(row)
+        frequencies, length = term_frequencies(property_obj.description)
+        if frequencies:
+            row = indices.row_ids.assign(property_obj.property_id)
+            for term, tf in frequencies.items():
+                by_term.setdefault(term, []).append((row, tf, length))
+            doc_count, total_length = doc_count + 1, total_length + length
+
+    indices.price_index = indices.price_index.merge(entry for entries in by_location.values() for entry in entries)
+    indices.timestamp_index = indices.timestamp_index.merge(
+        (property_obj.timestamp, property_obj.property_id) for property_obj in properties
+    )
+    for location, entries in by_location.items():
+        shard = indices.writable_shard("location_index", location)
+        shard[location] = shard.get(location, EMPTY).merge(entries)
+    for key, entries in by_location_type.items():
+        shard = indices.writable_shard("location_type_index", key)
+        shard[key] = shard.get(key, EMPTY).merge(entries)
+    amenity_index = indices.writable("amenity_index")
+    for amenity, rows in by_amenity.items():
+        amenity_index[amenity] = amenity_index.get(amenity, EMPTY_BITMAP) | Bitmap(rows)
+    for term, entries in by_term.items():
+        shard = indices.writable_shard("term_index", term)
+        shard[term] = shard.get(term, Postings()).merge(entries)
+    indices.text_stats = (doc_count, total_length)
+    count_facets(indices, properties, 1)
+
+def add_to_owner_index(indices, property_obj):
+    """
+    Adds a property to its owner's timestamp-ordered listings.
+    Args:
+        indices (IndexDraft): The next index version being built by the writer.
+        property_obj: The property object to add to the index.
+    """
+    owner_index = indices.writable_shard("owner_index", property_obj.user_id)
+    owner_index[property_obj.user_id] = owner_index.get(property_obj.user_id, EMPTY).insert(
+        (property_obj.timestamp, property_obj.property_id)
+    )
+
+def bulk_add_to_owner_index(indices, properties):
+    """
+    Adds a batch of properties to their owners' timestamp-ordered listings.
+    Args:
+        indices (IndexDraft): The next index version being built by the writer.
+        properties (list): The property objects to add to the index.
+    """
+    by_owner = {}
+    for property_obj in properties:
+        by_owner.setdefault(property_obj.user_id, []).append((property_obj.timestamp, property_obj.property_id))
+    for user_id, entries in by_owner.items():
+        shard = indices.writable_shard("owner_index", user_id)
+        shard[user_id] = shard.get(user_id, EMPTY).merge(entries)
+
+def remove_from_owner_index(indices, property_obj):
+    """
+    Removes a property from its owner's timestamp-ordered listings.
+    Args:
+        indices (IndexDraft): The next index version being built by the writer.
+        property_obj: The property object to remove from the index.
+    """
+    owner_index = indices.writable_shard("owner_index", property_obj.user_id)
+    if property_obj.user_id not in owner_index:
+        return
+    owner_index[property_obj.user_id] = owner_index[property_obj.user_id].remove(
+        (property_obj.timestamp, property_obj.property_id)
+    )
+    # Clean up empty lists
+    if not owner_index[property_obj.user_id]:
+        del owner_index[property_obj.user_id]
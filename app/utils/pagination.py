@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(sort_key: str, descending: bool, property_obj) -> str:
+    """
+    Encodes the position right after `property_obj` in a (sort_key, property_id) ordering.
+    Args:
+        sort_key (str): The field results are sorted by ('price' or 'timestamp').
+        descending (bool): Whether results are sorted in descending order.
+        property_obj: The last property of the current page.
+    Returns:
+        str: An opaque, URL-safe cursor.
+    """
+    sort_key = getattr(sort_key, "value", sort_key)
+    value = getattr(property_obj, sort_key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_key, bool(descending), value, property_obj.property_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str, descending: bool) -> tuple:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+    Args:
+        cursor (str): The opaque cursor received from the client.
+        sort_key (str): The sort field of the current request.
+        descending (bool): The sort direction of the current request.
+    Returns:
+        tuple: The (sort value, property_id) of the last property already returned.
+    Raises:
+        ValueError: If the cursor is malformed or was issued for a different sort order.
+    """
+    sort_key = getattr(sort_key, "value", sort_key)
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_key, cursor_descending, value, property_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+    if cursor_key != sort_key or cursor_descending != bool(descending):
+        raise ValueError("Cursor does not match the requested sort order.")
+    if sort_key == "timestamp":
+        value = datetime.fromisoformat(value)
+    return value, property_id
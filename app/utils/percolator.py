@@ -0,0 +1,174 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from utils.facets import PRICE_EDGES, price_bucket
+from utils.indices import amenity_keys
+from utils.text_index import tokenize
+from utils.versioning import EMPTY, HIGHEST, PersistentSortedList
+
+INBOX_SIZE = 1000  # Most recent matches kept per user
+MAX_SAVED_SEARCHES = 50  # Per user
+CRITERIA = ("location", "property_type", "min_price", "max_price", "amenities_all", "amenities_any", "q")
+
+Match = Tuple[int, str, str]  # (sequence number, search_id, property_id)
+
+
+class SavedSearch:
+    __slots__ = ("search_id", "number", "user_id", "criteria", "created_at", "amenities_all", "amenities_any",
+                 "terms")
+
+    def __init__(self, search_id: str, user_id: str, criteria: dict, created_at: datetime):
+        """
+        A user's stored search criteria (the subset of `PropertySearch.search_properties` filters in `CRITERIA`)
+        with the normalized forms used for matching: casefolded amenities and the tokenized text query.
+        Listings match like in a search: exact location and type, inclusive price bounds, every `amenities_all`,
+        at least one `amenities_any`, and at least one term of `q` in the description.
+        """
+        self.search_id = search_id
+        self.number = int(search_id.rsplit("_", 1)[1])  # Creation order; orders matches deterministically
+        self.user_id = user_id
+        self.criteria = {name: criteria.get(name) for name in CRITERIA}
+        self.created_at = created_at
+        self.amenities_all = amenity_keys(criteria.get("amenities_all") or ())
+        self.amenities_any = amenity_keys(criteria.get("amenities_any") or ())
+        self.terms = set(tokenize(criteria.get("q")))
+
+    def price_cells(self) -> range:
+        """Price histogram buckets (`utils.facets.PRICE_EDGES`) the search's price interval overlaps."""
+        min_price, max_price = self.criteria["min_price"], self.criteria["max_price"]
+        first = 0 if min_price is None else price_bucket(min_price)
+        last = len(PRICE_EDGES) - 1 if max_price is None else price_bucket(max_price)
+        return range(first, last + 1)
+
+    def key(self) -> Tuple[Optional[str], Optional[str]]:
+        return self.criteria["location"] or None, self.criteria["property_type"] or None
+
+
+class Percolator:
+    def __init__(self):
+        """
+        Saved searches indexed for matching new listings against them, plus per-user inboxes of matches:
+            `searches`: search_id -> SavedSearch
+            `by_user`: user_id -> IDs of the user's saved searches, oldest first
+            `cells`: (location or None, property_type or None) -> per price bucket, the IDs of the searches whose
+                     price interval overlaps the bucket. A listing is checked against the searches of one bucket
+                     in four keys only (its location and type, either one, neither), not against every search.
+            `inboxes`: user_id -> (seq, search_id, property_id) matches, oldest first, at most `INBOX_SIZE`.
+                       Immutable sorted lists, replaced on write, so readers and snapshots never copy them.
+            `seq`: Sequence number of the last match; increases across all inboxes
+        Writers are serialized by the caller's lock.
+        """
+        self.searches: Dict[str, SavedSearch] = {}
+        self.by_user: Dict[str, Dict[str, None]] = {}
+        self.cells: Dict[Tuple[Optional[str], Optional[str]], List[Set[str]]] = {}
+        self.inboxes: Dict[str, PersistentSortedList] = {}
+        self.seq = 0
+        self.next_number = 1
+
+    def new_id(self) -> str:
+        return f"search_{self.next_number}"
+
+    def add(self, saved: SavedSearch):
+        """Stores and indexes a saved search; a no-op if its ID is already stored."""
+        if saved.search_id in self.searches:
+            return
+        self.searches[saved.search_id] = saved
+        self.by_user.setdefault(saved.user_id, {})[saved.search_id] = None
+        self.next_number = max(self.next_number, saved.number + 1)
+        cells = self.cells.setdefault(saved.key(), [set() for _ in PRICE_EDGES])
+        for cell in saved.price_cells():
+            cells[cell].add(saved.search_id)
+
+    def remove(self, search_id: str) -> bool:
+        """
+        Deletes a saved search; its earlier matches leave the inbox on the next read.
+        Returns:
+            False if there is no such search
+        """
+        saved = self.searches.pop(search_id, None)
+        if saved is None:
+            return False
+        del self.by_user[saved.user_id][search_id]
+        if not self.by_user[saved.user_id]:
+            del self.by_user[saved.user_id]
+        cells = self.cells[saved.key()]
+        for cell in saved.price_cells():
+            cells[cell].discard(search_id)
+        if not any(cells):
+            del self.cells[saved.key()]
+        return True
+
+    def percolate(self, prop) -> List[Tuple[str, Match]]:
+        """
+        Matches a listing that just became Available (created or relisted) against the saved searches and
+        appends it to the inbox of every user with a matching search, in search creation order.
+        Returns:
+            The matches filed, as (user_id, match) pairs
+        """
+        if not self.searches:
+            return []
+        cell = price_bucket(prop.price)
+        candidates = set()
+        for key in ((prop.location, prop.property_type), (prop.location, None), (None, prop.property_type), (None, None)):
+            cells = self.cells.get(key)
+            if cells is not None:
+                candidates.update(cells[cell])
+        if not candidates:
+            return []
+
+        amenities = amenity_keys(prop.amenities or ())
+        terms = None
+        matched = []
+        for search_id in candidates:
+            saved = self.searches[search_id]
+            min_price, max_price = saved.criteria["min_price"], saved.criteria["max_price"]
+            if min_price is not None and prop.price < min_price or max_price is not None and prop.price > max_price:
+                continue
+            if not saved.amenities_all <= amenities or saved.amenities_any and not saved.amenities_any & amenities:
+                continue
+            if saved.terms:
+                if terms is None:
+                    terms = set(tokenize(prop.description))
+                if not saved.terms & terms:
+                    continue
+            matched.append(saved)
+
+        filed = []
+        for saved in sorted(matched, key=lambda saved: saved.number):
+            self.seq += 1
+            match = (self.seq, saved.search_id, prop.property_id)
+            inbox = self.inboxes.get(saved.user_id, EMPTY).insert(match)
+            if len(inbox) > INBOX_SIZE:
+                inbox = inbox.remove(inbox[0])
+            self.inboxes[saved.user_id] = inbox
+            filed.append((saved.user_id, match))
+        return filed
+
+    def user_searches(self, user_id: str) -> List[SavedSearch]:
+        return [self.searches[search_id] for search_id in self.by_user.get(user_id, ())]
+
+    def matches(self, user_id: str, after: int = 0) -> Iterable[Match]:
+        """
+        Returns:
+            The user's matches with a sequence number above `after`, oldest first, lazily
+        """
+        inbox = self.inboxes.get(user_id, EMPTY)  # One immutable version for the whole read
+        return inbox.iter_range(inbox.bisect_right((after, HIGHEST)), len(inbox))
+
+    def to_state(self) -> dict:
+        """Snapshot form: the saved searches in creation order, the inboxes and the counters."""
+        return {
+            "searches": [(saved.search_id, saved.user_id, saved.criteria, saved.created_at)
+                         for saved in self.searches.values()],
+            "inboxes": dict(self.inboxes),
+            "seq": self.seq,
+            "next_number": self.next_number,
+        }
+
+    def load(self, state: dict):
+        """Replaces the saved searches and inboxes with those of a snapshot (see `to_state`)."""
+        self.searches, self.by_user, self.cells = {}, {}, {}
+        for search_id, user_id, criteria, created_at in state["searches"]:
+            self.add(SavedSearch(search_id, user_id, criteria, created_at))
+        self.inboxes = dict(state["inboxes"])
+        self.seq = state["seq"]
+        self.next_number = max(self.next_number, state["next_number"])
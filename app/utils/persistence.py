@@ -0,0 +1,299 @@
+import json
+import mmap
+import os
+import pickle
+import threading
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+from utils.metrics import TimedLock
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so no multi-worker mode
+    fcntl = None
+
+WAL_PREFIX = "wal."
+WAL_SUFFIX = ".log"
+SNAPSHOT_PREFIX = "snapshot."
+SNAPSHOT_SUFFIX = ".bin"
+LOCK_FILE = "writer.lock"
+
+
+def _encode(value):
+    """JSON fallback for values the WAL records carry: datetimes and str Enums."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return getattr(value, "value", str(value))
+
+
+class WriteAheadLog:
+    def __init__(self, data_dir: str, sync_every: int = 64, sync_interval: float = 0.05, shared: bool = False):
+        """
+        Append-only, segmented log of JSON-lines write records with batched fsync:
+            `data_dir`: Directory holding the log segments and the snapshot
+            `sync_every`: fsync once this many records are pending
+            `sync_interval`: Maximum time in seconds a record waits for its fsync
+            `shared`: Several worker processes append to and tail this log; every append is handed to the
+                      OS immediately so the other workers can read it. Appends must hold the `SharedWriterLock`.
+        Records are flushed to disk in groups; a crash may lose at most the writes of the last unsynced batch.
+        """
+        self.data_dir = data_dir
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.shared = shared
+        self.pending = 0  # Records written since the last fsync
+        self.records_since_snapshot = 0
+        self.lock = TimedLock(threading.Lock(), "wal")
+        os.makedirs(data_dir, exist_ok=True)
+        segments = self.segments()
+        self.segment = segments[-1] if segments else 1
+        if not shared:  # Another worker may have a write in flight; shared logs call `repair` under the writer lock
+            self.repair()
+        self.file = open(self._path(self.segment), "ab")
+
+        # Position up to which records have been read back (`replay`/`tail`) or written by this process
+        self.read_segment = segments[0] if segments else 1
+        self.read_offset = 0
+        self._closed = threading.Event()
+        self._syncer = threading.Thread(target=self._sync_loop, name="wal-sync", daemon=True)
+        self._syncer.start()
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.data_dir, f"{WAL_PREFIX}{segment:08d}{WAL_SUFFIX}")
+
+    def repair(self):
+        """Truncates a torn final record left by a crash, so new records start on a fresh line."""
+        path = self._path(self.segment)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as segment:
+            data = segment.read()
+            if data and not data.endswith(b"\n"):
+                segment.truncate(data.rfind(b"\n") + 1)
+
+    def segments(self) -> List[int]:
+        """Returns the numbers of the log segments on disk, oldest first."""
+        return sorted(
+            int(name[len(WAL_PREFIX):-len(WAL_SUFFIX)])
+            for name in os.listdir(self.data_dir)
+            if name.startswith(WAL_PREFIX) and name.endswith(WAL_SUFFIX)
+        )
+
+    @staticmethod
+    def _encode_record(record: dict) -> bytes:
+        return json.dumps(record, default=_encode, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    def append(self, record: dict):
+        """Appends a record; it is fsynced with the next batch."""
+        line = self._encode_record(record)
+        with self.lock:
+            self._write(line, 1)
+            if self.pending >= self.sync_every:
+                self._sync()
+
+    def append_many(self, records: List[dict]):
+        """Appends a batch of records and fsyncs them together."""
+        lines = b"".join(self._encode_record(record) for record in records)
+        with self.lock:
+            self._write(lines, len(records))
+            self._sync()
+
+    def _write(self, data: bytes, count: int):
+        """
+        Writes encoded records to the current segment. Caller holds `self.lock`; the writer has read
+        every earlier record, so its own records simply advance the read position.
+        """
+        self.file.write(data)
+        if self.shared:
+            self.file.flush()  # Visible to the other workers before the writer lock is released
+        self.pending += count
+        self.records_since_snapshot += count
+        self.read_segment, self.read_offset = self.segment, self.read_offset + len(data)
+
+    def _sync(self):
+        """Flushes and fsyncs the current segment. Caller holds `self.lock`."""
+        if self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+
+    def sync(self):
+        """Forces pending records to disk."""
+        with self.lock:
+            self._sync()
+
+    def _sync_loop(self):
+        """Bounds the time a record can stay unsynced when writes are too sparse to fill a batch."""
+        while not self._closed.wait(self.sync_interval):
+            self.sync()
+
+    def rotate(self) -> int:
+        """
+        Starts a new segment; records appended afterwards belong to it.
+        Returns:
+            The number of the new segment
+        """
+        with self.lock:
+            self._sync()
+            self.file.close()
+            self.segment += 1
+            self.file = open(self._path(self.segment), "ab")
+            self.records_since_snapshot = 0
+            self.read_segment, self.read_offset = self.segment, 0
+            return self.segment
+
+    def discard_before(self, segment: int):
+        """Deletes the segments older than `segment`, once a snapshot covers them."""
+        for number in self.segments():
+            if number < segment:
+                os.remove(self._path(number))
+
+    def seek(self, segment: int):
+        """Moves the read position to the start of `segment`."""
+        self.read_segment, self.read_offset = segment, 0
+
+    def replay(self, from_segment: int) -> Iterator[dict]:
+        """Yields the records of every segment starting at `from_segment`, in write order."""
+        self.seek(from_segment)
+        return self.tail()
+
+    def has_unread(self) -> bool:
+        """Cheap check (one or two `stat` calls) for records appended by other workers since the last `tail`."""
+        try:
+            if os.stat(self._path(self.read_segment)).st_size > self.read_offset:
+                return True
+        except FileNotFoundError:
+            return True  # Discarded after a snapshot; `tail` reports it
+        return os.path.exists(self._path(self.read_segment + 1))
+
+    def tail(self) -> Iterator[dict]:
+        """
+        Yields the complete records after the read position, following segment rotations, and advances
+        the position past each of them. A partially written final record is left for the next call.
+        Raises:
+            FileNotFoundError: The unread segment was discarded after a snapshot; restore that snapshot first.
+        """
+        while True:
+            yield from self._read_segment_tail()
+            if not os.path.exists(self._path(self.read_segment + 1)):
+                break
+            # Rotated: nothing is appended to the old segment any more, so drain it once more and move on
+            yield from self._read_segment_tail()
+            self.read_segment, self.read_offset = self.read_segment + 1, 0
+            self.records_since_snapshot = 0
+        if self.segment != self.read_segment:
+            with self.lock:  # Another worker rotated; append after the last record read from now on
+                self._sync()
+                self.file.close()
+                self.segment = self.read_segment
+                self.file = open(self._path(self.segment), "ab")
+
+    def _read_segment_tail(self) -> Iterator[dict]:
+        with open(self._path(self.read_segment), "rb") as segment:
+            segment.seek(self.read_offset)
+            data = segment.read()
+        end = data.rfind(b"\n") + 1  # Torn or in-flight final write stays unread
+        for line in data[:end].splitlines():
+            self.read_offset += len(line) + 1
+            self.records_since_snapshot += 1
+            yield json.loads(line)
+
+    def close(self):
+        """Stops the background syncer and closes the current segment."""
+        self._closed.set()
+        with self.lock:
+            self._sync()
+            self.file.close()
+
+
+class SharedWriterLock:
+    def __init__(self, data_dir: str, on_acquire: Optional[Callable[[], None]] = None):
+        """
+        Writer lock shared by every worker process serving the same data directory: a thread lock for this
+        process plus an exclusive `flock` on a lock file. `on_acquire` runs once both are held, so a writer
+        first applies the records other workers appended to the log and never works on stale state.
+        Used as a drop-in for the `threading.Lock` that serializes writers within one process.
+        """
+        if fcntl is None:
+            raise RuntimeError("Sharing a data directory between worker processes requires fcntl (POSIX)")
+        self.local = threading.Lock()  # Serializes this process's threads; also guards applying other workers' records
+        self.file = open(os.path.join(data_dir, LOCK_FILE), "a+b")
+        self.on_acquire = on_acquire
+
+    def __enter__(self):
+        self.local.acquire()
+        try:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            if self.on_acquire is not None:
+                self.on_acquire()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self.local.release()
+
+    def close(self):
+        """Closes the lock file once no writer of this process holds the lock."""
+        with self.local:
+            self.file.close()
+
+
+def _snapshot_segments(data_dir: str) -> List[int]:
+    """Returns the log segments the snapshots on disk start from, oldest first."""
+    return sorted(
+        int(name[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)])
+        for name in os.listdir(data_dir)
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)
+    )
+
+
+def _snapshot_path(data_dir: str, segment: int) -> str:
+    return os.path.join(data_dir, f"{SNAPSHOT_PREFIX}{segment:08d}{SNAPSHOT_SUFFIX}")
+
+
+def write_snapshot(data_dir: str, state: dict):
+    """
+    Atomically writes a compact binary snapshot of the store (pickle protocol 5), named after the log
+    segment it starts from, then deletes older snapshots. Workers of a shared store may serialize
+    snapshots concurrently; each writes its own file and the newest one always wins.
+    Args:
+        data_dir (str): Directory holding the snapshot.
+        state (dict): Plain tuples, lists and dicts describing the store, including `wal_segment`,
+            the first log segment not covered by the snapshot.
+    """
+    path = _snapshot_path(data_dir, state["wal_segment"])
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as snapshot:
+        pickle.dump(state, snapshot, protocol=5)
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(tmp_path, path)
+    for segment in _snapshot_segments(data_dir):
+        if segment < state["wal_segment"]:
+            try:
+                os.remove(_snapshot_path(data_dir, segment))
+            except FileNotFoundError:
+                pass  # Removed by another worker
+
+
+def read_snapshot(data_dir: str) -> Optional[dict]:
+    """
+    Loads the newest snapshot through a read-only memory map, without an intermediate copy of the file.
+    Returns:
+        The snapshot state, or None if no snapshot exists.
+    """
+    while True:
+        segments = _snapshot_segments(data_dir)
+        if not segments:
+            return None
+        try:
+            with open(_snapshot_path(data_dir, segments[-1]), "rb") as snapshot, \
+                    mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return pickle.loads(mapped)
+        except FileNotFoundError:
+            continue  # Superseded by a newer snapshot meanwhile
@@ -0,0 +1,132 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from utils.versioning import EMPTY, PersistentSortedList
+
+
+class UserShortlist:
+    __slots__ = ("added_at", "entries", "available")
+
+    def __init__(self):
+        """
+        One user's shortlist:
+            `added_at`: property_id -> shortlist time, for O(1) membership checks (writers only)
+            `entries`: Every shortlisted (timestamp, property_id), oldest first
+            `available`: The entries whose listing is Available, i.e. what reads return
+        Both sorted lists are immutable and replaced on write, so a reader holding one is never affected.
+        """
+        self.added_at: Dict[str, datetime] = {}
+        self.entries: PersistentSortedList = EMPTY
+        self.available: PersistentSortedList = EMPTY
+
+
+class ShortlistStore:
+    def __init__(self):
+        """
+        Shortlists of every user plus the reverse index used to keep them current:
+            `users`: user_id -> UserShortlist
+            `shortlisted_by`: property_id -> IDs of the users who shortlisted it
+            `entry_count`: Number of shortlist entries across all users
+        A status change touches only the shortlists of the users in `shortlisted_by`, so reads never
+        have to filter out Sold listings. Writers are serialized by the caller's lock.
+        """
+        self.users: Dict[str, UserShortlist] = {}
+        self.shortlisted_by: Dict[str, Set[str]] = {}
+        self.entry_count = 0
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.users
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ShortlistStore):
+            return self.to_state() == other.to_state()
+        return NotImplemented
+
+    def contains(self, user_id: str, property_id: str) -> bool:
+        """True if the user has shortlisted the property, in O(1)."""
+        shortlist = self.users.get(user_id)
+        return shortlist is not None and property_id in shortlist.added_at
+
+    def add(self, user_id: str, property_id: str, timestamp: datetime, available: bool) -> bool:
+        """
+        Shortlists a property, keeping the user's entries in order of shortlist time.
+        Returns:
+            False if it was already shortlisted
+        """
+        shortlist = self.users.get(user_id)
+        if shortlist is None:
+            shortlist = self.users[user_id] = UserShortlist()
+        if property_id in shortlist.added_at:
+            return False
+        entry = (timestamp, property_id)
+        shortlist.added_at[property_id] = timestamp
+        shortlist.entries = shortlist.entries.insert(entry)
+        if available:
+            shortlist.available = shortlist.available.insert(entry)
+        self.shortlisted_by.setdefault(property_id, set()).add(user_id)
+        self.entry_count += 1
+        return True
+
+    def remove(self, user_id: str, property_id: str) -> bool:
+        """
+        Removes a property from a user's shortlist; the user keeps an (empty) shortlist.
+        Returns:
+            False if it was not shortlisted
+        """
+        shortlist = self.users.get(user_id)
+        if shortlist is None or property_id not in shortlist.added_at:
+            return False
+        entry = (shortlist.added_at.pop(property_id), property_id)
+        shortlist.entries = shortlist.entries.remove(entry)
+        shortlist.available = shortlist.available.remove(entry)
+        users = self.shortlisted_by[property_id]
+        users.discard(user_id)
+        if not users:
+            del self.shortlisted_by[property_id]
+        self.entry_count -= 1
+        return True
+
+    def set_available(self, property_id: str, available: bool):
+        """Moves a listing in or out of the available view of every user who shortlisted it."""
+        for user_id in self.shortlisted_by.get(property_id, ()):
+            shortlist = self.users[user_id]
+            entry = (shortlist.added_at[property_id], property_id)
+            if available:
+                shortlist.available = shortlist.available.insert(entry)
+            else:
+                shortlist.available = shortlist.available.remove(entry)
+
+    def page(self, user_id: str, page: int = 1, limit: Optional[int] = None) -> List[str]:
+        """
+        Returns the IDs of the user's available shortlisted listings, most recently shortlisted first.
+        Cost depends on the size of the page, not on the size of the shortlist.
+        """
+        shortlist = self.users.get(user_id)
+        if shortlist is None:
+            return []
+        available = shortlist.available  # One immutable version for the whole read
+        count = len(available)
+        if limit is None:
+            start, stop = 0, count
+        else:
+            # Entries are oldest-first, so newest-first page n is a range counted from the end
+            skip = (page - 1) * limit
+            start, stop = max(count - skip - limit, 0), max(count - skip, 0)
+        return [property_id for _, property_id in available.iter_range(start, stop, reverse=True)]
+
+    def to_state(self) -> Dict[str, PersistentSortedList]:
+        """Snapshot form: user_id -> every shortlisted (timestamp, property_id), oldest first."""
+        return {user_id: shortlist.entries for user_id, shortlist in self.users.items()}
+
+    def load(self, state: Dict[str, Iterable[Tuple[datetime, str]]], is_available):
+        """
+        Replaces the shortlists of the users in `state` (see `to_state`).
+        Args:
+            state (dict): user_id -> (timestamp, property_id) entries.
+            is_available (callable): property_id -> True if the listing is Available.
+        """
+        for user_id, entries in state.items():
+            for property_id in list(self.users.get(user_id, UserShortlist()).added_at):
+                self.remove(user_id, property_id)
+            self.users.setdefault(user_id, UserShortlist())
+            for timestamp, property_id in entries:
+                self.add(user_id, property_id, timestamp, is_available(property_id))
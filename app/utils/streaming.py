@@ -0,0 +1,93 @@
+import json
+from typing import Iterable, Iterator
+from models.schemas import PropertyDetail, SearchFacets
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+
+
+def property_json(prop) -> bytes:
+    """
+    Encodes a property exactly as a `PropertyDetail` response model would.
+    The encoding is kept on the Property with the status it was made from, so a listing is validated and
+    encoded once instead of on every response; a status change (the only mutable field) triggers a re-encode.
+    Args:
+        prop (Property): The property to encode.
+    Returns:
+        bytes: Compact UTF-8 JSON object.
+    """
+    fragment = prop.fragment
+    if fragment is None or fragment[0] != prop.status:
+        # Tagged with the status read before encoding: if it changes meanwhile, the next call re-encodes
+        status = prop.status
+        fragment = prop.fragment = (status, PropertyDetail.model_validate(prop).model_dump_json().encode())
+    return fragment[1]
+
+
+def json_array(properties: Iterable) -> bytes:
+    """
+    Assembles a `List[PropertyDetail]` response body from the cached encodings of the properties.
+    Args:
+        properties (Iterable): Property objects, in response order.
+    Returns:
+        bytes: JSON array.
+    """
+    return b"[" + b",".join(property_json(prop) for prop in properties) + b"]"
+
+
+def faceted_json(properties: Iterable, total: int, facets: dict) -> bytes:
+    """
+    Assembles a `FacetedSearchResult` response body: the page from the cached encodings, the facets encoded as
+    a `SearchFacets` model.
+    Args:
+        properties (Iterable): Property objects of the page.
+        total (int): Number of matching listings across all pages.
+        facets (dict): `location`, `property_type` and `price_histogram` counts.
+    Returns:
+        bytes: JSON object with `items`, `total` and `facets`.
+    """
+    return (b'{"items":' + json_array(properties) + b',"total":' + str(int(total)).encode() +
+            b',"facets":' + SearchFacets.model_validate(facets).model_dump_json().encode() + b"}")
+
+
+def matches_json(matches: Iterable) -> bytes:
+    """
+    Assembles a `List[SavedSearchMatch]` response body from the cached encodings of the matched properties.
+    Args:
+        matches (Iterable): ((seq, search_id, property_id), Property) pairs, in response order.
+    Returns:
+        bytes: JSON array of objects with `seq`, `search_id` and `property`.
+    """
+    return b"[" + b",".join(match_json(match, prop) for match, prop in matches) + b"]"
+
+
+def match_json(match: tuple, prop) -> bytes:
+    """
+    Encodes one `SavedSearchMatch` from the cached encoding of the matched property.
+    Args:
+        match (tuple): (seq, search_id, property_id) inbox entry.
+        prop (Property): The matched property.
+    Returns:
+        bytes: Compact JSON object.
+    """
+    seq, search_id, _ = match
+    return b'{"seq":%d,"search_id":%s,"property":%s}' % (seq, json.dumps(search_id).encode(), property_json(prop))
+
+
+def ndjson_stream(properties: Iterable, batch_size: int = 256) -> Iterator[bytes]:
+    """
+    Serializes properties as NDJSON, one `PropertyDetail` object per line.
+    Args:
+        properties (Iterable): Property objects, typically a lazy iterator over an index.
+        batch_size (int): Number of lines per emitted chunk; bounds memory and amortizes per-chunk overhead.
+    Returns:
+        Iterator[bytes]: Chunks of NDJSON lines, suitable for a `StreamingResponse`.
+    """
+    lines = []
+    for prop in properties:
+        lines.append(property_json(prop))
+        if len(lines) == batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
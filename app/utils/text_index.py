@@ -0,0 +1,161 @@
+import heapq
+import math
+import re
+from collections import Counter
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional, Tuple
+from utils.versioning import EMPTY, PersistentSortedList, SortedCursor
+
+K1 = 1.2  # BM25 term frequency saturation
+B = 0.75  # BM25 document length normalization
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was with".split()
+)
+_TOKEN = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Splits text into casefolded alphanumeric terms, without stopwords."""
+    if not text:
+        return []
+    return [term for term in _TOKEN.findall(text.casefold()) if term not in STOPWORDS]
+
+
+def term_frequencies(text: Optional[str]) -> Tuple[Dict[str, int], int]:
+    """
+    Returns:
+        (term -> frequency, document length in terms) of a description
+    """
+    terms = tokenize(text)
+    return Counter(terms), len(terms)
+
+
+class Postings:
+    __slots__ = ("entries", "max_tf")
+
+    def __init__(self, entries: PersistentSortedList = EMPTY, max_tf: int = 0):
+        """
+        Immutable posting list of one term:
+            `entries`: (row, term frequency, document length) of every available listing containing the term,
+                       in row order
+            `max_tf`: Highest term frequency ever added; never lowered on removal, so it stays a valid upper bound
+        """
+        self.entries = entries
+        self.max_tf = max_tf
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Postings):
+            return self.entries == other.entries
+        return NotImplemented
+
+    def add(self, row: int, tf: int, length: int) -> "Postings":
+        return Postings(self.entries.insert((row, tf, length)), max(self.max_tf, tf))
+
+    def merge(self, entries: List[Tuple[int, int, int]]) -> "Postings":
+        return Postings(self.entries.merge(entries), max(self.max_tf, max(tf for _, tf, _ in entries)))
+
+    def remove(self, row: int, tf: int, length: int) -> "Postings":
+        return Postings(self.entries.remove((row, tf, length)), self.max_tf)
+
+    def lookup(self, row: int) -> Optional[Tuple[int, int, int]]:
+        """Returns the entry of `row`, or None, by binary search."""
+        position = self.entries.bisect_left((row,))
+        if position < len(self.entries):
+            entry = self.entries[position]
+            if entry[0] == row:
+                return entry
+        return None
+
+
+class BM25:
+    def __init__(self, postings: List[Postings], doc_count: int, total_length: int):
+        """
+        Okapi BM25 scorer for one query:
+            `postings`: Posting lists of the query terms present in the index
+            `doc_count`, `total_length`: Number and total length of the indexed listings
+        """
+        average_length = total_length / doc_count if doc_count else 1.0
+        self.postings = postings
+        self.idf = [math.log(1 + (doc_count - len(p) + 0.5) / (len(p) + 0.5)) for p in postings]
+        self.norm = K1 / average_length  # Per-term-of-length part of the denominator
+        # Score bound of each term: highest tf with the shortest possible document
+        self.upper_bounds = [
+            idf * p.max_tf * (K1 + 1) / (p.max_tf + K1 * (1 - B)) for idf, p in zip(self.idf, postings)
+        ]
+
+    def term_score(self, term: int, tf: int, length: int) -> float:
+        return self.idf[term] * tf * (K1 + 1) / (tf + K1 * (1 - B) + B * self.norm * length)
+
+    def score(self, row: int) -> float:
+        """Scores one listing by looking it up in every posting list; 0.0 if it contains no query term."""
+        total = 0.0
+        for term, postings in enumerate(self.postings):
+            entry = postings.lookup(row)
+            if entry is not None:
+                total += self.term_score(term, entry[1], entry[2])
+        return total
+
+    def top_k(self, k: Optional[int], accept: Callable[[int], bool]) -> List[Tuple[float, int]]:
+        """
+        MaxScore top-k: walks the posting lists in row order, but once the k-th best score exceeds the summed
+        bounds of the weakest terms, those terms stop producing candidates and are only looked up (by a forward
+        seek) for rows found through the others, so popular terms are never scored in full.
+        Parameters:
+            `k`: Number of results wanted; None ranks every match
+            `accept`: Filter on rows, applied only to rows that would enter the top k
+        Returns:
+            (score, row) pairs, best first; ties go to the lower row
+        """
+        order = sorted(range(len(self.postings)), key=lambda term: self.upper_bounds[term])
+        bounds = list(accumulate(self.upper_bounds[term] for term in order))  # bounds[i]: sum over order[:i + 1]
+        cursors = [SortedCursor(self.postings[term].entries) for term in order]
+        weights = [self.idf[term] * (K1 + 1) for term in order]
+        base, per_length = K1 * (1 - B), B * self.norm
+        heap: List[Tuple[float, int]] = []  # (score, -row), the worst result on top
+        threshold = 0.0
+        full = False
+        first_essential = 0  # Terms order[first_essential:] can still make a listing enter the top k on their own
+
+        while first_essential < len(order):
+            row = None
+            for cursor in cursors[first_essential:]:
+                if cursor.current is not None and (row is None or cursor.current[0] < row):
+                    row = cursor.current[0]
+            if row is None:
+                break
+
+            score = 0.0
+            for i in range(first_essential, len(order)):
+                entry = cursors[i].current
+                if entry is not None and entry[0] == row:
+                    _, tf, length = entry
+                    score += weights[i] * tf / (tf + base + per_length * length)
+                    cursors[i].advance()
+            for i in range(first_essential - 1, -1, -1):
+                if score + bounds[i] <= threshold:
+                    break  # Even a match on every remaining term cannot reach the top k
+                entry = cursors[i].seek((row,))
+                if entry is not None and entry[0] == row:
+                    _, tf, length = entry
+                    score += weights[i] * tf / (tf + base + per_length * length)
+
+            if full and score <= threshold:
+                continue
+            if not accept(row):
+                continue
+            heapq.heappush(heap, (score, -row))
+            if full:
+                heapq.heappop(heap)
+                threshold = heap[0][0]
+                while first_essential < len(order) and bounds[first_essential] <= threshold:
+                    first_essential += 1
+            elif k is not None and len(heap) == k:
+                full = True
+                threshold = heap[0][0]
+                while first_essential < len(order) and bounds[first_essential] <= threshold:
+                    first_essential += 1
+        return [(score, -negative_row) for score, negative_row in sorted(heap, reverse=True)]
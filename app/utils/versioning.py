@@ -0,0 +1,364 @@
+import bisect
+import zlib
+from itertools import accumulate, chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from utils.bitmap import RowIds
+from utils.facets import EMPTY_HISTOGRAM
+
+CHUNK_SIZE = 512  # Target number of entries per chunk of a PersistentSortedList
+SHARDS = 1024  # Number of sub-dictionaries of a ShardedDict; a power of two
+HIGHEST = chr(0x10FFFF)  # Sorts after every property_id; (value, HIGHEST) bounds all entries with that value
+
+
+class PersistentSortedList:
+    __slots__ = ("_chunks", "_maxes", "_offsets")
+
+    def __init__(self, items: Iterable = ()):
+        """
+        Immutable sorted sequence stored as a list of sorted chunks (tuples). Every update returns a new list
+        that shares all untouched chunks with the old one, so a write copies one chunk plus the chunk directory
+        instead of the whole sequence, and readers holding the old list are never affected.
+        """
+        items = sorted(items)
+        self._set_chunks([tuple(items[i:i + CHUNK_SIZE]) for i in range(0, len(items), CHUNK_SIZE)])
+
+    @classmethod
+    def _from_chunks(cls, chunks: List[tuple], maxes: Optional[list] = None) -> "PersistentSortedList":
+        new = cls.__new__(cls)
+        new._set_chunks(chunks, maxes)
+        return new
+
+    def _set_chunks(self, chunks: List[tuple], maxes: Optional[list] = None):
+        self._chunks = chunks
+        self._maxes = maxes if maxes is not None else [chunk[-1] for chunk in chunks]
+        self._offsets = None  # Built on first positional access, so writes don't pay for it
+
+    def _replace(self, chunk_number: int, replacement: List[tuple]) -> "PersistentSortedList":
+        """Returns a new list with one chunk replaced by `replacement` (zero, one or two chunks); the rest is shared."""
+        return PersistentSortedList._from_chunks(
+            self._chunks[:chunk_number] + replacement + self._chunks[chunk_number + 1:],
+            self._maxes[:chunk_number] + [chunk[-1] for chunk in replacement] + self._maxes[chunk_number + 1:],
+        )
+
+    @property
+    def _positions(self) -> list:
+        """Position of each chunk's first entry, plus the total length."""
+        if self._offsets is None:
+            self._offsets = [0, *accumulate(len(chunk) for chunk in self._chunks)]
+        return self._offsets
+
+    def __reduce__(self):
+        # Pickle the chunks as they are, so a snapshot loads without re-sorting
+        return PersistentSortedList._from_chunks, (self._chunks,)
+
+    def __len__(self) -> int:
+        return self._positions[-1]
+
+    def __bool__(self) -> bool:  # Avoids building positions just to test emptiness
+        return bool(self._chunks)
+
+    def __iter__(self) -> Iterator:
+        for chunk in self._chunks:
+            yield from chunk
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (PersistentSortedList, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PersistentSortedList({list(self)!r})"
+
+    def _locate(self, position: int):
+        """Returns (chunk number, offset in chunk) of a position."""
+        positions = self._positions
+        chunk_number = bisect.bisect_right(positions, position) - 1
+        return chunk_number, position - positions[chunk_number]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return list(self)[key]
+            return list(self.iter_range(start, stop))
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("PersistentSortedList index out of range")
+        chunk_number, offset = self._locate(key)
+        return self._chunks[chunk_number][offset]
+
+    def bisect_left(self, item) -> int:
+        """Position of the first entry >= item."""
+        chunk_number = bisect.bisect_left(self._maxes, item)
+        if chunk_number == len(self._chunks):
+            return len(self)
+        return self._positions[chunk_number] + bisect.bisect_left(self._chunks[chunk_number], item)
+
+    def bisect_right(self, item) -> int:
+        """Position of the first entry > item."""
+        chunk_number = bisect.bisect_right(self._maxes, item)
+        if chunk_number == len(self._chunks):
+            return len(self)
+        return self._positions[chunk_number] + bisect.bisect_right(self._chunks[chunk_number], item)
+
+    def iter_range(self, start: int, stop: int, reverse: bool = False) -> Iterator:
+        """Yields the entries at positions [start, stop), in reverse order if requested."""
+        start, stop = max(start, 0), min(stop, len(self))
+        if start >= stop:
+            return
+        first, first_offset = self._locate(start)
+        last, last_offset = self._locate(stop - 1)
+        if not reverse:
+            for chunk_number in range(first, last + 1):
+                chunk = self._chunks[chunk_number]
+                lo = first_offset if chunk_number == first else 0
+                hi = last_offset + 1 if chunk_number == last else len(chunk)
+                yield from chunk[lo:hi]
+        else:
+            for chunk_number in range(last, first - 1, -1):
+                chunk = self._chunks[chunk_number]
+                lo = first_offset if chunk_number == first else 0
+                hi = last_offset + 1 if chunk_number == last else len(chunk)
+                yield from reversed(chunk[lo:hi])
+
+    def insert(self, item) -> "PersistentSortedList":
+        """Returns a new list with `item` added."""
+        if not self._chunks:
+            return PersistentSortedList._from_chunks([(item,)])
+        if item > self._maxes[-1] and len(self._chunks[-1]) >= CHUNK_SIZE:
+            # Appends (rising timestamps, new row ids) start a new chunk instead of copying a full one
+            return PersistentSortedList._from_chunks(self._chunks + [(item,)], self._maxes + [item])
+        chunk_number = min(bisect.bisect_left(self._maxes, item), len(self._chunks) - 1)
+        chunk = self._chunks[chunk_number]
+        position = bisect.bisect_left(chunk, item)
+        new_chunk = chunk[:position] + (item,) + chunk[position:]
+        if len(new_chunk) > 2 * CHUNK_SIZE:
+            return self._replace(chunk_number, [new_chunk[:CHUNK_SIZE], new_chunk[CHUNK_SIZE:]])
+        return self._replace(chunk_number, [new_chunk])
+
+    def remove(self, item) -> "PersistentSortedList":
+        """Returns a new list without `item`, or this list if `item` is absent."""
+        chunk_number = bisect.bisect_left(self._maxes, item)
+        if chunk_number == len(self._chunks):
+            return self
+        chunk = self._chunks[chunk_number]
+        position = bisect.bisect_left(chunk, item)
+        if position == len(chunk) or chunk[position] != item:
+            return self
+        new_chunk = chunk[:position] + chunk[position + 1:]
+        return self._replace(chunk_number, [new_chunk] if new_chunk else [])
+
+    def merge(self, items: Iterable) -> "PersistentSortedList":
+        """
+        Returns a new list with a batch of items added. Only the chunks the batch lands in are rebuilt, each with
+        one linear merge of the two sorted runs; the rest is shared, so a small batch into a large list costs about
+        as much as a few inserts.
+        """
+        items = sorted(items)
+        if not items:
+            return self
+        if not self._chunks:
+            return PersistentSortedList._from_chunks(
+                [tuple(items[i:i + CHUNK_SIZE]) for i in range(0, len(items), CHUNK_SIZE)]
+            )
+        chunks, maxes = [], []
+        start, done, last = 0, 0, len(self._chunks) - 1  # Chunks before `done` are already in the result
+        while start < len(items):
+            chunk_number = min(bisect.bisect_left(self._maxes, items[start], done), last)
+            # Items up to this chunk's max belong to it; the last chunk takes everything left
+            stop = len(items) if chunk_number == last else bisect.bisect_right(items, self._maxes[chunk_number], start)
+            chunks.extend(self._chunks[done:chunk_number])
+            maxes.extend(self._maxes[done:chunk_number])
+            merged = tuple(sorted(self._chunks[chunk_number] + tuple(items[start:stop])))  # Timsort merges the two runs
+            pieces = [merged] if len(merged) <= 2 * CHUNK_SIZE else \
+                [merged[i:i + CHUNK_SIZE] for i in range(0, len(merged), CHUNK_SIZE)]
+            chunks.extend(pieces)
+            maxes.extend(piece[-1] for piece in pieces)
+            start, done = stop, chunk_number + 1
+        chunks.extend(self._chunks[done:])
+        maxes.extend(self._maxes[done:])
+        return PersistentSortedList._from_chunks(chunks, maxes)
+
+
+EMPTY = PersistentSortedList()
+
+
+class SortedCursor:
+    __slots__ = ("_chunks", "_maxes", "_chunk_number", "_offset", "current")
+
+    def __init__(self, items: PersistentSortedList):
+        """
+        Forward-only cursor over a `PersistentSortedList`, for merging and intersecting sorted lists:
+        `current` is the entry under the cursor, or None once it has passed the end.
+        """
+        self._chunks = items._chunks
+        self._maxes = items._maxes
+        self._chunk_number = 0
+        self._offset = 0
+        self.current = self._chunks[0][0] if self._chunks else None
+
+    def advance(self):
+        """Moves to the next entry."""
+        self._offset += 1
+        if self._offset == len(self._chunks[self._chunk_number]):
+            self._chunk_number += 1
+            self._offset = 0
+            if self._chunk_number == len(self._chunks):
+                self.current = None
+                return
+        self.current = self._chunks[self._chunk_number][self._offset]
+
+    def seek(self, item):
+        """Moves to the first entry >= item, never backwards, and returns it (None past the end)."""
+        if self.current is None or not self.current < item:
+            return self.current
+        if self._maxes[self._chunk_number] < item:
+            self._chunk_number = bisect.bisect_left(self._maxes, item, self._chunk_number + 1)
+            self._offset = 0
+            if self._chunk_number == len(self._chunks):
+                self.current = None
+                return None
+        chunk = self._chunks[self._chunk_number]
+        self._offset = bisect.bisect_left(chunk, item, self._offset)
+        self.current = chunk[self._offset]
+        return self.current
+
+
+def shard_of(key) -> int:
+    """
+    Shard of a key, a string or a tuple of strings; a stable hash, unlike `hash()`, so snapshots load in any process.
+    """
+    if isinstance(key, tuple):
+        key = "\0".join(key)
+    return zlib.crc32(key.encode()) & (SHARDS - 1)
+
+
+class ShardedDict:
+    __slots__ = ("shards",)
+
+    def __init__(self, shards: Optional[tuple] = None):
+        """
+        Immutable dictionary split into `SHARDS` sub-dictionaries, for indices with too many keys to copy on every
+        write (terms, owners, locations): a draft copies only the shards it writes to.
+        """
+        self.shards = shards if shards is not None else tuple({} for _ in range(SHARDS))
+
+    def get(self, key, default=None):
+        return self.shards[shard_of(key)].get(key, default)
+
+    def __getitem__(self, key):
+        return self.shards[shard_of(key)][key]
+
+    def __contains__(self, key) -> bool:
+        return key in self.shards[shard_of(key)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ShardedDict):
+            return self.shards == other.shards
+        return NotImplemented
+
+    def keys(self) -> Iterator:
+        return chain.from_iterable(self.shards)
+
+    def items(self) -> Iterator:
+        return chain.from_iterable(shard.items() for shard in self.shards)
+
+
+class IndexVersion:
+    __slots__ = ("price_index", "timestamp_index", "location_index", "location_type_index", "owner_index",
+                 "amenity_index", "term_index", "text_stats", "location_counts", "type_counts", "price_histogram")
+
+    def __init__(self, price_index: PersistentSortedList = EMPTY, timestamp_index: PersistentSortedList = EMPTY,
+                 location_index: Optional[ShardedDict] = None, location_type_index: Optional[ShardedDict] = None,
+                 owner_index: Optional[ShardedDict] = None, amenity_index: Optional[Dict] = None,
+                 term_index: Optional[ShardedDict] = None, text_stats: Tuple[int, int] = (0, 0),
+                 location_counts: Optional[Dict] = None, type_counts: Optional[Dict] = None,
+                 price_histogram: Tuple[int, ...] = EMPTY_HISTOGRAM):
+        """
+        One immutable, published version of every search index:
+            `price_index`: (price, property_id) entries
+            `timestamp_index`: (timestamp, property_id) entries
+            `location_index`: location -> (price, property_id) entries
+            `location_type_index`: (location, property_type) -> (price, property_id) entries
+            `owner_index`: user_id -> (timestamp, property_id) entries of available listings
+            `amenity_index`: casefolded amenity -> `Bitmap` of the row ids of available listings offering it
+            `term_index`: description term -> `Postings` of the available listings containing it
+            `text_stats`: (number, total term count) of the descriptions in `term_index`, for BM25
+            `location_counts`, `type_counts`: location / property type -> number of available listings
+            `price_histogram`: Number of available listings per `utils.facets.PRICE_EDGES` price bucket
+        Readers grab one version and use it for the whole request; it never changes underneath them.
+        """
+        self.price_index = price_index
+        self.timestamp_index = timestamp_index
+        self.location_index = location_index if location_index is not None else ShardedDict()
+        self.location_type_index = location_type_index if location_type_index is not None else ShardedDict()
+        self.owner_index = owner_index if owner_index is not None else ShardedDict()
+        self.amenity_index = amenity_index if amenity_index is not None else {}
+        self.term_index = term_index if term_index is not None else ShardedDict()
+        self.text_stats = text_stats
+        self.location_counts = location_counts if location_counts is not None else {}
+        self.type_counts = type_counts if type_counts is not None else {}
+        self.price_histogram = price_histogram
+
+
+class IndexDraft:
+    def __init__(self, base: IndexVersion, row_ids: RowIds):
+        """
+        Writer-private next version, started from `base`. Sorted lists are replaced, never mutated;
+        dictionaries are copied the first time a write touches them (`writable`), so untouched ones stay shared;
+        sharded dictionaries the same way, one shard at a time (`writable_shard`).
+        `row_ids` assigns the dense row ids of the bitmap and term indices.
+        """
+        for name in IndexVersion.__slots__:
+            setattr(self, name, getattr(base, name))
+        self.row_ids = row_ids
+        self._copied = set()
+        self._shards: Dict[str, list] = {}  # name -> draft-private list of shards of a ShardedDict
+
+    def writable(self, name: str) -> dict:
+        """Returns a private copy of one of the index dictionaries, safe to modify."""
+        if name not in self._copied:
+            setattr(self, name, dict(getattr(self, name)))
+            self._copied.add(name)
+        return getattr(self, name)
+
+    def writable_shard(self, name: str, key) -> dict:
+        """Returns a private copy of the shard of a `ShardedDict` index holding `key`, safe to modify."""
+        shards = self._shards.get(name)
+        if shards is None:
+            shards = self._shards[name] = list(getattr(self, name).shards)
+        shard = shard_of(key)
+        if (name, shard) not in self._copied:
+            shards[shard] = dict(shards[shard])
+            self._copied.add((name, shard))
+        return shards[shard]
+
+    def build(self) -> IndexVersion:
+        """Freezes the draft into a new version."""
+        for name, shards in self._shards.items():
+            setattr(self, name, ShardedDict(tuple(shards)))
+        return IndexVersion(*(getattr(self, name) for name in IndexVersion.__slots__))
+
+
+class VersionedIndices:
+    def __init__(self, initial: Optional[IndexVersion] = None):
+        """
+        Holder of the current index version. Publishing is a single reference assignment, which is atomic,
+        so readers never block and are never blocked by writers. Writers are serialized by the caller's lock.
+        """
+        self.current = initial if initial is not None else IndexVersion()
+        self.version = 0
+        self.row_ids = RowIds()  # Append-only, shared by every version
+
+    def begin(self) -> IndexDraft:
+        """Starts a new version from the current one."""
+        return IndexDraft(self.current, self.row_ids)
+
+    def publish(self, draft: IndexDraft):
+        """Makes the draft the version seen by every new reader."""
+        self.current = draft.build()
+        self.version += 1